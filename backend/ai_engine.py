@@ -210,12 +210,13 @@ def _get_fallback_summary(title, content=""):
         "tags": []
     }
 
-def generate_news_summary(title, content=""):
+def request_news_summary(title, content=""):
     """
     根据用户专用提示词，生成 '事实' + '角度' + '分类' + '标签' json
+    未配置大模型、调用失败或返回无法解析时抛出异常 (摘要任务队列据此重试 / 进入死信)
     """
     if not client:
-        return _get_fallback_summary(title, content)
+        raise RuntimeError("DEEPSEEK_API_KEY 未配置")
     
     # 构造内容
     full_text = f"标题：{title}\n内容摘要：{content[:800]}"
@@ -241,33 +242,39 @@ def generate_news_summary(title, content=""):
     }}
     """
 
-    try:
-        response = client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": full_text}
-            ],
-            stream=False
-        )
-        
-        raw = response.choices[0].message.content
-        clean = extract_json(raw)
-        data = json.loads(clean)
-        
-        # Fallback defaults
-        fallback = _get_fallback_summary(title, content)
-        if "fact" not in data: data["fact"] = fallback["fact"]
-        if "angle" not in data: data["angle"] = fallback["angle"]
-        if "category" not in data: data["category"] = "综合"
-        if "tags" not in data: data["tags"] = []
-        
-        return data
+    response = client.chat.completions.create(
+        model="deepseek-chat",
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": full_text}
+        ],
+        stream=False
+    )
+    
+    raw = response.choices[0].message.content
+    clean = extract_json(raw)
+    data = json.loads(clean)
+    
+    # Fallback defaults
+    fallback = _get_fallback_summary(title, content)
+    if "fact" not in data: data["fact"] = fallback["fact"]
+    if "angle" not in data: data["angle"] = fallback["angle"]
+    if "category" not in data: data["category"] = "综合"
+    if "tags" not in data: data["tags"] = []
+    
+    return data
 
+def generate_news_summary(title, content=""):
+    """同 request_news_summary，未配置大模型或调用失败时返回按正文截取的兜底摘要"""
+    if not client:
+        return _get_fallback_summary(title, content)
+    try:
+        return request_news_summary(title, content)
     except Exception as e:
         print(f"❌ 新闻提炼失败: {e}")
         return _get_fallback_summary(title, content)
 
+
 # === 5. 事件脉络梳理 (Event Pulse) ===
 def _get_mock_pulse(title):
     return {
@@ -119,7 +119,7 @@ def save_loose_tag(cursor, article_id, tag_name, tag_type):
         save_article_tag(cursor, article_id, tid, 0.8, "AI")
 
 def save_article_tag(cursor, article_id, tag_id, confidence, source):
-    # Expects article_id to be stored as string in article_tags
+    # article_id 为 mentions.id：字符串 article_id 保留兼容，内容库按整数 mention_id 关联
     art_id_str = str(article_id)
     # Check duplicate
     cursor.execute("SELECT id FROM article_tags WHERE article_id=? AND tag_id=?", (art_id_str, tag_id))
@@ -127,8 +127,8 @@ def save_article_tag(cursor, article_id, tag_id, confidence, source):
         return # Already exists
         
     cursor.execute(
-        "INSERT INTO article_tags (article_id, tag_id, confidence, source) VALUES (?,?,?,?)",
-        (art_id_str, tag_id, confidence, source)
+        "INSERT INTO article_tags (article_id, mention_id, tag_id, confidence, source) VALUES (?,?,?,?,?)",
+        (art_id_str, int(article_id), tag_id, confidence, source)
     )
     # Increment count
     cursor.execute("UPDATE tags SET count = count + 1 WHERE id=?", (tag_id,))
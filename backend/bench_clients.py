@@ -0,0 +1,210 @@
+"""
+客户列表基准：一次取回全部客户统计的 get_all_clients (全量累计表 + 一条按小时索引的分组趋势查询) vs 原先每个客户逐项查询 (N+1)
+
+用法: python bench_clients.py [客户数 ...]   (默认 10 50 150)
+每个客户数在各自的临时库中建库：20 万条全局内容分布在 90 天内，每个客户命中约 1500 条，回灌小时汇总表；
+两个对照组按原样保留在本文件中：
+- raw N+1: 最初的实现，每个客户 3 条情感 + 7 条趋势计数直接查 mention_matches (窗口未按整点对齐，只计时)
+- rollup N+1: 改造前的实现，每个客户 1 + 7 条查询读小时汇总表，先与新实现校验结果一致
+再计时并统计每次调用执行的查询数。
+"""
+import sys
+import os
+import time
+import json
+import random
+import sqlite3
+import tempfile
+import statistics
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BACKEND_DIR)
+
+# 在导入业务模块之前切到临时目录，模块导入时的建表只会落在临时库里
+os.chdir(tempfile.mkdtemp(prefix="bench_clients_"))
+
+import radar_monitor
+import radar_rollup
+from radar_migrations import run_migrations
+
+MENTIONS = 200000
+MATCHES_PER_CLIENT = 1500
+DAYS = 90
+SOURCES = ["微博热搜", "36氪", "虎嗅", "头条号", "Google新闻"]
+
+# ==========================================
+# 原实现 (对照组)
+# ==========================================
+
+def raw_get_all_clients():
+    conn = sqlite3.connect(radar_monitor.DB_FILE)
+    c = conn.cursor()
+    c.execute("SELECT client_id, name, monitor_logic, industry, status FROM client_config")
+    res = []
+    for row in c.fetchall():
+        cid, cname, logic_str, industry, status = row
+        try:
+            logic = json.loads(logic_str)
+        except:
+            logic = {}
+
+        # 1. Sentiment Distribution (All time or last 30 days)
+        # Pos: >0.3, Neg: <-0.1
+        c.execute("SELECT count(*) FROM mention_matches WHERE client_id=? AND sentiment > 0.3", (cid,))
+        pos = c.fetchone()[0]
+        c.execute("SELECT count(*) FROM mention_matches WHERE client_id=? AND sentiment < -0.1", (cid,))
+        neg = c.fetchone()[0]
+        c.execute("SELECT count(*) FROM mention_matches WHERE client_id=? AND sentiment BETWEEN -0.1 AND 0.3", (cid,))
+        neu = c.fetchone()[0]
+
+        total_sent = pos + neg + neu
+        if total_sent == 0: total_sent = 1
+
+        # 2. 7-Day Trend
+        trend_vals = []
+        now = time.time()
+        for i in range(6, -1, -1):
+            t_start = now - (i+1) * 86400
+            t_end = now - i * 86400
+            c.execute("SELECT count(*) FROM mention_matches WHERE client_id=? AND publish_time BETWEEN ? AND ?", (cid, t_start, t_end))
+            trend_vals.append(c.fetchone()[0])
+
+        res.append({
+            "client_id": cid,
+            "name": cname,
+            "industry": industry,
+            "status": status,
+            "config": logic,
+            "stats": {
+                "sentiment": [
+                    int((neg/total_sent)*100),
+                    int((neu/total_sent)*100),
+                    int((pos/total_sent)*100)
+                ], # [Neg%, Neu%, Pos%]
+                "trend": trend_vals # [d-6, ..., d-0]
+            }
+        })
+
+    conn.close()
+    return res
+
+def legacy_get_all_clients():
+    conn = sqlite3.connect(radar_monitor.DB_FILE)
+    c = conn.cursor()
+    c.execute("SELECT client_id, name, monitor_logic, industry, status FROM client_config")
+    res = []
+
+    # Pre-fetch stats for efficiency (or just loop query for simplicity if volume low)
+    # Looping is fine for < 50 clients.
+
+    for row in c.fetchall():
+        cid, cname, logic_str, industry, status = row
+        try:
+            logic = json.loads(logic_str)
+        except:
+            logic = {}
+
+        # 1. Sentiment Distribution (All time, 小时汇总表)
+        # Pos: >0.3, Neg: <-0.1
+        c.execute("SELECT COALESCE(sum(pos), 0), COALESCE(sum(neg), 0), COALESCE(sum(neu), 0) FROM mention_rollup_hourly WHERE client_id=?", (cid,))
+        pos, neg, neu = c.fetchone()
+
+        total_sent = pos + neg + neu
+        if total_sent == 0: total_sent = 1
+
+        # 2. 7-Day Trend (每段 24 个整点小时，最后一段含当前小时)
+        trend_vals = []
+        end_hour = radar_rollup.floor_hour(time.time()) + radar_rollup.ROLLUP_HOUR
+        for i in range(6, -1, -1):
+            t_start = end_hour - (i+1) * 86400
+            t_end = end_hour - i * 86400
+            c.execute("SELECT COALESCE(sum(total), 0) FROM mention_rollup_hourly WHERE client_id=? AND hour >= ? AND hour < ?", (cid, t_start, t_end))
+            trend_vals.append(c.fetchone()[0])
+
+        res.append({
+            "client_id": cid,
+            "name": cname,
+            "industry": industry,
+            "status": status,
+            "config": logic,
+            "stats": {
+                "sentiment": [
+                    int((neg/total_sent)*100),
+                    int((neu/total_sent)*100),
+                    int((pos/total_sent)*100)
+                ], # [Neg%, Neu%, Pos%]
+                "trend": trend_vals # [d-6, ..., d-0]
+            }
+        })
+
+    conn.close()
+    return res
+
+# ==========================================
+# 基准
+# ==========================================
+
+def build(db_file, clients, seed=13):
+    radar_monitor.DB_FILE = radar_rollup.DB_FILE = db_file
+    run_migrations(db_file)
+    rnd = random.Random(seed)
+    now = time.time()
+    conn = sqlite3.connect(db_file)
+    c = conn.cursor()
+    c.executemany("INSERT INTO mentions (source, title, url, publish_time, sentiment_score, risk_level) VALUES (?,?,?,?,?,?)",
+                  [(rnd.choice(SOURCES), f"内容 {i}", f"https://example.com/{i}", now - rnd.random() * DAYS * 86400,
+                    round(rnd.uniform(-1, 1), 2), 0) for i in range(MENTIONS)])
+    logic = json.dumps({"brand_keywords": ["品牌"]}, ensure_ascii=False)
+    c.executemany("INSERT INTO client_config (client_id, name, industry, status, monitor_logic, config_version) VALUES (?,?,?,?,?,1)",
+                  [(f"CLI_BENCH_{k}", f"客户{k}", "汽车", 1, logic) for k in range(clients)])
+    for k in range(clients):
+        c.executemany("INSERT OR IGNORE INTO mention_matches (mention_id, client_id, risk_level, sentiment, publish_time) VALUES (?,?,?,?,?)",
+                      [(m_id, f"CLI_BENCH_{k}", rnd.choice([0, 1, 2, 3]), round(rnd.uniform(-1, 1), 2), now - rnd.random() * DAYS * 86400)
+                       for m_id in rnd.sample(range(1, MENTIONS + 1), MATCHES_PER_CLIENT)])
+    conn.commit()
+    conn.close()
+    radar_rollup.rebuild_rollup()
+
+def count_queries(fn):
+    """统计一次调用在数据库连接上执行的语句数"""
+    statements = []
+    connect = sqlite3.connect
+    def tracing_connect(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        conn.set_trace_callback(statements.append)
+        return conn
+    sqlite3.connect = tracing_connect
+    try:
+        fn()
+    finally:
+        sqlite3.connect = connect
+    return len(statements)
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+def run(clients, repeat=5):
+    db_file = os.path.abspath(f"clients_{clients}.db")
+    t0 = time.perf_counter()
+    build(db_file, clients)
+    print(f"建库 {clients} 个客户 ({MENTIONS} 条内容, 每个客户 {MATCHES_PER_CLIENT} 条命中): {time.perf_counter() - t0:.1f}s")
+    old, new = legacy_get_all_clients(), radar_monitor.get_all_clients()
+    assert old == new, f"{clients} 个客户: 结果与原实现不一致"
+    t_new = timed(radar_monitor.get_all_clients, repeat)
+    q_new = count_queries(radar_monitor.get_all_clients)
+    for label, fn in [("raw N+1", raw_get_all_clients), ("rollup N+1", legacy_get_all_clients)]:
+        t_old = timed(fn, repeat)
+        print(f"  {label:<10} {t_old * 1000:>8.1f} ms ({count_queries(fn):>5} 条查询)   x{t_old / t_new:.1f}")
+    print(f"  {'grouped':<10} {t_new * 1000:>8.1f} ms ({q_new:>5} 条查询)")
+
+
+if __name__ == "__main__":
+    counts = [int(a) for a in sys.argv[1:]] or [10, 50, 150]
+    print("=== get_all_clients 延迟 ===")
+    for n in counts:
+        run(n)
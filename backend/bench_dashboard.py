@@ -0,0 +1,227 @@
+"""
+看板统计基准：读小时汇总表 (mention_rollup_hourly) 的 get_monitor_stats vs 原先逐项 count(*) 扫描原始行
+
+用法: python bench_dashboard.py [mentions 行数] [天数]   (默认 1000000 条，90 天)
+在临时目录中建库，按天数均匀分布写入内容，并为 10 个客户各写入约 3% 的命中记录，再全量回灌汇总表；
+原实现按改造前的代码原样保留在本文件中作为对照。
+新实现的今日 / 昨日窗口按整点小时对齐，先与同样窗口下对原始行的直接计数校验一致，7 天趋势与原实现校验一致，再计时。
+"""
+import sys
+import os
+import time
+import random
+import sqlite3
+import tempfile
+import statistics
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BACKEND_DIR)
+
+# 在导入业务模块之前切到临时目录，模块导入时的建表只会落在临时库里
+os.chdir(tempfile.mkdtemp(prefix="bench_dashboard_"))
+
+import radar_monitor
+import radar_rollup
+
+DAYS = 90
+CLIENTS = [f"CLI_BENCH_{i}" for i in range(10)]
+SOURCES = ["微博热搜", "36氪", "虎嗅", "头条号", "Google新闻"]
+WORDS = ["价格", "电池", "续航", "服务", "质量", "发热", "卡顿", "发布", "财报", "召回"]
+
+# ==========================================
+# 原实现 (对照组)
+# ==========================================
+
+def legacy_get_monitor_stats(client_id=None):
+    conn = sqlite3.connect(radar_monitor.DB_FILE)
+    c = conn.cursor()
+    
+    # 基础统计 (Top Cards)
+    now = time.time()
+    day_seconds = 86400
+    
+    # Client Filter Condition (客户维度读 mention_matches)
+    base_filter = ""
+    params = []
+    table = "mentions"
+    if client_id:
+        table = radar_monitor.CLIENT_MENTIONS
+        base_filter = " AND client_id = ?"
+        params.append(client_id)
+        
+    c.execute(f"SELECT count(*) FROM {table} WHERE publish_time > ? {base_filter}", [now - day_seconds] + params)
+    today_count = c.fetchone()[0]
+    
+    # Yesterday for Prophet Velocity
+    c.execute(f"SELECT count(*) FROM {table} WHERE publish_time BETWEEN ? AND ? {base_filter}", [now - day_seconds * 2, now - day_seconds] + params)
+    yesterday_count = c.fetchone()[0]
+    
+    velocity = today_count - yesterday_count
+    velocity_display = f"{'+' if velocity > 0 else ''}{velocity}/d"
+    
+    c.execute(f"SELECT count(*) FROM {table} WHERE risk_level >= 2 AND publish_time > ? {base_filter}", [now - day_seconds] + params)
+    risk_count = c.fetchone()[0]
+    
+    # Level: 1-5 based on risk count
+    level = 1
+    if risk_count > 50: level = 5
+    elif risk_count > 20: level = 4
+    elif risk_count > 10: level = 3
+    elif risk_count > 5: level = 2
+    
+    # 图表数据 (Charts)
+    # 模拟 7 天趋势
+    trend = {"x": [], "y": []}
+    for i in range(6, -1, -1):
+        t = now - i * day_seconds
+        d_str = time.strftime("%m-%d", time.localtime(t))
+        trend["x"].append(d_str)
+        
+        # 实际查询每一天的数据量
+        d_start = t - (t % day_seconds) # 00:00 (rough approx)
+        d_end = d_start + day_seconds   # 23:59
+        
+        c.execute(f"SELECT count(*) FROM {table} WHERE publish_time BETWEEN ? AND ? {base_filter}", 
+                  [d_start, d_end] + params)
+        cnt = c.fetchone()[0]
+        trend["y"].append(cnt)
+        
+    # 情感分布
+    c.execute(f"SELECT count(*) FROM {table} WHERE sentiment_score > 0.3 {base_filter}", params)
+    pos = c.fetchone()[0]
+    c.execute(f"SELECT count(*) FROM {table} WHERE sentiment_score < -0.1 {base_filter}", params)
+    neg = c.fetchone()[0]
+    neu = today_count - pos - neg
+    if neu < 0: neu = 0
+    
+    sentiment = {"pos": pos, "neg": neg, "neu": neu}
+    
+    # Opinion Clusters (Simple Extraction)
+    c.execute(f"SELECT title FROM {table} WHERE (risk_level >= 2 OR sentiment_score < -0.3) AND publish_time > ? {base_filter} LIMIT 50", [now - day_seconds] + params)
+    neg_titles = [r[0] for r in c.fetchall()]
+    cluster_counter = {}
+    mock_keywords = ["价格", "电池", "续航", "服务", "质量", "发热", "卡顿", "闪退", "广告", "抄袭"]
+    for t in neg_titles:
+        for k in mock_keywords:
+            if k in t:
+                cluster_counter[k] = cluster_counter.get(k, 0) + 1
+    
+    top_clusters = sorted(cluster_counter.items(), key=lambda x: x[1], reverse=True)[:3]
+    clusters_data = []
+    total_relevant = sum([x[1] for x in top_clusters]) if top_clusters else 1
+    colors = ["red", "orange", "green"]
+    for idx, (k, count) in enumerate(top_clusters):
+         clusters_data.append({
+             "text": f"用户槽点-{k}",
+             "percent": f"{int((count / total_relevant) * 100)}%",
+             "val": int((count / total_relevant) * 100),
+             "color": colors[idx % 3]
+         })
+    
+    # 最新日志 (Logs)
+    c.execute(f"SELECT title, source, risk_level, publish_time, sentiment_score FROM {table} WHERE publish_time > ? {base_filter} ORDER BY publish_time DESC LIMIT 10", [now - day_seconds*7] + params)
+    logs = []
+    for r in c.fetchall():
+        logs.append({
+            "title": r[0],
+            "source": r[1],
+            "level": r[2],
+            "time": time.strftime("%m-%d %H:%M", time.localtime(r[3])),
+            "score": r[4]
+        })
+
+    conn.close()
+    
+    return {
+        "today_count": today_count,
+        "yesterday_count": yesterday_count,
+        "risk_count": risk_count,
+        "prophet": {
+            "level": level,
+            "velocity": velocity_display,
+            "peak_time": "今日 14:00", # Mock
+            "prediction": "预测 2小时后 传播达峰" # Mock
+        },
+        "charts": {
+            "trend": trend,
+            "sentiment": sentiment,
+            "clusters": clusters_data
+        },
+        "logs": logs
+    }
+
+# ==========================================
+# 基准
+# ==========================================
+
+def build(n, days=DAYS, seed=11):
+    rnd = random.Random(seed)
+    now = time.time()
+    conn = sqlite3.connect(radar_monitor.DB_FILE)
+    c = conn.cursor()
+    batch = 50000
+    for start in range(0, n, batch):
+        rows = []
+        for i in range(start, min(n, start + batch)):
+            risk = 3 if rnd.random() < 0.02 else 0
+            rows.append((rnd.choice(SOURCES), f"{rnd.choice(WORDS)}{rnd.choice(WORDS)} 第{i}号", f"https://example.com/{i}",
+                         now - rnd.random() * days * 86400, round(rnd.uniform(-1, 1), 2), risk))
+        c.executemany("INSERT INTO mentions (source, title, url, publish_time, sentiment_score, risk_level) VALUES (?,?,?,?,?,?)", rows)
+    c.execute("SELECT max(id) FROM mentions")
+    max_id = c.fetchone()[0]
+    matches = []
+    for cid in CLIENTS:
+        for m_id in rnd.sample(range(1, max_id + 1), n * 3 // 100):
+            matches.append((m_id, cid, rnd.choice([0, 0, 0, 1, 2, 3]), round(rnd.uniform(-1, 1), 2), now - rnd.random() * days * 86400))
+    c.executemany("INSERT OR IGNORE INTO mention_matches (mention_id, client_id, risk_level, sentiment, publish_time) VALUES (?,?,?,?,?)", matches)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+def raw_counts(client_id=None):
+    """同样按整点小时对齐的窗口，直接对原始行计数 (校验汇总表)"""
+    conn = sqlite3.connect(radar_monitor.DB_FILE)
+    c = conn.cursor()
+    table, base_filter, params = "mentions", "", []
+    if client_id:
+        table, base_filter, params = radar_monitor.CLIENT_MENTIONS, " AND client_id = ?", [client_id]
+    today_start = radar_rollup.floor_hour(time.time()) - 86400 + radar_rollup.ROLLUP_HOUR
+    c.execute(f"SELECT count(*), sum(risk_level >= 2) FROM {table} WHERE publish_time >= ? {base_filter}", [today_start] + params)
+    today_count, risk_count = c.fetchone()
+    c.execute(f"SELECT count(*) FROM {table} WHERE publish_time >= ? AND publish_time < ? {base_filter}",
+              [today_start - 86400, today_start] + params)
+    yesterday_count = c.fetchone()[0]
+    conn.close()
+    return today_count, yesterday_count, risk_count or 0
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+def run(n, days=DAYS, repeat=5):
+    t0 = time.perf_counter()
+    build(n, days)
+    print(f"建库 {n} 条内容 ({days} 天) / {len(CLIENTS)} 个客户: {time.perf_counter() - t0:.1f}s")
+    t0 = time.perf_counter()
+    res = radar_rollup.rebuild_rollup()
+    print(f"回灌汇总表: {res['rows']} 行, {time.perf_counter() - t0:.1f}s")
+    for label, client_id in [("全局", None), ("单客户", CLIENTS[0])]:
+        old, new = legacy_get_monitor_stats(client_id), radar_monitor.get_monitor_stats(client_id)
+        assert old["charts"]["trend"] == new["charts"]["trend"], f"{label}: 7 天趋势与原实现不一致"
+        assert raw_counts(client_id) == (new["today_count"], new["yesterday_count"], new["risk_count"]), f"{label}: 汇总表计数与原始行不一致"
+        s = new["charts"]["sentiment"]
+        assert s["pos"] + s["neg"] + s["neu"] == new["today_count"]
+        t_old = timed(lambda: legacy_get_monitor_stats(client_id), repeat)
+        t_new = timed(lambda: radar_monitor.get_monitor_stats(client_id), repeat)
+        print(f"{label:<4} legacy: {t_old * 1000:>8.1f} ms   rollup: {t_new * 1000:>8.1f} ms   x{t_old / t_new:.1f}")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else DAYS
+    print(f"=== get_monitor_stats 延迟 ({n} 条内容) ===")
+    run(n, days)
@@ -0,0 +1,77 @@
+"""
+入库性能基准：process_monitor_data 在不同批量下的吞吐 (items/sec)
+
+用法: python bench_ingest.py [批量大小 ...]   (默认 100 1000 10000)
+db 为首次入库后的数据库文件大小。
+每个批量都在独立的临时目录中建库，不会触碰工作目录下的 radar_data.db。
+"""
+import sys
+import os
+import time
+import random
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BACKEND_DIR)
+
+# 在导入业务模块之前切到临时目录，模块导入时的建表只会落在临时库里
+os.chdir(tempfile.mkdtemp(prefix="bench_ingest_"))
+
+import radar_monitor
+
+BRANDS = ["特斯拉", "比亚迪", "小米", "华为", "蔚来", "理想", "苹果", "腾讯", "阿里", "字节"]
+WORDS = ["发布", "新品", "召回", "起火", "投诉", "大涨", "突破", "财报", "裁员", "合作", "调查", "好评"]
+SOURCES = ["微博热搜", "36氪", "虎嗅", "头条号", "Google新闻"]
+
+
+def fresh_db():
+    os.chdir(tempfile.mkdtemp(prefix="bench_ingest_"))
+    radar_monitor.init_monitor_db()
+    for i, brand in enumerate(BRANDS):
+        logic = {
+            "brand_keywords": [brand],
+            "exclude_keywords": ["玩具"],
+            "advanced_rules": [{"rule_name": "安全事故", "must_contain": [brand], "nearby_words": ["起火", "召回"],
+                                "distance": 20, "risk_level": 3}]
+        }
+        radar_monitor.save_full_client_config(f"{brand}-{i}", "汽车", 1, logic)
+
+
+def make_items(n, seed=42):
+    rnd = random.Random(seed)
+    items = []
+    for i in range(n):
+        title = f"{rnd.choice(BRANDS)}{rnd.choice(WORDS)}{rnd.choice(WORDS)} 第{i}号消息"
+        items.append({
+            "title": title,
+            # 预置摘要，避免基准测到 LLM 调用
+            "summary": {"fact": f"{title}，{rnd.choice(WORDS)}。", "angle": "1. 角度"},
+            "source": rnd.choice(SOURCES),
+            "url": f"https://example.com/news/{i}"
+        })
+    return items
+
+
+def run(size):
+    fresh_db()
+    items = make_items(size)
+
+    t0 = time.perf_counter()
+    res = radar_monitor.process_monitor_data(items)
+    cold = time.perf_counter() - t0
+    db_mb = os.path.getsize(radar_monitor.DB_FILE) / 1024 / 1024
+
+    # 同一批再入库一次：全部命中 URL 查重
+    t0 = time.perf_counter()
+    radar_monitor.process_monitor_data(items)
+    warm = time.perf_counter() - t0
+
+    print(f"batch={size:>6}  new: {size / cold:>9.0f} items/s ({cold:.3f}s, processed={res['processed']}, alerts={len(res['alerts'])})"
+          f"  re-ingest: {size / warm:>9.0f} items/s ({warm:.3f}s)  db={db_mb:.1f}MB")
+
+
+if __name__ == "__main__":
+    sizes = [int(x) for x in sys.argv[1:]] or [100, 1000, 10000]
+    print("=== process_monitor_data 入库吞吐 ===")
+    for size in sizes:
+        run(size)
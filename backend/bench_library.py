@@ -0,0 +1,110 @@
+"""
+内容库列表基准：按字段投影 + orjson 序列化 vs 原先每行返回全部字段 (含完整正文) + FastAPI 默认 JSON 序列化
+
+用法: python bench_library.py [mentions 行数] [每页条数]   (默认 20000 条，每页 100 条)
+在临时目录中建库，每条内容带 2000~8000 字的正文；对照组为 fields=None (与改造前返回的字段完全一致)
+经 jsonable_encoder + JSONResponse 输出，新方式为前端表格实际用到的字段经 ORJSONResponse 输出。
+按游标连续翻 PAGES 页 (不计总数，排除 OFFSET 与 COUNT 的开销)，两种方式各跑一遍同样的页，
+统计响应体大小与 p50 / p95 延迟 (查询 + 组装 + 序列化)。
+"""
+import sys
+import os
+import time
+import random
+import sqlite3
+import tempfile
+import statistics
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BACKEND_DIR)
+
+# 在导入业务模块之前切到临时目录，模块导入时的建表只会落在临时库里
+os.chdir(tempfile.mkdtemp(prefix="bench_library_"))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+import radar_monitor
+
+SOURCES = ["微博热搜", "36氪", "虎嗅", "头条号", "Google新闻"]
+WORDS = ["价格", "电池", "续航", "服务", "质量", "发热", "卡顿", "发布", "财报", "召回"]
+PAGES = 50
+
+# 与 frontend GlobalContentLibrary.vue 的 LIST_FIELDS 一致
+TABLE_FIELDS = [
+    "id", "source", "title", "article_title", "url", "summary", "content_preview", "category", "manual_category",
+    "manual_sentiment", "primary_tag", "secondary_tag", "tags", "sentiment_label", "quality_score", "clean_status",
+    "publish_time", "time_display", "ingest_time_display", "hotness", "hotness_display",
+]
+
+def build(rows):
+    rnd = random.Random(7)
+    now = time.time()
+    conn = sqlite3.connect(radar_monitor.DB_FILE)
+    c = conn.cursor()
+    batch = []
+    for i in range(rows):
+        body = "".join(rnd.choice(WORDS) for _ in range(rnd.randint(1000, 4000)))
+        t = now - rnd.random() * 30 * 86400
+        batch.append((rnd.choice(SOURCES), f"内容 {i} {rnd.choice(WORDS)}", body, f"https://example.com/{i}", t, t,
+                      round(rnd.uniform(-1, 1), 2), rnd.choice([0, 1, 2]), f"摘要 {i}"))
+        if len(batch) == 5000:
+            c.executemany('''INSERT INTO mentions (source, title, content_text, url, publish_time, created_at,
+                                                   sentiment_score, risk_level, ai_fact) VALUES (?,?,?,?,?,?,?,?,?)''', batch)
+            batch = []
+    if batch:
+        c.executemany('''INSERT INTO mentions (source, title, content_text, url, publish_time, created_at,
+                                               sentiment_score, risk_level, ai_fact) VALUES (?,?,?,?,?,?,?,?,?)''', batch)
+    conn.commit()
+    conn.close()
+
+def legacy_page(cursor, page_size):
+    result = radar_monitor.get_global_content_library(time_range="all", page_size=page_size, cursor=cursor)
+    return JSONResponse(jsonable_encoder(result)).body
+
+def lean_page(cursor, page_size):
+    result = radar_monitor.get_global_content_library(time_range="all", page_size=page_size, cursor=cursor, fields=TABLE_FIELDS)
+    return ORJSONResponse(result).body
+
+def page_cursors(page_size):
+    cursors = [""]
+    while len(cursors) < PAGES:
+        token = radar_monitor.get_global_content_library(time_range="all", page_size=page_size, cursor=cursors[-1],
+                                                         fields=["id"])["next_cursor"]
+        if token is None:
+            break
+        cursors.append(token)
+    return cursors
+
+def measure(fn, pages, page_size):
+    times, sizes = [], []
+    for cursor in pages:
+        t0 = time.perf_counter()
+        body = fn(cursor, page_size)
+        times.append(time.perf_counter() - t0)
+        sizes.append(len(body))
+    times.sort()
+    p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+    return statistics.median(times), p95, statistics.mean(sizes)
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    page_size = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    t0 = time.perf_counter()
+    build(rows)
+    print(f"建库 {rows} 条内容: {time.perf_counter() - t0:.1f}s")
+    pages = page_cursors(page_size)
+    # 投影后的每个字段与全量结果中的同名字段一致 (随机模拟字段不在表格字段中)
+    full = radar_monitor.get_global_content_library(time_range="all", page=1, page_size=page_size)["items"]
+    lean = radar_monitor.get_global_content_library(time_range="all", page=1, page_size=page_size, fields=TABLE_FIELDS)["items"]
+    assert lean == [{name: item[name] for name in TABLE_FIELDS} for item in full], "投影结果与全量结果不一致"
+    print(f"=== 内容库列表 每页 {page_size} 条, {len(pages)} 页 ===")
+    results = {}
+    for label, fn in [("全字段 + json", legacy_page), ("投影 + orjson", lean_page)]:
+        fn(pages[0], page_size)
+        results[label] = measure(fn, pages, page_size)
+        p50, p95, size = results[label]
+        print(f"  {label:<12} {size / 1024:>8.1f} KB/页   p50 {p50 * 1000:>7.1f} ms   p95 {p95 * 1000:>7.1f} ms")
+    (_, old_p95, old_size), (_, new_p95, new_size) = results.values()
+    print(f"  响应体 x{old_size / new_size:.1f} 更小, p95 x{old_p95 / new_p95:.1f}")
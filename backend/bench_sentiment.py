@@ -0,0 +1,106 @@
+"""
+情感打分基准：共享预编译词典 (radar_sentiment) vs 原先的逐词扫描实现
+
+用法: python bench_sentiment.py [标题数量]   (默认 100000)
+原实现按改造前的代码原样保留在本文件中作为对照，并先校验两者结果一致。
+"""
+import sys
+import os
+import re
+import time
+import random
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BACKEND_DIR)
+
+from radar_sentiment import score_sentiments, analyze_titles
+
+WORDS = ["起火", "自燃", "维权", "调查", "暴雷", "投诉", "致歉", "大涨", "突破", "首发", "好评", "遥遥领先",
+         "裁员", "暴跌", "亏损", "罚款", "新高", "获批", "担忧", "做空", "吃瓜", "辟谣", "发布", "财报"]
+FILLERS = ["特斯拉", "比亚迪", "小米", "华为", "发布会", "消息称", "网友", "官方", "回应", "最新", "曝光", "评测", "销量",
+           "价格", "用户", "市场", "今日", "正式", "不", "没有", "并非", "无", "，", "\n"]
+
+# ==========================================
+# 原实现 (对照组)
+# ==========================================
+
+def legacy_sentiment_simple(text):
+    score = 0.0
+    neg_keywords = ["起火", "自燃", "冒烟", "爆炸", "维权", "造假", "破产", "去世", "调查", "暴雷", "事故", "缺陷", "投诉", "致歉", "翻车"]
+    for kw in neg_keywords:
+        if kw in text:
+            if re.search(f"[不没无非].{{0,2}}{kw}", text):
+                continue
+            score -= 0.5
+    pos_keywords = ["遥遥领先", "大涨", "突破", "创新", "第一", "首发", "获赞", "好评"]
+    for kw in pos_keywords:
+        if kw in text:
+            score += 0.3
+    return max(-1.0, min(1.0, score))
+
+def legacy_fallback_sentiment(title):
+    pos_keywords = ["突破", "大涨", "新高", "发布", "成功", "增长", "获批", "首发", "利好"]
+    neg_keywords = ["裁员", "暴跌", "亏损", "调查", "罚款", "警示", "下跌", "失败", "漏洞"]
+    score = 0
+    for k in pos_keywords:
+        if k in title: score += 1
+    for k in neg_keywords:
+        if k in title: score -= 1
+    if score > 0: return {"positive": 80, "neutral": 15, "negative": 5}
+    elif score < 0: return {"positive": 5, "neutral": 15, "negative": 80}
+    else: return {"positive": 10, "neutral": 80, "negative": 10}
+
+def legacy_fallback_emotions(title):
+    emotions = { "anxiety": 5, "anger": 5, "sadness": 5, "excitement": 5, "sarcasm": 5 }
+    rules = [
+        (["裁员", "制裁", "担忧", "风险", "警告", "延期", "暴雷"], "anxiety", 60),
+        (["被查", "罚款", "侵权", "丑闻", "造假", "抗议", "做空"], "anger", 70),
+        (["逝世", "暴跌", "亏损", "失败", "腰斩", "惨淡"], "sadness", 60),
+        (["首发", "突破", "大涨", "新高", "获批", "重磅", "遥遥领先"], "excitement", 80),
+        (["反转", "吃瓜", "打脸", "离谱", "震惊", "辟谣"], "sarcasm", 50)
+    ]
+    for keywords, emo_key, score in rules:
+        for k in keywords:
+            if k in title:
+                emotions[emo_key] = max(emotions[emo_key], score + random.randint(-10, 10))
+    return emotions
+
+# ==========================================
+# 基准
+# ==========================================
+
+def make_titles(n, seed=7):
+    # 大约每 5 个词里有 1 个词典词，接近真实标题的命中密度
+    rnd = random.Random(seed)
+    return ["".join(rnd.choice(WORDS) if rnd.random() < 0.2 else rnd.choice(FILLERS) for _ in range(rnd.randint(4, 12)))
+            for _ in range(n)]
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+def legacy_analyze(titles):
+    return [{"sentiment": legacy_fallback_sentiment(t), "emotions": legacy_fallback_emotions(t)} for t in titles]
+
+def run(n):
+    titles = make_titles(n)
+
+    old_scores, t_old = timed(lambda: [legacy_sentiment_simple(t) for t in titles])
+    new_scores, t_new = timed(lambda: score_sentiments(titles))
+    assert old_scores == new_scores, "入库情感分与原实现不一致"
+    print(f"入库情感分   legacy: {n / t_old:>10.0f} titles/s ({t_old:.3f}s)   shared: {n / t_new:>10.0f} titles/s ({t_new:.3f}s)   x{t_old / t_new:.1f}")
+
+    # 情绪分带随机抖动：两边用同一个种子，随机数的消耗顺序一致，结果应完全相同
+    random.seed(1)
+    old_fb, t_old = timed(lambda: legacy_analyze(titles))
+    random.seed(1)
+    new_fb, t_new = timed(lambda: analyze_titles(titles))
+    assert old_fb == new_fb, "兜底情感 / 情绪与原实现不一致"
+    print(f"兜底情感+情绪 legacy: {n / t_old:>10.0f} titles/s ({t_old:.3f}s)   shared: {n / t_new:>10.0f} titles/s ({t_new:.3f}s)   x{t_old / t_new:.1f}")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f"=== 情感词典打分 ({n} 条标题) ===")
+    run(n)
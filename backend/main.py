@@ -1,8 +1,10 @@
-from fastapi import FastAPI, Body, Depends, HTTPException, status
+import os
+from fastapi import FastAPI, Body, Depends, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 # === 引入各功能模块 ===
 from radar_weibo import get_weibo_hot_list
@@ -14,16 +16,28 @@ from radar_monitor import (
     get_monitor_stats, 
     save_full_client_config, 
     get_all_clients,
+    get_monitor_stats_cached,
+    get_all_clients_cached,
+    get_response_cache_stats,
     delete_client_by_id,
     generate_client_report,
     get_global_content_library,
+    get_mention_by_id,
+    get_library_facets,
+    save_search,
+    list_saved_searches,
+    delete_saved_search,
+    get_saved_search_delta,
+    mark_saved_search_seen,
     bulk_discard_content,
+    bulk_moderate,
     add_source_to_blacklist,
     get_source_blacklist,
     remove_source_from_blacklist,
     associate_content_to_client,
     correct_content_classification,
-    get_content_quality_stats
+    get_content_quality_stats,
+    get_rule_cache_stats
 )
 from radar_report import generate_client_report
 # 引入快报模块
@@ -36,6 +50,18 @@ from radar_flash import (
     get_flash_configs
 )
 
+# 引入流式批量入库
+from radar_ingest import ingest_ndjson, NDJSONIngestResponse, INGEST_BATCH_SIZE
+
+# 引入摘要任务队列
+from radar_jobs import start_summary_workers, get_summary_queue_stats
+
+# 引入热度衰减任务
+from radar_scores import start_decay_worker
+
+# 游标分页
+from radar_pagination import InvalidCursor
+
 # 引入认证模块
 from radar_auth import (
     User, Token, get_current_active_user, get_admin_user, 
@@ -160,6 +186,13 @@ def read_hotlist(category: str = "综合", user: User = Depends(get_current_acti
     monitor_res = process_monitor_data(flat)
     return {"data": raw, "alerts": monitor_res['alerts']}
 
+@app.post("/ingest/stream")
+async def ingest_stream(request: Request, batch_size: int = INGEST_BATCH_SIZE, user: User = Depends(get_current_active_user)):
+    """NDJSON 流式批量入库：每行一条内容，按微批次入库并逐批回写确认 (application/x-ndjson)"""
+    if user.role not in ["admin", "editor"]:
+        raise HTTPException(status_code=403, detail="Permission denied")
+    return NDJSONIngestResponse(ingest_ndjson(request.stream(), batch_size))
+
 @app.post("/ai/analyze")
 def api_analyze_topic(req: AiAnalyzeReq, user: User = Depends(get_current_active_user)):
     raw = generate_analysis(req.topic)
@@ -231,13 +264,20 @@ def read_predictions(req: PredictionRequest, user: User = Depends(get_current_ac
     data = generate_predictions(req.keywords)
     return {"count": len(data), "data": data}
 
+def cached_json(etag, data):
+    """数据未变化 (data 为 None) 时返回 304；ETag 与用户无关，private 防止共享缓存跨用户复用"""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if data is None:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(data, headers=headers)
+
 @app.get("/monitor/dashboard")
-def read_dash(client_id: Optional[str] = None, user: User = Depends(get_current_active_user)): 
-    return get_monitor_stats(client_id)
+def read_dash(request: Request, client_id: Optional[str] = None, user: User = Depends(get_current_active_user)): 
+    return cached_json(*get_monitor_stats_cached(client_id, request.headers.get("if-none-match")))
 
 @app.get("/monitor/clients")
-def read_clients(user: User = Depends(get_current_active_user)):
-    return get_all_clients()
+def read_clients(request: Request, user: User = Depends(get_current_active_user)):
+    return cached_json(*get_all_clients_cached(request.headers.get("if-none-match")))
 
 @app.post("/monitor/client/save")
 def save_client(req: ClientConfigReq, user: User = Depends(get_current_active_user)):
@@ -257,6 +297,21 @@ def delete_client(req: DeleteReq, user: User = Depends(get_admin_user)):
     # 只有 admin 可以删除
     return delete_client_by_id(req.client_id)
 
+@app.get("/monitor/rule-cache/stats")
+def read_rule_cache_stats(user: User = Depends(get_admin_user)):
+    """规则缓存命中统计 (稳态入库时 misses 不应增长)"""
+    return get_rule_cache_stats()
+
+@app.get("/monitor/response-cache/stats")
+def read_response_cache_stats(user: User = Depends(get_admin_user)):
+    """看板 / 客户列表响应缓存命中统计"""
+    return get_response_cache_stats()
+
+@app.get("/monitor/summary-queue/stats")
+def read_summary_queue_stats(user: User = Depends(get_admin_user)):
+    """摘要任务队列状态 (queued / running / done / dead)"""
+    return get_summary_queue_stats()
+
 @app.post("/monitor/report/generate")
 def create_report_endpoint(req: ReportReq, user: User = Depends(get_current_active_user)):
     data = generate_client_report(req.client_id)
@@ -272,12 +327,41 @@ class ContentFilterReq(BaseModel):
     sentiment_filter: Optional[List[str]] = None
     clean_status_filter: Optional[List[str]] = None
     time_range: str = "24h"  # "1h" / "24h" / "7d" / "all"
+    exclude_spam: bool = False
     page: int = 1
     page_size: int = 20
+    cursor: Optional[str] = None  # 游标分页，见 radar_pagination
+    sort: Optional[str] = None  # "time" / "hotness" / "quality"，默认按时间 (检索时按相关度)
+    fields: Optional[List[str]] = None  # 只返回这些字段，见 radar_monitor.LIBRARY_FIELDS；正文按需取 /content/library/{id}
 
 class BulkDiscardReq(BaseModel):
     mention_ids: List[int]
 
+class LibraryFilter(BaseModel):
+    search_text: str = ""
+    client_id: Optional[str] = None
+    source_filter: Optional[List[str]] = None
+    sentiment_filter: Optional[List[str]] = None
+    clean_status_filter: Optional[List[str]] = None
+    time_range: str = "24h"
+    exclude_spam: bool = False
+
+class FacetReq(LibraryFilter):
+    approximate: bool = False  # 命中很多时按抽样估算，见 radar_monitor.get_library_facets
+
+class SavedSearchReq(BaseModel):
+    name: str
+    filter: LibraryFilter
+
+class SeenReq(BaseModel):
+    seen_id: Optional[int] = None  # 看到的最新内容 id，默认当前最新
+
+class BulkModerateReq(BaseModel):
+    # mention_ids 与 filter 二选一；operations 见 radar_monitor.bulk_moderate
+    mention_ids: Optional[List[int]] = None
+    filter: Optional[LibraryFilter] = None
+    operations: List[Dict[str, Any]]
+
 class BlacklistReq(BaseModel):
     source_name: str
     reason: str = ""
@@ -305,15 +389,81 @@ def search_content_library(req: ContentFilterReq, user: User = Depends(get_curre
             clean_status_filter=req.clean_status_filter,
             time_range=req.time_range,
             page=req.page,
-            page_size=req.page_size
+            page_size=req.page_size,
+            exclude_spam=req.exclude_spam,
+            cursor=req.cursor,
+            fields=req.fields,
+            sort=req.sort
         )
-        return result
+        # 结果只含基本类型，直接用 orjson 序列化，跳过 jsonable_encoder 的逐字段遍历
+        return ORJSONResponse(result)
+    except ValueError as e:
+        # 游标格式不对 (InvalidCursor)、未知字段或排序
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"[ERROR] 搜索内容库失败: {str(e)}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
+# [API-1a] 内容库分面计数：当前筛选条件下按来源 / 情感 / 清洗状态 / 标签计数
+@app.post("/content/library/facets")
+def fetch_library_facets(req: FacetReq, user: User = Depends(get_current_active_user)):
+    """与检索同一筛选条件的分面计数 (短时缓存)"""
+    filter = req.dict()
+    approximate = filter.pop("approximate")
+    return get_library_facets(approximate=approximate, **filter)
+
+# [API-1c] 保存的检索：记住已看过的最新内容，轮询时只取之后新入库的内容 (路由需在 /content/library/{mention_id} 之前)
+@app.post("/content/library/saved")
+def create_saved_search(req: SavedSearchReq, user: User = Depends(get_current_active_user)):
+    result = save_search(user.username, req.name, req.filter.dict())
+    if result["status"] != "success":
+        raise HTTPException(status_code=400, detail=result["message"])
+    return result
+
+@app.get("/content/library/saved")
+def fetch_saved_searches(user: User = Depends(get_current_active_user)):
+    """当前用户保存的检索，各带新内容条数 (角标)"""
+    return ORJSONResponse(list_saved_searches(user.username))
+
+@app.get("/content/library/saved/{search_id}/delta")
+def fetch_saved_search_delta(search_id: int, limit: int = 50, fields: Optional[str] = None,
+                             user: User = Depends(get_current_active_user)):
+    """上次看过之后新入库的内容与新内容条数；fields 以逗号分隔，不推进已看过的位置"""
+    try:
+        result = get_saved_search_delta(user.username, search_id, limit=max(1, min(limit, 100)),
+                                        fields=fields.split(",") if fields else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="检索不存在")
+    return ORJSONResponse(result)
+
+@app.post("/content/library/saved/{search_id}/seen")
+def mark_saved_search(search_id: int, req: SeenReq, user: User = Depends(get_current_active_user)):
+    """标记已看到 seen_id (默认当前最新) 为止的内容"""
+    result = mark_saved_search_seen(user.username, search_id, req.seen_id)
+    if result["status"] != "success":
+        raise HTTPException(status_code=404, detail=result["message"])
+    return result
+
+@app.delete("/content/library/saved/{search_id}")
+def remove_saved_search(search_id: int, user: User = Depends(get_current_active_user)):
+    result = delete_saved_search(user.username, search_id)
+    if result["status"] != "success":
+        raise HTTPException(status_code=404, detail=result["message"])
+    return result
+
+# [API-1b] 单条内容详情：列表只返回预览，正文、摘要等按需从这里取
+@app.get("/content/library/{mention_id}")
+def fetch_content_detail(mention_id: int, user: User = Depends(get_current_active_user)):
+    """获取单条内容的完整字段（编辑时拉取正文）"""
+    item = get_mention_by_id(mention_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="内容不存在")
+    return item
+
 # [API-2] 批量废弃内容
 @app.post("/content/library/bulk-discard")
 def discard_content_items(req: BulkDiscardReq, user: User = Depends(get_current_active_user)):
@@ -322,6 +472,22 @@ def discard_content_items(req: BulkDiscardReq, user: User = Depends(get_current_
         raise HTTPException(status_code=403, detail="Permission denied")
     return bulk_discard_content(req.mention_ids)
 
+# [API-2b] 批量审核：废弃 / 归档 / 关联客户 / 改分类 / 改情感 / 打标签，同一事务内完成
+@app.post("/content/library/bulk-moderate")
+def moderate_content_items(req: BulkModerateReq, user: User = Depends(get_current_active_user)):
+    """按 id 列表或筛选条件批量审核内容，返回每项操作实际改动的条数"""
+    if user.role not in ["admin", "editor"]:
+        raise HTTPException(status_code=403, detail="Permission denied")
+    result = bulk_moderate(
+        req.operations,
+        mention_ids=req.mention_ids,
+        filter=req.filter.dict() if req.filter else None,
+        operator=user.username
+    )
+    if result["status"] != "success":
+        raise HTTPException(status_code=400, detail=result["message"])
+    return result
+
 # [API-3] 添加信源到黑名单
 @app.post("/content/blacklist/add")
 def add_to_blacklist(req: BlacklistReq, user: User = Depends(get_current_active_user)):
@@ -375,8 +541,8 @@ def fetch_quality_stats(user: User = Depends(get_current_active_user)):
 # ==========================================
 
 # 引入快报模块 (Updated)
+from radar_migrations import run_migrations
 from radar_flash import (
-    init_flash_db,
     fetch_all_flashes, 
     backfill_rewrite,
     get_flashes,
@@ -386,11 +552,16 @@ from radar_flash import (
 # ...
 
 @app.get("/flash/list")
-def read_flash_list(status: str = "all", source: str = "all", limit: int = 50, user: User = Depends(get_current_active_user)):
+def read_flash_list(status: str = "all", source: str = "all", limit: int = 50, cursor: Optional[str] = None,
+                    user: User = Depends(get_current_active_user)):
     """获取快报列表
     status: 'all' | 'draft' | 'published' | 'discarded'
+    cursor: 游标分页，传空字符串从第一页开始，返回 {"items", "next_cursor"}；不传时返回列表
     """
-    return get_flashes(status, limit, source)
+    try:
+        return get_flashes(status, limit, source, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/flash/update")
 def update_flash(
@@ -431,11 +602,19 @@ def del_flash_cfg(id: int, user: User = Depends(get_admin_user)):
 
 @app.on_event("startup")
 def startup_event():
-    # Ensure flash tables and migrations are applied
+    # 执行尚未应用的 Schema 迁移 (各模块 import 时已检查过则直接返回)
     try:
-        init_flash_db()
+        run_migrations()
     except Exception as e:
-        print(f"[flash] init failed: {e}")
+        print(f"[migrations] failed: {e}")
+    # 摘要任务 worker 池 (SUMMARY_WORKERS=0 表示由独立进程 `python radar_jobs.py` 负责)
+    workers = int(os.getenv("SUMMARY_WORKERS", "2"))
+    if workers > 0:
+        start_summary_workers(workers)
+    # 内容库热度的定时衰减 (HOTNESS_DECAY_INTERVAL=0 表示由外部定时执行 `python radar_scores.py decay`)
+    decay_interval = int(os.getenv("HOTNESS_DECAY_INTERVAL", "3600"))
+    if decay_interval > 0:
+        start_decay_worker(decay_interval)
 
 if __name__ == "__main__":
     import uvicorn
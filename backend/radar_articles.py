@@ -4,6 +4,9 @@ import time
 import json
 from typing import Optional, List
 
+from radar_search import create_fts, fts_phrase, bm25, highlight, ARTICLE_WEIGHTS
+from radar_pagination import decode_cursor, keyset_after, next_cursor
+
 DB_FILE = "radar_data.db"
 
 # ==========================================
@@ -25,6 +28,10 @@ def init_article_db():
                   status VARCHAR(20) DEFAULT 'draft',
                   created_at REAL,
                   updated_at REAL)''')
+    # 作品检索的 trigram 全文索引 (见 radar_search)
+    create_fts(c, "articles", "articles_fts", ["title", "summary", "content"])
+    # 作品列表按用户、更新时间倒序分页
+    c.execute("CREATE INDEX IF NOT EXISTS idx_articles_user_updated ON articles(user_id, updated_at)")
                   
     conn.commit()
     conn.close()
@@ -71,11 +78,28 @@ def save_article(user_id: str, title: str, content: str,
     conn.close()
     return {"status": "success", "id": aid}
 
-def get_articles(user_id: str, status: Optional[str] = None, search: Optional[str] = None, page: int = 1, page_size: int = 10):
+def get_articles(user_id: str, status: Optional[str] = None, search: Optional[str] = None, page: int = 1, page_size: int = 10,
+                 cursor: Optional[str] = None):
+    """
+    cursor: 游标分页 (见 radar_pagination)，按 (updated_at, id) 倒序续接，传空字符串从第一页开始；
+            传入时忽略 page，检索结果也按时间排序，不计算总数
+    """
+    position = decode_cursor(cursor) if cursor else None
     conn = sqlite3.connect(DB_FILE)
     c = conn.cursor()
     
-    sql = "SELECT id, title, summary, cover_url, topic, status, updated_at, created_at FROM articles WHERE 1=1"
+    # 检索走全文索引 (bm25 排序、标题高亮)；关键词不足 3 个字时退回 LIKE
+    fts_query = fts_phrase(search) if search else None
+    select_cols = "SELECT id, title, summary, cover_url, topic, status, updated_at, created_at, NULL"
+    from_sql = "articles"
+    order_sql = "updated_at DESC, articles.id DESC"
+    ranked = fts_query is not None and cursor is None
+    if fts_query:
+        select_cols = f"SELECT id, articles.title, articles.summary, cover_url, topic, status, updated_at, created_at, {highlight('articles_fts', 0)}"
+        from_sql = "articles JOIN articles_fts ON articles_fts.rowid = articles.id"
+        if ranked:
+            order_sql = f"{bm25('articles_fts', ARTICLE_WEIGHTS)}, updated_at DESC"
+    sql = f"{select_cols} FROM {from_sql} WHERE 1=1"
     params = []
     
     # Filter by user (optional: if admin sees all? sticking to user-isolation for now)
@@ -94,22 +118,36 @@ def get_articles(user_id: str, status: Optional[str] = None, search: Optional[st
         sql += " AND status=?"
         params.append(status)
         
-    if search:
+    if fts_query:
+        sql += " AND articles_fts MATCH ?"
+        params.append(fts_query)
+    elif search:
         sql += " AND title LIKE ?"
         params.append(f"%{search}%")
         
-    # Count total
-    count_sql = sql.replace("SELECT id, title, summary, cover_url, topic, status, updated_at, created_at", "SELECT count(*)")
-    c.execute(count_sql, params)
-    total = c.fetchone()[0]
+    # Count total (游标分页不计数)
+    total = None
+    if cursor is None:
+        count_sql = sql.replace(select_cols, "SELECT count(*)")
+        c.execute(count_sql, params)
+        total = c.fetchone()[0]
     
     # Pagination
-    sql += " ORDER BY updated_at DESC LIMIT ? OFFSET ?"
-    offset = (page - 1) * page_size
-    params.extend([page_size, offset])
+    if position:
+        keyset_sql, keyset_params = keyset_after("updated_at", "articles.id", position)
+        sql += " AND " + keyset_sql
+        params.extend(keyset_params)
+    sql += f" ORDER BY {order_sql}"
+    if cursor is not None:
+        sql += " LIMIT ?"
+        params.append(page_size)
+    else:
+        sql += " LIMIT ? OFFSET ?"
+        params.extend([page_size, (page - 1) * page_size])
     
     c.execute(sql, params)
     rows = c.fetchall()
+    next_page = None if ranked else next_cursor(rows, page_size, 6)
     conn.close()
     
     items = []
@@ -117,6 +155,7 @@ def get_articles(user_id: str, status: Optional[str] = None, search: Optional[st
         items.append({
             "id": r[0],
             "title": r[1],
+            "title_highlight": r[8],
             "summary": r[2],
             "cover_url": r[3],
             "topic": r[4],
@@ -130,7 +169,8 @@ def get_articles(user_id: str, status: Optional[str] = None, search: Optional[st
         "items": items,
         "total": total,
         "page": page,
-        "page_size": page_size
+        "page_size": page_size,
+        "next_cursor": next_page
     }
 
 def get_article_detail(article_id: int):
@@ -0,0 +1,63 @@
+"""
+看板 / 客户列表的响应缓存
+
+缓存键 = (数据库, 读取函数, client_id) + 版本 (整点时间桶, 数据代数)：
+- 数据代数记录在 data_generations 表中 (每个客户一行，'' 为全局内容)，由小时汇总表的增量维护在同一事务里 +1，
+  入库、人工修正、废弃、手动分发等任何改变统计结果的写入都会让受影响客户的代数变化；多个进程 / worker 通过数据库保持一致
+- 统计窗口按整点小时对齐，时间桶变化时结果才会随时间变化
+版本不变时直接返回上次的结果；ETag 由版本计算，无需重新计算结果就能判断客户端缓存是否仍然有效 (304)。
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+MAX_ENTRIES = 1024
+
+def make_etag(key, version):
+    return '"' + hashlib.sha1(repr((key, version)).encode("utf-8")).hexdigest()[:20] + '"'
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match 可能是 *、多个以逗号分隔的值或弱校验 W/"..." """
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+class ResponseCache:
+    """每个键只保留最新版本的结果，超过上限时淘汰最久未使用的键"""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()    # key -> (version, value)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version, compute):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        # 计算不持锁；并发的同一未命中各算一次，结果相同
+        value = compute()
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+RESPONSE_CACHE = ResponseCache()
@@ -0,0 +1,270 @@
+"""
+近重复检测：MinHash + LSH 分桶
+
+精确指纹 (md5(标题+摘要)) 只能识别一字不差的重复，转载稿改一个字、换一个来源后缀就会被当成新内容，
+重新触发摘要、客户匹配和预警。这里对「规范化后的标题」取字符 3-gram，计算 MinHash 签名并分桶：
+- 分桶键存入 minhash_bands 表 (band_key 上有索引)，同一桶内的内容才是候选
+- 候选再用 3-gram 的 Jaccard 相似度精确复核，达到阈值即归入对方的重复簇；
+  短标题只差一两个字就可能是另一件事 (「特斯拉起火事故 第1起 / 第2起」)，阈值更高，且标题里的数字必须一致
+- 每条全局内容的 mentions.cluster_id 指向簇内最早的一条 (簇代表)，非重复内容的 cluster_id 即自身 id
+
+入库时整批的分桶键一次查询取回候选，单条判重只剩内存中的几次字典查找与集合运算。
+
+存量回填: python radar_dedup.py backfill
+"""
+import sqlite3
+import re
+import struct
+import hashlib
+import sys
+import time
+
+from radar_migrations import run_migrations
+
+DB_FILE = "radar_data.db"
+
+NUM_BANDS = 8
+ROWS_PER_BAND = 3
+NUM_PERM = NUM_BANDS * ROWS_PER_BAND
+SHINGLE_SIZE = 3
+SIMILARITY_THRESHOLD = 0.6
+SHORT_TITLE_LEN = 24                  # 规范化后短于此长度的标题按更高的阈值判重
+SHORT_SIMILARITY_THRESHOLD = 0.85
+MIN_TEXT_LEN = 10                     # 规范化后过短的标题只做精确判重
+DEDUP_WINDOW_SECONDS = 7 * 86400      # 只与最近 7 天的内容比对
+MAX_BUCKET_CANDIDATES = 16            # 每个桶只取最近的若干条，常见标题形成的大桶不会拖慢判重
+
+# ==========================================
+# 1. 数据库初始化
+# ==========================================
+def init_dedup_db():
+    # minhash_bands 表与 mentions.cluster_id 见 radar_migrations 第 3 版
+    run_migrations()
+
+# ==========================================
+# 2. 文本规范化 / 签名
+# ==========================================
+
+# 「标题 - 新浪财经」「标题_网易新闻」「标题 | 虎嗅」之类的来源后缀
+_SOURCE_SUFFIX = re.compile(r"\s*[-_|｜—–]+\s*[^-_|｜—–]{1,15}$")
+# 「(来源：xxx)」「【转自xxx】」之类的来源标注
+_SOURCE_TAG = re.compile(r"[（(【\[]\s*(?:来源|转自|转载|via|source)[:：]?[^）)】\]]*[）)】\]]", re.I)
+_NON_WORD = re.compile(r"[\W_]+")
+_NUMBER = re.compile(r"\d+")
+
+def strip_source(title):
+    """去掉来源后缀 / 来源标注，保留原有的标点与大小写"""
+    text = _SOURCE_TAG.sub("", title or "")
+    stripped = _SOURCE_SUFFIX.sub("", text)
+    # 去掉后缀后太短，说明分隔符后面是正文的一部分，不是来源
+    if len(_NON_WORD.sub("", stripped)) >= MIN_TEXT_LEN:
+        text = stripped
+    return text.strip()
+
+def normalize_title(title):
+    return _NON_WORD.sub("", strip_source(title)).lower()
+
+def shingles(normalized):
+    return {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+# 每个「排列」是与固定 32 位掩码的异或，掩码由固定种子生成，保证各进程、各次运行的分桶键一致
+_MASKS = [int.from_bytes(hashlib.blake2b(f"minhash-{i}".encode(), digest_size=4).digest(), "little") for i in range(NUM_PERM)]
+_LANE_MASKS = {}
+
+def _lane_masks(n):
+    """n 个 32 位通道的整数里，把每个掩码重复 n 次，全部掩码首尾相接"""
+    packed = _LANE_MASKS.get(n)
+    if packed is None:
+        packed = int.from_bytes(b"".join(m.to_bytes(4, "little") * n for m in _MASKS), "little")
+        _LANE_MASKS[n] = packed
+    return packed
+
+def minhash_signature(shingle_set):
+    # 每个 shingle 只做一次 32 位哈希；把哈希值排成 32 位通道的大整数，
+    # 一次异或完成全部排列，再按排列切片取最小值，逐元素的运算都在 C 层完成
+    n = len(shingle_set)
+    hashed = b"".join(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest() for s in shingle_set)
+    values = struct.unpack(f"<{NUM_PERM * n}I", (int.from_bytes(hashed * NUM_PERM, "little") ^ _lane_masks(n)).to_bytes(4 * NUM_PERM * n, "little"))
+    return tuple(min(values[i * n:(i + 1) * n]) for i in range(NUM_PERM))
+
+_MIX = 0x9E3779B97F4A7C15
+_U64 = (1 << 64) - 1
+
+def band_keys(signature):
+    """每个分桶 ROWS_PER_BAND 个最小值混合成一个有符号 64 位整数 (桶号参与混合，不同分桶互不冲突)"""
+    keys = []
+    for b in range(NUM_BANDS):
+        key = b + 1
+        for v in signature[b * ROWS_PER_BAND:(b + 1) * ROWS_PER_BAND]:
+            key = ((key ^ v) * _MIX) & _U64
+            key ^= key >> 29
+        keys.append(key - (1 << 64) if key >= (1 << 63) else key)
+    return keys
+
+def numbers(normalized):
+    return frozenset(_NUMBER.findall(normalized))
+
+def similarity_threshold(len_a, len_b):
+    """两个规范化标题中较短的一个决定阈值"""
+    return SHORT_SIMILARITY_THRESHOLD if min(len_a, len_b) < SHORT_TITLE_LEN else SIMILARITY_THRESHOLD
+
+def jaccard(a, b):
+    if not a or not b: return 0.0
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter)
+
+def title_fingerprint(title, with_bands=True):
+    """返回 (shingle 集合, 分桶键列表, 规范化长度, 数字集合)；过短的标题返回 None。只用于比对时不计算分桶键"""
+    normalized = normalize_title(title)
+    if len(normalized) < MIN_TEXT_LEN:
+        return None
+    sh = shingles(normalized)
+    keys = band_keys(minhash_signature(sh)) if with_bands else None
+    return sh, keys, len(normalized), numbers(normalized)
+
+def is_near_duplicate(a, b):
+    """两个 title_fingerprint 是否近重复，是则返回相似度，否则返回 None"""
+    sh_a, _, len_a, nums_a = a
+    sh_b, _, len_b, nums_b = b
+    # 编号、期数、金额等数字不同的视为不同事件 (只有一方带数字时不限制)
+    if nums_a and nums_b and nums_a != nums_b:
+        return None
+    sim = jaccard(sh_a, sh_b)
+    return sim if sim >= similarity_threshold(len_a, len_b) else None
+
+# ==========================================
+# 3. 批量近重复索引
+# ==========================================
+
+class NearDupIndex:
+    """
+    一批内容的近重复查找
+    - 构造时把整批的分桶键写入临时表，一次查询取回库中同桶的候选 (限定在时间窗口内)
+    - find(i) 返回第 i 条内容的最佳候选；add(i, ref) 把处理过的内容登记为后续内容的候选
+    候选 ref 是 dict：库内候选含 id / cluster_id / ai_fact / ai_angle / summary_status，
+    批内候选由调用方提供 (通常就是该条的预处理 dict)。
+    """
+
+    def __init__(self, cursor, titles, since):
+        # titles 中为 None 的位置 (如 URL 已入库的内容) 不参与判重
+        self.entries = [title_fingerprint(t) if t is not None else None for t in titles]
+        self.buckets = {}
+        self._fingerprints = {}
+
+        keys = {k for e in self.entries if e for k in e[1]}
+        if not keys:
+            return
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS dedup_keys (band_key INTEGER PRIMARY KEY)")
+        cursor.execute("DELETE FROM dedup_keys")
+        cursor.executemany("INSERT INTO dedup_keys (band_key) VALUES (?)", [(k,) for k in keys])
+        # 每个桶沿 band_key 索引倒序只取最近的 MAX_BUCKET_CANDIDATES 条
+        cursor.execute('''SELECT k.band_key, m.id, m.cluster_id, m.title, m.ai_fact, m.ai_angle, m.summary_status
+                          FROM dedup_keys k
+                          JOIN minhash_bands b ON b.rowid IN
+                              (SELECT rowid FROM minhash_bands WHERE band_key = k.band_key ORDER BY rowid DESC LIMIT ?)
+                          JOIN mentions m ON m.id = b.mention_id
+                          WHERE m.publish_time > ?
+                          ORDER BY m.id''', (MAX_BUCKET_CANDIDATES, since))
+        refs = {}
+        for band_key, m_id, cluster_id, title, ai_fact, ai_angle, summary_status in cursor.fetchall():
+            ref = refs.get(m_id)
+            if ref is None:
+                ref = refs[m_id] = {"id": m_id, "cluster_id": cluster_id or m_id, "title": title,
+                                    "ai_fact": ai_fact, "ai_angle": ai_angle, "summary_status": summary_status}
+            self.buckets.setdefault(band_key, []).append(ref)
+
+    def find(self, i):
+        entry = self.entries[i]
+        if entry is None:
+            return None
+        best, best_sim = None, None
+        seen = set()
+        for k in entry[1]:
+            for ref in self.buckets.get(k, ())[-MAX_BUCKET_CANDIDATES:]:
+                if id(ref) in seen: continue
+                seen.add(id(ref))
+                if id(ref) not in self._fingerprints:
+                    # 库内候选的指纹在第一次比对时才计算 (过短的标题为 None，不与任何内容近重复)
+                    self._fingerprints[id(ref)] = title_fingerprint(ref["title"], with_bands=False)
+                ref_entry = self._fingerprints[id(ref)]
+                if ref_entry is None: continue
+                sim = is_near_duplicate(entry, ref_entry)
+                # 相似度相同时取最早的候选
+                if sim is not None and (best is None or sim > best_sim):
+                    best, best_sim = ref, sim
+        return best
+
+    def add(self, i, ref):
+        entry = self.entries[i]
+        if entry is None:
+            return
+        self._fingerprints[id(ref)] = entry
+        for k in entry[1]:
+            self.buckets.setdefault(k, []).append(ref)
+
+    def band_rows(self, i, mention_id):
+        entry = self.entries[i]
+        return [(k, mention_id) for k in entry[1]] if entry else []
+
+# ==========================================
+# 4. 存量回填
+# ==========================================
+def backfill_clusters(batch_size=2000):
+    """
+    按发布时间顺序为尚未分簇的全局内容建立分桶键并分簇，近重复的内容同时标记 is_duplicate=1
+    簇代表始终是簇内发布时间最早的一条：待分簇的内容比所在簇的代表更早时 (代表是入库时分簇的新内容)，
+    整簇改为指向这条内容，原代表标记为重复
+    """
+    conn = sqlite3.connect(DB_FILE, timeout=30.0)
+    c = conn.cursor()
+    total = 0
+    dups = 0
+    moved = {}     # 原簇代表 -> 新簇代表
+
+    def representative(cluster_id):
+        while cluster_id in moved:
+            cluster_id = moved[cluster_id]
+        return cluster_id
+
+    while True:
+        c.execute('''SELECT id, title, publish_time FROM mentions
+                     WHERE client_id IS NULL AND cluster_id IS NULL
+                     ORDER BY publish_time, id LIMIT ?''', (batch_size,))
+        rows = c.fetchall()
+        if not rows:
+            break
+        since = min(r[2] or 0 for r in rows) - DEDUP_WINDOW_SECONDS
+        index = NearDupIndex(c, [r[1] for r in rows], since)
+        updates = []
+        bands = []
+        for i, (m_id, title, publish_time) in enumerate(rows):
+            near = index.find(i)
+            cluster_id = m_id
+            if near:
+                dups += 1
+                cluster_id = representative(near["cluster_id"])
+                c.execute("SELECT publish_time FROM mentions WHERE id=?", (cluster_id,))
+                rep_row = c.fetchone()
+                if rep_row and (rep_row[0] or 0, cluster_id) > (publish_time or 0, m_id):
+                    c.execute("UPDATE mentions SET cluster_id=?, is_duplicate=1 WHERE cluster_id=?", (m_id, cluster_id))
+                    moved[cluster_id] = m_id
+                    cluster_id = m_id
+            updates.append((cluster_id, 1 if cluster_id != m_id else 0, m_id))
+            index.add(i, {"id": m_id, "cluster_id": cluster_id})
+            bands.extend(index.band_rows(i, m_id))
+        c.executemany("UPDATE mentions SET cluster_id=?, is_duplicate=MAX(COALESCE(is_duplicate, 0), ?) WHERE id=?",
+                      [(representative(cluster_id), dup, m_id) for cluster_id, dup, m_id in updates])
+        c.executemany("INSERT INTO minhash_bands (band_key, mention_id) VALUES (?,?)", bands)
+        conn.commit()
+        total += len(rows)
+        print(f"[dedup] backfilled {total} mentions, {dups} near-duplicates")
+    conn.close()
+    return {"status": "success", "processed": total, "duplicates": dups}
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "backfill":
+        t0 = time.time()
+        print(backfill_clusters())
+        print(f"done in {time.time() - t0:.1f}s")
+    else:
+        print("用法: python radar_dedup.py backfill")
@@ -16,6 +16,8 @@ from datetime import datetime
 
 # ✅ 修改点：移除 ai_engine，统一使用 radar_ai 的智能接口
 from radar_ai import call_openrouter
+from radar_migrations import run_migrations
+from radar_pagination import decode_cursor, keyset_after, next_cursor
 
 DB_FILE = "radar_data.db"
 
@@ -60,58 +62,8 @@ GOOGLE_TIME_WINDOW_SECONDS = 6 * 3600
 # ==========================================
 
 def init_flash_db():
-    """初始化快报数据库表 (支持已存在的Schema升级)"""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
-    # Check if table exists
-    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='raw_flashes'")
-    table_exists = c.fetchone()
-    
-    if not table_exists:
-        # Create new schema
-        c.execute('''CREATE TABLE raw_flashes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            source_type TEXT NOT NULL,  -- 'cls' etc
-            source_value TEXT,
-            title TEXT,
-            content TEXT,
-            url TEXT,
-            publish_time REAL,
-            fetch_time REAL,
-            content_hash TEXT UNIQUE,
-            status TEXT DEFAULT 'draft',  -- draft, published, discarded
-            rewrite_title TEXT,
-            rewrite_content TEXT,
-            rewrite_error TEXT,
-            important INTEGER DEFAULT 0,
-            created_at REAL
-        )''')
-    else:
-        # Attempt to add new columns if they don't exist
-        try:
-            c.execute("ALTER TABLE raw_flashes ADD COLUMN rewrite_title TEXT")
-        except: pass
-        try:
-            c.execute("ALTER TABLE raw_flashes ADD COLUMN rewrite_content TEXT")
-        except: pass
-        try:
-            c.execute("ALTER TABLE raw_flashes ADD COLUMN rewrite_error TEXT")
-        except: pass
-        try:
-            c.execute("ALTER TABLE raw_flashes ADD COLUMN important INTEGER DEFAULT 0")
-        except: pass
-
-    c.execute('''CREATE TABLE IF NOT EXISTS flash_configs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        config_type TEXT NOT NULL,
-        config_value TEXT NOT NULL UNIQUE,
-        is_active INTEGER DEFAULT 1,
-        created_at REAL
-    )''')
-    
-    conn.commit()
-    conn.close()
+    """初始化快报数据库表 (raw_flashes / flash_configs 见 radar_migrations 第 4 版)"""
+    run_migrations()
 
 # ==========================================
 # 抓取逻辑 (CLS Only)
@@ -508,8 +460,13 @@ def normalize_tmt_prefix(text: str, time_str: str) -> str:
 # API Helpers
 # ==========================================
 
-def get_flashes(status_filter='all', limit=50, source_filter='all'):
-    """Get flashes list"""
+def get_flashes(status_filter='all', limit=50, source_filter='all', cursor=None):
+    """
+    Get flashes list
+    cursor: 游标分页 (见 radar_pagination)，按 (publish_time, id) 倒序续接，传空字符串从第一页开始；
+            传入时返回 {"items": [...], "next_cursor": ...}，不传时仍返回列表
+    """
+    position = decode_cursor(cursor) if cursor else None
     conn = sqlite3.connect(DB_FILE)
     c = conn.cursor()
     
@@ -523,10 +480,14 @@ def get_flashes(status_filter='all', limit=50, source_filter='all'):
     if source_filter != 'all':
         where_parts.append("source_type = ?")
         params.append(source_filter)
+    if position:
+        keyset_sql, keyset_params = keyset_after("publish_time", "id", position)
+        where_parts.append(keyset_sql)
+        params.extend(keyset_params)
     if where_parts:
         query += " WHERE " + " AND ".join(where_parts)
         
-    query += " ORDER BY publish_time DESC LIMIT ?"
+    query += " ORDER BY publish_time DESC, id DESC LIMIT ?"
     params.append(limit)
     
     c.execute(query, tuple(params))
@@ -562,6 +523,8 @@ def get_flashes(status_filter='all', limit=50, source_filter='all'):
             "is_important": int(r[11] or 0),
             "rewrite_error": rw_error
         })
+    if cursor is not None:
+        return {"items": res, "next_cursor": next_cursor(rows, limit, 6)}
     return res
 
 def update_flash_status(flash_id, status, content=None, title=None):
@@ -0,0 +1,187 @@
+"""
+看板「预言家」的声量预测
+
+每个客户 (''=全局内容) 的每小时声量序列取自小时汇总表 (一条按小时分组的查询)，用 Holt-Winters 加法模型
+(水平 + 阻尼趋势 + 24 小时季节项) 拟合，给出未来 24 小时内的峰值小时、未来 2 小时声量及置信区间：
+- 初次拟合取最近 HISTORY_HOURS 小时，用 NumPy 同时跑一组平滑参数，按一步预测误差挑选最优的一组
+- 历史不足两个季节周期时退化为 Holt 线性平滑 (EWMA + 趋势)，不含季节项
+- 模型状态按客户缓存在进程内；每结束一个整点小时只把新结束的小时喂给已有状态，不重新拟合
+- 发布时间早于入库时间的内容会改写已结束小时的计数，每隔 REFIT_HOURS 小时整段重拟合一次以吸收这些修正
+"""
+import math
+import threading
+
+import numpy as np
+
+from radar_rollup import floor_hour, ROLLUP_HOUR
+
+SEASON = 24                         # 日周期 (小时)
+HISTORY_HOURS = 14 * SEASON
+REFIT_HOURS = SEASON
+HORIZON = SEASON                    # 峰值在未来 24 小时内找
+AHEAD_HOURS = 2
+PHI = 0.98                          # 趋势阻尼，避免外推发散
+Z = 1.96                            # 95% 区间
+
+ALPHAS = (0.1, 0.3, 0.5)
+BETAS = (0.01, 0.05)
+GAMMAS = (0.05, 0.2)
+
+# ==========================================
+# 1. 模型
+# ==========================================
+def _smooth(y, hours, alpha, beta, gamma, level, trend, season):
+    """
+    逐小时更新状态 (各数组第一维为参数组，原地修改 season)，返回 (level, trend, 一步预测误差 [观测, 参数组])
+    hours 为每个观测所在整点的小时序号，季节项按 hours % SEASON 取位
+    """
+    errors = np.empty((len(y), len(alpha)))
+    for t, (obs, k) in enumerate(zip(y, hours % SEASON)):
+        damped = level + PHI * trend
+        errors[t] = obs - (damped + season[:, k])
+        new_level = alpha * (obs - season[:, k]) + (1 - alpha) * damped
+        trend = beta * (new_level - level) + (1 - beta) * PHI * trend
+        season[:, k] = gamma * (obs - new_level) + (1 - gamma) * season[:, k]
+        level = new_level
+    return level, trend, errors
+
+class _Model:
+    __slots__ = ("alpha", "beta", "gamma", "level", "trend", "season", "sse", "n", "last_hour", "fitted_hour")
+
+    def forecast(self, start_hour, horizon):
+        """从 start_hour 起 horizon 个小时的点预测与方差"""
+        steps = np.arange(1, horizon + 1)
+        damping = np.cumsum(PHI ** steps)
+        k = (start_hour // ROLLUP_HOUR + steps - 1) % SEASON
+        point = np.maximum(self.level + damping * self.trend + self.season[k], 0.0)
+        # 加法模型 h 步预测方差的近似：sigma^2 * (1 + sum_{j<h} (alpha * (1 + j * beta))^2)，忽略季节项与阻尼
+        sigma2 = self.sse / self.n if self.n else 0.0
+        c2 = (self.alpha * (1 + steps[:-1] * self.beta)) ** 2
+        variance = sigma2 * (1 + np.concatenate(([0.0], np.cumsum(c2))))
+        return point, variance
+
+def _fit(y, first_hour):
+    """对整段序列按参数网格同时平滑，取一步预测误差平方和最小的一组"""
+    hours = first_hour // ROLLUP_HOUR + np.arange(len(y))
+    seasonal = len(y) >= 2 * SEASON
+    gammas = GAMMAS if seasonal else (0.0,)
+    grid = np.array([(a, b, g) for a in ALPHAS for b in BETAS for g in gammas])
+    alpha, beta, gamma = grid[:, 0], grid[:, 1], grid[:, 2]
+    season = np.zeros((len(grid), SEASON))
+    if seasonal:
+        # 第一天的均值作为初始水平，前两天均值之差折算为每小时趋势，第一天各小时的偏差作为季节项
+        level0 = y[:SEASON].mean()
+        trend0 = (y[SEASON:2 * SEASON].mean() - level0) / SEASON
+        season[:, hours[:SEASON] % SEASON] = y[:SEASON] - level0
+    else:
+        level0, trend0 = y[0], 0.0
+    level, trend, errors = _smooth(y, hours, alpha, beta, gamma,
+                                   np.full(len(grid), level0), np.full(len(grid), trend0), season)
+    # 初始化用掉的观测不参与评估
+    warmup = SEASON if seasonal else 1
+    sse = (errors[warmup:] ** 2).sum(axis=0)
+    best = int(np.argmin(sse))
+    model = _Model()
+    model.alpha, model.beta, model.gamma = float(alpha[best]), float(beta[best]), float(gamma[best])
+    model.level, model.trend = float(level[best]), float(trend[best])
+    model.season = season[best].copy()
+    model.sse, model.n = float(sse[best]), max(len(y) - warmup, 0)
+    model.last_hour = first_hour + (len(y) - 1) * ROLLUP_HOUR
+    return model
+
+def _update(model, y, first_hour):
+    """把新结束的小时逐个喂给已有状态"""
+    hours = first_hour // ROLLUP_HOUR + np.arange(len(y))
+    season = model.season[np.newaxis, :].copy()
+    level, trend, errors = _smooth(y, hours, np.array([model.alpha]), np.array([model.beta]), np.array([model.gamma]),
+                                   np.array([model.level]), np.array([model.trend]), season)
+    model.level, model.trend = float(level[0]), float(trend[0])
+    model.season = season[0]
+    model.sse += float((errors ** 2).sum())
+    model.n += len(y)
+    model.last_hour = first_hour + (len(y) - 1) * ROLLUP_HOUR
+
+def _hourly_series(cursor, client_key, start, end):
+    """[start, end) 内每小时的声量 (无内容的小时补 0)"""
+    cursor.execute('''SELECT hour, sum(total) FROM mention_rollup_hourly
+                      WHERE client_id = ? AND hour >= ? AND hour < ? GROUP BY hour''', (client_key, start, end))
+    y = np.zeros((end - start) // ROLLUP_HOUR)
+    for hour, total in cursor.fetchall():
+        y[(hour - start) // ROLLUP_HOUR] = total
+    return y
+
+# ==========================================
+# 2. 按客户缓存的预测状态
+# ==========================================
+class ForecastCache:
+    """每个键 (库, 客户) 保存一个模型状态；只在整点小时结束后增量更新，每 REFIT_HOURS 小时重拟合"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models = {}
+        self.fits = 0
+        self.updates = 0
+        self.hits = 0
+
+    def _model(self, key, cursor, client_key, closed):
+        # closed: 当前 (未结束) 小时的起点，之前的小时都已结束
+        with self._lock:
+            model = self._models.get(key)
+        if model is not None and model.last_hour >= closed - ROLLUP_HOUR:
+            with self._lock:
+                self.hits += 1
+            return model
+        if model is None or closed - model.fitted_hour >= REFIT_HOURS * ROLLUP_HOUR:
+            y = _hourly_series(cursor, client_key, closed - HISTORY_HOURS * ROLLUP_HOUR, closed)
+            nonzero = np.flatnonzero(y)
+            if not len(nonzero):
+                return None
+            # 序列从第一个有内容的小时开始
+            start = closed - (len(y) - nonzero[0]) * ROLLUP_HOUR
+            model = _fit(y[nonzero[0]:], start)
+            model.fitted_hour = closed
+            counter = "fits"
+        else:
+            # 在副本上更新，其他线程仍可读取旧状态
+            updated = _Model()
+            for name in _Model.__slots__:
+                setattr(updated, name, getattr(model, name))
+            start = model.last_hour + ROLLUP_HOUR
+            _update(updated, _hourly_series(cursor, client_key, start, closed), start)
+            model = updated
+            counter = "updates"
+        with self._lock:
+            self._models[key] = model
+            setattr(self, counter, getattr(self, counter) + 1)
+        return model
+
+    def get(self, key, cursor, client_key, now):
+        """
+        返回 {"peak_hour", "peak_volume", "ahead_hours", "ahead", "lower", "upper"}，没有任何历史时返回 None
+        ahead 为未来 AHEAD_HOURS 个小时 (含当前小时) 的预测声量，lower / upper 为 95% 区间
+        """
+        closed = floor_hour(now)
+        model = self._model(key, cursor, client_key, closed)
+        if model is None:
+            return None
+        point, variance = model.forecast(closed, HORIZON)
+        peak = int(np.argmax(point))
+        ahead = float(point[:AHEAD_HOURS].sum())
+        spread = Z * math.sqrt(float(variance[:AHEAD_HOURS].sum()))
+        return {
+            "peak_hour": closed + peak * ROLLUP_HOUR,
+            "peak_volume": round(float(point[peak]), 1),
+            "ahead_hours": AHEAD_HOURS,
+            "ahead": int(round(ahead)),
+            "lower": int(max(0.0, math.floor(ahead - spread))),
+            "upper": int(math.ceil(ahead + spread)),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def stats(self):
+        return {"fits": self.fits, "updates": self.updates, "hits": self.hits, "entries": len(self._models)}
+
+FORECASTS = ForecastCache()
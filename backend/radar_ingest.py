@@ -0,0 +1,171 @@
+"""
+流式批量入库 (POST /ingest/stream)
+
+请求体为 NDJSON，每行一条内容：
+    {"title": "...", "source": "...", "url": "...", "summary": "..." | {"fact": ..., "angle": ...}, "full_content": "..."}
+边读边解析，攒够一个微批次 (默认 500 条) 就调用 process_monitor_data 入库 (每批一个事务)，
+并立即回写一行 NDJSON 确认；内存中最多只保留一个批次，外部爬虫 / 回灌脚本可以持续推送任意数量的内容。
+
+确认行:
+    {"batch": 1, "first_line": 1, "last_line": 500, "accepted": 498, "processed": 450, "duplicates": 12, "alerts": 3, "errors": [...]}
+结束行:
+    {"status": "success", "lines": ..., "accepted": ..., "processed": ..., "batches": ...}
+某个批次入库失败时回写 {"status": "error", ...} 并停止，之前确认过的批次已经提交，可从 last_line 之后续传。
+"""
+import json
+import time
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+from radar_monitor import process_monitor_data
+
+INGEST_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 5000
+MAX_LINE_BYTES = 1024 * 1024       # 单行上限，超长的行整行丢弃
+MAX_ERRORS_PER_BATCH = 20          # 每个确认行最多列出的错误数
+DEFAULT_SOURCE = "外部导入"
+
+# ==========================================
+# 1. 解析
+# ==========================================
+async def iter_lines(chunks):
+    """把字节块增量切分成行，返回 (行号, bytes 或 None)；超长的行返回 None"""
+    buf = b""
+    line_no = 0
+    skipping = False
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        buf += chunk
+        while True:
+            pos = buf.find(b"\n")
+            if pos < 0:
+                break
+            line, buf = buf[:pos], buf[pos + 1:]
+            line_no += 1
+            if skipping:
+                skipping = False
+                yield line_no, None
+            else:
+                yield line_no, line
+        if len(buf) > MAX_LINE_BYTES:
+            # 超长行：丢弃已缓存的部分，直到下一个换行
+            buf = b""
+            skipping = True
+    if skipping:
+        yield line_no + 1, None
+    elif buf.strip():
+        yield line_no + 1, buf
+
+def parse_item(line):
+    """解析一行，返回 (item, None) 或 (None, 错误信息)；空行返回 (None, None)"""
+    if line is None:
+        return None, f"line exceeds {MAX_LINE_BYTES} bytes"
+    line = line.strip()
+    if not line:
+        return None, None
+    try:
+        obj = json.loads(line)
+    except ValueError as e:
+        return None, f"invalid json: {e}"
+    if not isinstance(obj, dict):
+        return None, "item must be a json object"
+    title = obj.get("title")
+    if not isinstance(title, str) or not title.strip():
+        return None, "missing title"
+    url = obj.get("url") or ""
+    if not isinstance(url, str):
+        return None, "url must be a string"
+    summary = obj.get("summary")
+    if summary is not None and not isinstance(summary, (str, dict)):
+        return None, "summary must be a string or object"
+    full_content = obj.get("full_content") or ""
+    if not isinstance(full_content, str):
+        return None, "full_content must be a string"
+    return {
+        "title": title.strip(),
+        "source": str(obj.get("source") or DEFAULT_SOURCE),
+        "url": url,
+        "summary": summary,
+        "full_content": full_content
+    }, None
+
+# ==========================================
+# 2. 分批入库
+# ==========================================
+async def ingest_ndjson(chunks, batch_size=INGEST_BATCH_SIZE):
+    """消费 NDJSON 字节流，逐批入库，逐批产出确认行 (bytes)"""
+    batch_size = max(1, min(int(batch_size), MAX_BATCH_SIZE))
+    totals = {"lines": 0, "accepted": 0, "processed": 0, "duplicates": 0, "alerts": 0, "rejected": 0, "batches": 0}
+    batch = []
+    errors = []
+    first_line = None
+    last_line = 0
+
+    async def flush():
+        totals["batches"] += 1
+        t0 = time.time()
+        res = await run_in_threadpool(process_monitor_data, batch) if batch else {"processed": 0, "alerts": []}
+        duplicates = sum(1 for item in batch if item.get("is_duplicate"))
+        totals["accepted"] += len(batch)
+        totals["processed"] += res["processed"]
+        totals["duplicates"] += duplicates
+        totals["alerts"] += len(res["alerts"])
+        return {
+            "batch": totals["batches"],
+            "first_line": first_line,
+            "last_line": last_line,
+            "accepted": len(batch),
+            "processed": res["processed"],
+            "duplicates": duplicates,
+            "alerts": len(res["alerts"]),
+            "errors": errors[:MAX_ERRORS_PER_BATCH],
+            "elapsed_ms": int((time.time() - t0) * 1000)
+        }
+
+    def ack(obj):
+        return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+    try:
+        async for line_no, line in iter_lines(chunks):
+            item, error = parse_item(line)
+            if item is None and error is None:
+                continue
+            if first_line is None:
+                first_line = line_no
+            last_line = line_no
+            totals["lines"] += 1
+            if error:
+                totals["rejected"] += 1
+                errors.append({"line": line_no, "error": error})
+            else:
+                batch.append(item)
+            if len(batch) >= batch_size or len(errors) >= batch_size:
+                yield ack(await flush())
+                batch, errors, first_line = [], [], None
+        if batch or errors:
+            yield ack(await flush())
+    except ClientDisconnect:
+        # 客户端断开：已确认的批次已入库，未满的批次丢弃
+        return
+    except Exception as e:
+        # 当前批次未提交；之前确认过的批次已入库
+        yield ack({"status": "error", "batch": totals["batches"], "first_line": first_line, "error": str(e), **totals})
+        return
+
+    yield ack({"status": "success", **totals})
+
+class NDJSONIngestResponse(StreamingResponse):
+    """
+    边读请求体边回写确认的流式响应
+    StreamingResponse 在 ASGI 2.3 (uvicorn) 下会另起任务监听断开并消费 receive()，与读取请求体冲突；
+    这里直接输出生成器，客户端断开时请求体读取会抛出 ClientDisconnect，生成器随之结束。
+    """
+
+    def __init__(self, content):
+        super().__init__(content, media_type="application/x-ndjson")
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
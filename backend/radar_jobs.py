@@ -0,0 +1,212 @@
+"""
+摘要任务队列：入库时不再同步调用大模型
+
+process_monitor_data 把缺少摘要的内容以 summary_status='pending' 入库，并在同一事务里登记 summary_jobs；
+独立的 worker 池从任务表中按租约领取任务，生成 ai_fact / ai_angle 后写回 mentions。
+- 租约 (lease)：worker 崩溃或超时后，任务在租约到期后会被其他 worker 重新领取
+- 重试：失败后按指数退避重新排队
+- 死信：超过最大重试次数的任务标记为 dead，对应内容标记为 summary_status='failed'
+- 完成 / 失败只对仍由自己持有租约的任务生效：租约过期被其他 worker 重新领取后，原 worker 的结果直接丢弃
+
+独立进程运行: python radar_jobs.py [worker 数量]
+"""
+import sqlite3
+import time
+import sys
+import os
+import uuid
+import threading
+
+from ai_engine import request_news_summary
+from radar_migrations import run_migrations
+
+DB_FILE = "radar_data.db"
+
+MAX_ATTEMPTS = 5
+LEASE_SECONDS = 120
+RETRY_BASE_SECONDS = 30
+POLL_INTERVAL = 2.0
+
+# ==========================================
+# 1. 数据库初始化
+# ==========================================
+def init_job_db():
+    # summary_jobs 表见 radar_migrations 第 2 版
+    run_migrations()
+
+init_job_db()
+
+# ==========================================
+# 2. 入队 (由入库事务调用，复用调用方的游标)
+# ==========================================
+def enqueue_pending_summaries(cursor, url_table="ingest_keys"):
+    """
+    为本批 URL 中待生成摘要的全局内容登记任务，已登记过的自动忽略
+    近重复簇只为簇代表生成摘要，其余成员等代表的任务完成后一并写回；
+    簇代表没有进行中的任务 (如已进入死信) 时，成员自己登记任务。
+    """
+    now = time.time()
+    cursor.execute(f'''INSERT OR IGNORE INTO summary_jobs (mention_id, status, attempts, available_at, created_at, updated_at)
+                       SELECT id, 'queued', 0, ?, ?, ? FROM mentions
+                       WHERE client_id IS NULL AND summary_status='pending'
+                       AND (cluster_id IS NULL OR cluster_id = id)
+                       AND url IN (SELECT url FROM {url_table})''', (now, now, now))
+    count = cursor.rowcount
+    cursor.execute(f'''INSERT OR IGNORE INTO summary_jobs (mention_id, status, attempts, available_at, created_at, updated_at)
+                       SELECT m.id, 'queued', 0, ?, ?, ? FROM mentions m
+                       WHERE m.client_id IS NULL AND m.summary_status='pending'
+                       AND m.cluster_id != m.id
+                       AND m.url IN (SELECT url FROM {url_table})
+                       AND NOT EXISTS (SELECT 1 FROM summary_jobs j
+                                       WHERE j.mention_id = m.cluster_id AND j.status IN ('queued', 'running'))''', (now, now, now))
+    return count + cursor.rowcount
+
+# ==========================================
+# 3. 领取 / 完成 / 失败
+# ==========================================
+def claim_summary_jobs(worker_id, limit=5, lease_seconds=LEASE_SECONDS):
+    """领取可执行的任务 (排队中且到期，或租约已过期的)，返回 [(job_id, mention_id, title, content, url), ...]"""
+    conn = sqlite3.connect(DB_FILE, timeout=30.0)
+    c = conn.cursor()
+    now = time.time()
+    c.execute("BEGIN IMMEDIATE")
+    c.execute('''SELECT id FROM summary_jobs
+                 WHERE (status='queued' AND available_at <= ?)
+                    OR (status='running' AND lease_until < ?)
+                 ORDER BY id LIMIT ?''', (now, now, limit))
+    job_ids = [r[0] for r in c.fetchall()]
+    if not job_ids:
+        conn.commit()
+        conn.close()
+        return []
+
+    placeholders = ",".join(["?" for _ in job_ids])
+    c.execute(f'''UPDATE summary_jobs
+                  SET status='running', lease_owner=?, lease_until=?, attempts=attempts+1, updated_at=?
+                  WHERE id IN ({placeholders})''', [worker_id, now + lease_seconds, now] + job_ids)
+    c.execute(f'''SELECT j.id, j.mention_id, m.title, m.content_text, m.url
+                  FROM summary_jobs j JOIN mentions m ON m.id = j.mention_id
+                  WHERE j.id IN ({placeholders})''', job_ids)
+    jobs = c.fetchall()
+    # 原内容已被删除的任务直接结束
+    found = {j[0] for j in jobs}
+    orphan = [jid for jid in job_ids if jid not in found]
+    if orphan:
+        c.executemany("UPDATE summary_jobs SET status='done', last_error='mention missing', updated_at=? WHERE id=?",
+                      [(now, jid) for jid in orphan])
+    conn.commit()
+    conn.close()
+    return jobs
+
+# 只更新仍由该 worker 持有租约的任务
+LEASE_HELD = "id=? AND lease_owner=? AND status='running'"
+
+def complete_summary_job(worker_id, job_id, mention_id, ai_fact, ai_angle):
+    """写回摘要并结束任务；租约已不属于 worker_id 时什么都不做，返回 False"""
+    conn = sqlite3.connect(DB_FILE, timeout=30.0)
+    c = conn.cursor()
+    c.execute(f"UPDATE summary_jobs SET status='done', lease_owner=NULL, last_error=NULL, updated_at=? WHERE {LEASE_HELD}",
+              (time.time(), job_id, worker_id))
+    held = c.rowcount > 0
+    if held:
+        # 全局内容，以及同一近重复簇中仍在等待摘要的内容一并写回 (客户命中只引用全局内容，无需单独写回)
+        c.execute('''UPDATE mentions SET ai_fact=?, ai_angle=?, summary_status='done'
+                     WHERE id=? OR (summary_status='pending' AND cluster_id=(SELECT cluster_id FROM mentions WHERE id=?))''',
+                  (ai_fact, ai_angle, mention_id, mention_id))
+    conn.commit()
+    conn.close()
+    return held
+
+def fail_summary_job(worker_id, job_id, mention_id, error):
+    """按退避时间重新排队或进入死信；租约已不属于 worker_id 时什么都不做，返回 False"""
+    conn = sqlite3.connect(DB_FILE, timeout=30.0)
+    c = conn.cursor()
+    now = time.time()
+    c.execute("BEGIN IMMEDIATE")
+    c.execute(f"SELECT attempts FROM summary_jobs WHERE {LEASE_HELD}", (job_id, worker_id))
+    row = c.fetchone()
+    if row is None:
+        conn.commit()
+        conn.close()
+        return False
+    attempts = row[0]
+    if attempts >= MAX_ATTEMPTS:
+        # 死信：不再重试，内容标记为摘要失败
+        c.execute(f"UPDATE summary_jobs SET status='dead', lease_owner=NULL, last_error=?, updated_at=? WHERE {LEASE_HELD}",
+                  (str(error), now, job_id, worker_id))
+        c.execute('''UPDATE mentions SET summary_status='failed'
+                     WHERE id=? OR (summary_status='pending' AND cluster_id=(SELECT cluster_id FROM mentions WHERE id=?))''',
+                  (mention_id, mention_id))
+    else:
+        retry_at = now + RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+        c.execute(f'''UPDATE summary_jobs SET status='queued', lease_owner=NULL, available_at=?, last_error=?, updated_at=?
+                      WHERE {LEASE_HELD}''', (retry_at, str(error), now, job_id, worker_id))
+    conn.commit()
+    conn.close()
+    return True
+
+def run_summary_job(job, worker_id):
+    job_id, mention_id, title, content, _ = job
+    try:
+        # 大模型调用失败时抛出异常 (不使用 generate_news_summary 的兜底摘要)，任务按退避重试
+        ai_data = request_news_summary(title or "", content or "")
+        ai_fact = (ai_data or {}).get('fact', '')
+        ai_angle = (ai_data or {}).get('angle', '')
+        if not ai_fact and not ai_angle:
+            raise ValueError("empty summary")
+        if not complete_summary_job(worker_id, job_id, mention_id, ai_fact, ai_angle):
+            print(f"[summary] job {job_id} lease lost, result discarded")
+            return False
+        return True
+    except Exception as e:
+        print(f"[summary] job {job_id} failed: {e}")
+        fail_summary_job(worker_id, job_id, mention_id, e)
+        return False
+
+# ==========================================
+# 4. Worker 池
+# ==========================================
+def run_summary_worker(stop_event, worker_id=None, batch_size=5, poll_interval=POLL_INTERVAL):
+    worker_id = worker_id or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    while not stop_event.is_set():
+        try:
+            jobs = claim_summary_jobs(worker_id, limit=batch_size)
+        except sqlite3.OperationalError as e:
+            print(f"[summary] claim failed: {e}")
+            jobs = []
+        if not jobs:
+            stop_event.wait(poll_interval)
+            continue
+        for job in jobs:
+            if stop_event.is_set():
+                break
+            run_summary_job(job, worker_id)
+
+def start_summary_workers(num_workers=2):
+    """启动后台摘要 worker 线程，返回用于停止的 Event"""
+    stop_event = threading.Event()
+    for i in range(num_workers):
+        t = threading.Thread(target=run_summary_worker, args=(stop_event,), name=f"summary-worker-{i}", daemon=True)
+        t.start()
+    return stop_event
+
+def get_summary_queue_stats():
+    conn = sqlite3.connect(DB_FILE)
+    c = conn.cursor()
+    c.execute("SELECT status, COUNT(*) FROM summary_jobs GROUP BY status")
+    stats = {"queued": 0, "running": 0, "done": 0, "dead": 0}
+    for status, cnt in c.fetchall():
+        stats[status] = cnt
+    conn.close()
+    return stats
+
+if __name__ == "__main__":
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    print(f"🚀 Starting {workers} summary workers...")
+    stop = start_summary_workers(workers)
+    try:
+        while True:
+            time.sleep(60)
+            print(f"[summary] queue: {get_summary_queue_stats()}")
+    except KeyboardInterrupt:
+        stop.set()
@@ -0,0 +1,325 @@
+"""
+客户监控规则匹配引擎
+
+把所有启用客户的品牌词 / 排除词 / 高级规则词编译进同一个 Aho-Corasick 自动机，
+每条内容只扫描一遍文本，再把命中的词分发给所属客户。
+客户数量增加只会让自动机变大，不会让单条内容的匹配次数线性增长。
+同一次扫描还产出每个词的出现位置，高级规则的邻近判断都基于这份位置索引做归并求距。
+"""
+import json
+import re
+import threading
+
+# ==========================================
+# 1. 单客户规则 (参考实现)
+# ==========================================
+
+def closest_pair_distance(positions1, positions2):
+    """两个升序位置列表的最近距离：归并扫描，O(n + m)"""
+    i, j = 0, 0
+    min_dist = float('inf')
+    while i < len(positions1) and j < len(positions2):
+        diff = positions1[i] - positions2[j]
+        if diff < 0:
+            if -diff < min_dist: min_dist = -diff
+            i += 1
+        else:
+            if diff < min_dist: min_dist = diff
+            if diff == 0: break
+            j += 1
+    return min_dist
+
+def calculate_distance(text, word1, word2):
+    if word1 not in text or word2 not in text: return float('inf')
+    indices1 = [m.start() for m in re.finditer(re.escape(word1), text)]
+    indices2 = [m.start() for m in re.finditer(re.escape(word2), text)]
+    return closest_pair_distance(indices1, indices2)
+
+def check_advanced_rule(text, rule, index=None):
+    """index: 可选的 OccurrenceIndex，多条规则共用同一份位置索引"""
+    for word in rule.get('must_contain', []):
+        if (word not in index) if index is not None else (word not in text): return False, None
+    limit_dist = rule.get('distance', 50)
+    hit_details = []
+    for root_word in rule.get('must_contain', []):
+        for near_word in rule.get('nearby_words', []):
+            if index is not None:
+                dist = index.distance(root_word, near_word)
+            else:
+                dist = calculate_distance(text, root_word, near_word)
+            if dist <= limit_dist:
+                hit_details.append(f"{root_word}..({dist}字)..{near_word}")
+    if not hit_details: return False, None
+    return True, hit_details
+
+def match_client_logic(text, logic_config):
+    logic = logic_config if isinstance(logic_config, dict) else json.loads(logic_config)
+    for excl in logic.get('exclude_keywords', []):
+        if excl and excl in text: return None
+    matched_brand = None
+    for brand in logic.get('brand_keywords', []):
+        if brand and brand in text:
+            matched_brand = brand
+            break
+    advanced_hit_info = None
+    for rule in logic.get('advanced_rules', []):
+        is_hit, hit_details = check_advanced_rule(text, rule)
+        if is_hit:
+            advanced_hit_info = {
+                "rule_name": rule['rule_name'],
+                "risk_level": rule.get('risk_level', 3),
+                "details": hit_details
+            }
+            break
+    if matched_brand or advanced_hit_info:
+        return {
+            "type": "advanced" if advanced_hit_info else "brand",
+            "matched_keyword": matched_brand,
+            "advanced_detail": advanced_hit_info
+        }
+    return None
+
+# ==========================================
+# 2. 多模式关键词自动机 (Aho-Corasick)
+# ==========================================
+
+class KeywordAutomaton:
+    """Aho-Corasick 自动机：一次扫描找出文本中出现的全部关键词 (含重叠出现)"""
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        self.keywords = set()
+        for kw in keywords:
+            if kw and kw not in self.keywords:
+                self.keywords.add(kw)
+                self._add(kw)
+        self._build()
+
+    def _add(self, kw):
+        state = 0
+        for ch in kw:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+                self._goto[state][ch] = nxt
+            state = nxt
+        self._out[state] = self._out[state] + (kw,)
+
+    def _build(self):
+        # BFS 构建失败指针，并把失败链上的输出合并到当前状态
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                if self._out[self._fail[nxt]]:
+                    self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text):
+        """逐个产出 (起始位置, 关键词)"""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for kw in out[state]:
+                    yield i - len(kw) + 1, kw
+
+    def find_all(self, text):
+        """返回文本中出现过的关键词集合"""
+        return {kw for _, kw in self.iter_matches(text)}
+
+class OccurrenceIndex:
+    """
+    单条文本的关键词位置索引：词 -> 升序起始位置列表
+    由自动机一次扫描建立，所有规则的邻近 (NEAR) 约束都从这份索引里求最近距离。
+    同一个词的出现按 re.finditer 的语义去掉重叠，距离结果与 calculate_distance 一致。
+    """
+
+    def __init__(self, text, automaton):
+        self.text = text
+        self._indexed = automaton.keywords
+        self.positions = {}
+        last_end = {}
+        for start, kw in automaton.iter_matches(text):
+            if start < last_end.get(kw, 0):
+                continue
+            last_end[kw] = start + len(kw)
+            self.positions.setdefault(kw, []).append(start)
+
+    def occurrences(self, word):
+        found = self.positions.get(word)
+        if found is not None:
+            return found
+        if word in self._indexed:
+            return []
+        # 未编入自动机的词 (如空串) 退回到现场查找，并缓存结果
+        found = [m.start() for m in re.finditer(re.escape(word), self.text)]
+        self.positions[word] = found
+        return found
+
+    def __contains__(self, word):
+        return len(self.occurrences(word)) > 0
+
+    def distance(self, word1, word2):
+        p1 = self.occurrences(word1)
+        p2 = self.occurrences(word2)
+        if not p1 or not p2: return float('inf')
+        return closest_pair_distance(p1, p2)
+
+# ==========================================
+# 3. 全客户规则集
+# ==========================================
+
+class ClientMatcher:
+    """
+    把一组客户的监控逻辑编译成一个自动机
+    clients: [(client_id, logic_dict, name), ...]
+    match(text) 的结果与逐个客户调用 match_client_logic 完全一致
+    """
+
+    def __init__(self, clients):
+        self.clients = []
+        self._owners = {}          # 关键词 -> 触发的客户下标集合 (品牌词 / 规则必含词)
+        self._always = set()       # 规则不依赖任何关键词的客户，每次都要检查
+        words = set()
+        for idx, (c_id, logic, name) in enumerate(clients):
+            brands = [b for b in logic.get('brand_keywords', []) if b]
+            excludes = [e for e in logic.get('exclude_keywords', []) if e]
+            rules = logic.get('advanced_rules', [])
+            self.clients.append((c_id, name, logic, brands, excludes, rules))
+            words.update(brands)
+            words.update(excludes)
+            for kw in brands:
+                self._owners.setdefault(kw, set()).add(idx)
+            for rule in rules:
+                must = [w for w in rule.get('must_contain', []) if w]
+                if rule.get('must_contain') and not must:
+                    self._always.add(idx)
+                for w in must:
+                    self._owners.setdefault(w, set()).add(idx)
+                words.update(must)
+                words.update(w for w in rule.get('nearby_words', []) if w)
+        self.automaton = KeywordAutomaton(words)
+
+    def match(self, text):
+        """返回 [(client_id, name, match_res), ...]，顺序与客户列表一致"""
+        index = OccurrenceIndex(text, self.automaton)
+        hits = set(index.positions)
+        candidates = set(self._always)
+        for kw in hits:
+            owners = self._owners.get(kw)
+            if owners:
+                candidates.update(owners)
+
+        results = []
+        for idx in sorted(candidates):
+            c_id, name, logic, brands, excludes, rules = self.clients[idx]
+            if any(e in hits for e in excludes):
+                continue
+            matched_brand = next((b for b in brands if b in hits), None)
+            advanced_hit_info = None
+            for rule in rules:
+                if not all((not w) or w in hits for w in rule.get('must_contain', [])):
+                    continue
+                is_hit, hit_details = check_advanced_rule(text, rule, index)
+                if is_hit:
+                    advanced_hit_info = {
+                        "rule_name": rule['rule_name'],
+                        "risk_level": rule.get('risk_level', 3),
+                        "details": hit_details
+                    }
+                    break
+            if matched_brand or advanced_hit_info:
+                results.append((c_id, name, {
+                    "type": "advanced" if advanced_hit_info else "brand",
+                    "matched_keyword": matched_brand,
+                    "advanced_detail": advanced_hit_info
+                }))
+        return results
+
+# ==========================================
+# 4. 进程级编译规则缓存
+# ==========================================
+
+class RuleCache:
+    """
+    按 (client_id, config_version) 缓存解析后的客户规则，并缓存整体编译好的 ClientMatcher。
+    client_config 每次保存 / 删除都会把 config_versions 表中的全局版本号 +1：
+    - 全局版本号未变：直接复用已编译的匹配器 (命中)，不读取 client_config
+    - 全局版本号变化：只重新解析 config_version 变化过的客户，再重建自动机 (未命中)
+    多个进程 / worker 各自持有一份缓存，通过数据库中的版本号保持一致。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states = {}     # db_key -> {"version", "matcher", "compiled"}
+        self.hits = 0
+        self.misses = 0
+        self.rebuilt_clients = 0
+
+    def get_matcher(self, cursor, db_key):
+        cursor.execute("SELECT version FROM config_versions WHERE name='client_config'")
+        row = cursor.fetchone()
+        version = row[0] if row else 0
+
+        with self._lock:
+            state = self._states.setdefault(db_key, {"version": None, "matcher": None, "compiled": {}})
+            if state["matcher"] is not None and state["version"] == version:
+                self.hits += 1
+                return state["matcher"]
+            self.misses += 1
+
+            cursor.execute("SELECT client_id, name, config_version FROM client_config WHERE status=1")
+            rows = cursor.fetchall()
+            compiled = state["compiled"]
+            changed = [r[0] for r in rows if r[0] not in compiled or compiled[r[0]][0] != r[2]]
+            if changed:
+                placeholders = ",".join(["?" for _ in changed])
+                cursor.execute(f"SELECT client_id, monitor_logic FROM client_config WHERE client_id IN ({placeholders})", changed)
+                logic_map = dict(cursor.fetchall())
+            else:
+                logic_map = {}
+
+            new_compiled = {}
+            clients = []
+            for c_id, c_name, c_version in rows:
+                if c_id in logic_map:
+                    c_logic_str = logic_map[c_id]
+                    try: c_logic = json.loads(c_logic_str) if isinstance(c_logic_str, str) else c_logic_str
+                    except: c_logic = None
+                    self.rebuilt_clients += 1
+                else:
+                    c_logic = compiled[c_id][1]
+                new_compiled[c_id] = (c_version, c_logic)
+                if c_logic is not None:
+                    clients.append((c_id, c_logic, c_name))
+
+            state["compiled"] = new_compiled
+            state["matcher"] = ClientMatcher(clients)
+            state["version"] = version
+            return state["matcher"]
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "rebuilt_clients": self.rebuilt_clients,
+            "cached_clients": sum(len(s["compiled"]) for s in self._states.values())
+        }
+
+RULE_CACHE = RuleCache()
@@ -0,0 +1,457 @@
+"""
+数据库 Schema 迁移
+
+所有表结构变更按版本号登记在 MIGRATIONS 中，已执行的版本记录在 schema_migrations 表里：
+- 每个进程对同一个数据库文件只检查一次 (run_migrations 之后的调用直接返回)
+- 多进程同时启动时用 BEGIN IMMEDIATE 串行化，每个版本在自己的事务里执行并登记，失败整体回滚
+- 早期版本 (1-5) 是各模块原先在 import 时执行的建表 / 补字段逻辑，对已有数据库是幂等的
+
+新增表结构变更时在末尾追加一个版本，不要修改已经发布的版本。
+命令行: python radar_migrations.py [status]
+"""
+import sqlite3
+import os
+import sys
+import time
+import threading
+
+DB_FILE = "radar_data.db"
+
+MIGRATIONS = []          # [(version, name, fn), ...]
+_migrated = set()        # 本进程内已检查过的数据库文件 (绝对路径)
+_lock = threading.Lock()
+
+def migration(version, name):
+    def register(fn):
+        MIGRATIONS.append((version, name, fn))
+        return fn
+    return register
+
+# ==========================================
+# 1. 工具函数
+# ==========================================
+def table_exists(c, table):
+    c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,))
+    return c.fetchone() is not None
+
+def add_column(c, table, column, decl):
+    """字段不存在时才添加 (替代 try: ALTER TABLE ... except: pass)"""
+    c.execute(f"PRAGMA table_info({table})")
+    if column not in {r[1] for r in c.fetchall()}:
+        c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+# ==========================================
+# 2. 迁移版本
+# ==========================================
+
+@migration(1, "monitor_baseline")
+def _m001_monitor_baseline(c):
+    # 客户配置表
+    c.execute('''CREATE TABLE IF NOT EXISTS client_config
+                 (client_id VARCHAR(64) PRIMARY KEY,
+                  name VARCHAR(100),
+                  industry VARCHAR(50),
+                  status INTEGER DEFAULT 1,
+                  monitor_logic JSON,
+                  risk_sensitivity FLOAT DEFAULT 1.0,
+                  alert_webhook VARCHAR(255),
+                  competitors JSON)''')
+    add_column(c, "client_config", "industry", "VARCHAR(50)")
+    add_column(c, "client_config", "status", "INTEGER DEFAULT 1")
+    add_column(c, "client_config", "config_version", "INTEGER DEFAULT 0")
+
+    # 配置版本号：客户规则每次变更 +1，供各进程的规则缓存判断是否需要重建
+    c.execute('''CREATE TABLE IF NOT EXISTS config_versions
+                 (name VARCHAR(50) PRIMARY KEY,
+                  version INTEGER DEFAULT 0)''')
+    c.execute("INSERT OR IGNORE INTO config_versions (name, version) VALUES ('client_config', 0)")
+
+    # 舆情数据表
+    c.execute('''CREATE TABLE IF NOT EXISTS mentions
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  client_id VARCHAR(64),
+                  source TEXT,
+                  title TEXT,
+                  content_text TEXT,
+                  url TEXT,
+                  publish_time REAL,
+                  sentiment_score REAL,
+                  risk_level INTEGER,
+                  match_detail JSON,
+                  clean_status VARCHAR(20) DEFAULT 'uncleaned',
+                  manual_category VARCHAR(50),
+                  manual_sentiment VARCHAR(20),
+                  is_archived INTEGER DEFAULT 0,
+                  ai_fact TEXT,
+                  ai_angle TEXT,
+                  content_hash VARCHAR(64),
+                  is_duplicate INTEGER DEFAULT 0,
+                  FOREIGN KEY(client_id) REFERENCES client_config(client_id))''')
+    for column, decl in [("clean_status", "VARCHAR(20) DEFAULT 'uncleaned'"),
+                         ("manual_category", "VARCHAR(50)"),
+                         ("manual_sentiment", "VARCHAR(20)"),
+                         ("is_archived", "INTEGER DEFAULT 0"),
+                         ("ai_fact", "TEXT"),
+                         ("ai_angle", "TEXT"),
+                         ("manual_tags", "TEXT"),
+                         ("content_hash", "VARCHAR(64)"),
+                         ("is_duplicate", "INTEGER DEFAULT 0"),
+                         ("event_title", "TEXT"),
+                         ("primary_tag", "VARCHAR(50)"),
+                         ("secondary_tag", "VARCHAR(50)"),
+                         ("quality_score", "INTEGER DEFAULT 0"),
+                         ("created_at", "REAL"),
+                         # 摘要状态：NULL/done 已有摘要，pending 等待摘要任务，failed 摘要任务进入死信
+                         ("summary_status", "VARCHAR(20)")]:
+        add_column(c, "mentions", column, decl)
+
+    # 黑名单表
+    c.execute('''CREATE TABLE IF NOT EXISTS source_blacklist
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  source_name TEXT UNIQUE,
+                  source_type VARCHAR(20),
+                  reason TEXT,
+                  created_at REAL,
+                  created_by VARCHAR(100))''')
+
+    # 内容库表（按客户分类）
+    c.execute('''CREATE TABLE IF NOT EXISTS content_library
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  mention_id INTEGER,
+                  client_id VARCHAR(64),
+                  assigned_category VARCHAR(50),
+                  assigned_by VARCHAR(100),
+                  assigned_at REAL,
+                  FOREIGN KEY(mention_id) REFERENCES mentions(id),
+                  FOREIGN KEY(client_id) REFERENCES client_config(client_id))''')
+
+    # 我的选题表 (User Topics)
+    c.execute('''CREATE TABLE IF NOT EXISTS user_topics
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  user_id VARCHAR(64),
+                  topic TEXT,
+                  source VARCHAR(50),
+                  created_at REAL,
+                  status INTEGER DEFAULT 1,
+                  notes TEXT)''')
+
+@migration(2, "summary_jobs")
+def _m002_summary_jobs(c):
+    # status: queued (待领取) / running (租约中) / done (完成) / dead (死信)
+    c.execute('''CREATE TABLE IF NOT EXISTS summary_jobs
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  mention_id INTEGER UNIQUE,
+                  status VARCHAR(20) DEFAULT 'queued',
+                  attempts INTEGER DEFAULT 0,
+                  lease_owner VARCHAR(64),
+                  lease_until REAL,
+                  available_at REAL,
+                  last_error TEXT,
+                  created_at REAL,
+                  updated_at REAL)''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_summary_jobs_status ON summary_jobs(status, available_at)")
+
+@migration(3, "near_duplicate_clusters")
+def _m003_near_duplicate_clusters(c):
+    # 近重复簇：指向簇内最早的一条全局内容
+    add_column(c, "mentions", "cluster_id", "INTEGER")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_mentions_cluster ON mentions(cluster_id)")
+    c.execute('''CREATE TABLE IF NOT EXISTS minhash_bands
+                 (band_key INTEGER,
+                  mention_id INTEGER)''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_minhash_bands_key ON minhash_bands(band_key)")
+
+@migration(4, "flash_baseline")
+def _m004_flash_baseline(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS raw_flashes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        source_type TEXT NOT NULL,  -- 'cls' etc
+        source_value TEXT,
+        title TEXT,
+        content TEXT,
+        url TEXT,
+        publish_time REAL,
+        fetch_time REAL,
+        content_hash TEXT UNIQUE,
+        status TEXT DEFAULT 'draft',  -- draft, published, discarded
+        rewrite_title TEXT,
+        rewrite_content TEXT,
+        rewrite_error TEXT,
+        important INTEGER DEFAULT 0,
+        created_at REAL
+    )''')
+    add_column(c, "raw_flashes", "rewrite_title", "TEXT")
+    add_column(c, "raw_flashes", "rewrite_content", "TEXT")
+    add_column(c, "raw_flashes", "rewrite_error", "TEXT")
+    add_column(c, "raw_flashes", "important", "INTEGER DEFAULT 0")
+
+    c.execute('''CREATE TABLE IF NOT EXISTS flash_configs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        config_type TEXT NOT NULL,
+        config_value TEXT NOT NULL UNIQUE,
+        is_active INTEGER DEFAULT 1,
+        created_at REAL
+    )''')
+
+@migration(5, "tagging_baseline")
+def _m005_tagging_baseline(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS tags (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        tag_type TEXT NOT NULL,
+        alias TEXT,
+        count INTEGER DEFAULT 0,
+        create_time REAL,
+        UNIQUE(name, tag_type)
+    )''')
+    # 分类层级 (线上库建表时已带此字段)；追加在末尾，get_tags 的按位读取不受影响
+    add_column(c, "tags", "parent_id", "INTEGER")
+    # 内容库按 cast(mentions.id as text) 关联标签；之前只有打标脚本写入，从未建表
+    c.execute('''CREATE TABLE IF NOT EXISTS article_tags (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        article_id TEXT NOT NULL,
+        tag_id INTEGER NOT NULL,
+        confidence REAL,
+        source TEXT,
+        created_at REAL,
+        UNIQUE(article_id, tag_id)
+    )''')
+
+@migration(6, "hot_query_indexes")
+def _m006_hot_query_indexes(c):
+    # 入库查重：url IN (...) 分别取全局行 / 客户行
+    c.execute("CREATE INDEX IF NOT EXISTS idx_mentions_url_client ON mentions(url, client_id)")
+    # 入库查重：content_hash IN (...) AND client_id IS NULL AND is_duplicate=0 (覆盖索引)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_mentions_hash ON mentions(content_hash, client_id, is_duplicate)")
+    # 看板：按时间窗口计数 / 风险计数 / 最新日志 (覆盖索引)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_mentions_time ON mentions(publish_time, risk_level, sentiment_score)")
+    # 看板 / 内容库：单客户按时间窗口 (覆盖索引)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_mentions_client_time ON mentions(client_id, publish_time, risk_level, sentiment_score)")
+    # 看板：全量情感分布
+    c.execute("CREATE INDEX IF NOT EXISTS idx_mentions_sentiment ON mentions(sentiment_score)")
+    # 内容库 / 质检：按清洗状态筛选
+    c.execute("CREATE INDEX IF NOT EXISTS idx_mentions_clean_status ON mentions(clean_status, publish_time)")
+    # 快报列表：按状态 / 来源筛选后按发布时间倒序
+    c.execute("CREATE INDEX IF NOT EXISTS idx_raw_flashes_time ON raw_flashes(publish_time)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_raw_flashes_status_time ON raw_flashes(status, publish_time)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_raw_flashes_source_time ON raw_flashes(source_type, publish_time)")
+
+@migration(7, "mention_matches")
+def _m007_mention_matches(c):
+    # 客户命中关系：每个 (内容, 客户) 一行，指向唯一的全局内容，不再为每个客户复制整行正文
+    # publish_time 为命中时间，客户维度的时间窗口统计只走本表的覆盖索引
+    c.execute('''CREATE TABLE IF NOT EXISTS mention_matches
+                 (mention_id INTEGER NOT NULL,
+                  client_id VARCHAR(64) NOT NULL,
+                  risk_level INTEGER,
+                  sentiment REAL,
+                  match_detail JSON,
+                  publish_time REAL,
+                  PRIMARY KEY (mention_id, client_id))''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_mention_matches_client ON mention_matches(client_id, publish_time, risk_level, sentiment)")
+
+    # 折叠存量客户行：同 URL 的最早一条全局内容为目标；没有全局内容的 (旧版本入库 / 手动分发)，
+    # 该 URL 最早的客户行提升为全局内容，其余客户行删除。没有 URL 的行无法判断是否同一内容，各自保留
+    c.execute('''CREATE TEMP TABLE fold_rows AS
+                 SELECT m.id AS row_id, m.client_id AS client_id,
+                        COALESCE((SELECT g.id FROM mentions g WHERE g.client_id IS NULL AND g.url = NULLIF(m.url, '') ORDER BY g.id LIMIT 1),
+                                 (SELECT MIN(o.id) FROM mentions o WHERE o.client_id IS NOT NULL AND o.url = NULLIF(m.url, '')),
+                                 m.id) AS target
+                 FROM mentions m
+                 WHERE m.client_id IS NOT NULL''')
+    c.execute('''INSERT OR IGNORE INTO mention_matches (mention_id, client_id, risk_level, sentiment, match_detail, publish_time)
+                 SELECT f.target, f.client_id, m.risk_level, m.sentiment_score, m.match_detail, m.publish_time
+                 FROM fold_rows f JOIN mentions m ON m.id = f.row_id
+                 ORDER BY m.id''')
+    # 提升为全局内容：风险等级只对客户有意义，全局行置 0 (与入库时一致)
+    c.execute("UPDATE mentions SET client_id=NULL, risk_level=0 WHERE id IN (SELECT row_id FROM fold_rows WHERE target = row_id)")
+    # 引用被删除行的记录改指向目标行
+    c.execute('''UPDATE content_library SET mention_id=(SELECT target FROM fold_rows WHERE row_id = content_library.mention_id)
+                 WHERE mention_id IN (SELECT row_id FROM fold_rows WHERE target != row_id)''')
+    c.execute('''UPDATE OR IGNORE article_tags SET article_id=(SELECT cast(target as text) FROM fold_rows WHERE cast(row_id as text) = article_tags.article_id)
+                 WHERE article_id IN (SELECT cast(row_id as text) FROM fold_rows WHERE target != row_id)''')
+    c.execute("DELETE FROM article_tags WHERE article_id IN (SELECT cast(row_id as text) FROM fold_rows WHERE target != row_id)")
+    c.execute("DELETE FROM summary_jobs WHERE mention_id IN (SELECT row_id FROM fold_rows WHERE target != row_id)")
+    c.execute("DELETE FROM minhash_bands WHERE mention_id IN (SELECT row_id FROM fold_rows WHERE target != row_id)")
+    c.execute("DELETE FROM mentions WHERE id IN (SELECT row_id FROM fold_rows WHERE target != row_id)")
+    c.execute("DROP TABLE fold_rows")
+
+@migration(8, "mention_rollup_hourly")
+def _m008_mention_rollup_hourly(c):
+    # 按 (客户, 小时, 信源) 预聚合的计数，client_id='' 为全局内容；口径与维护方式见 radar_rollup
+    c.execute('''CREATE TABLE IF NOT EXISTS mention_rollup_hourly
+                 (client_id VARCHAR(64) NOT NULL,
+                  source TEXT NOT NULL,
+                  hour INTEGER NOT NULL,
+                  total INTEGER DEFAULT 0,
+                  pos INTEGER DEFAULT 0,
+                  neg INTEGER DEFAULT 0,
+                  neu INTEGER DEFAULT 0,
+                  risk2 INTEGER DEFAULT 0,
+                  risk3 INTEGER DEFAULT 0,
+                  PRIMARY KEY (client_id, hour, source)) WITHOUT ROWID''')
+    # 已有数据的回灌见第 9 版 (回灌时同时写入全量累计表)
+
+@migration(9, "client_rollup_totals")
+def _m009_client_rollup_totals(c):
+    # 每个客户的全量累计 (与小时汇总表同口径)，客户列表的全量情感分布读这里
+    c.execute('''CREATE TABLE IF NOT EXISTS mention_rollup_totals
+                 (client_id VARCHAR(64) PRIMARY KEY,
+                  total INTEGER DEFAULT 0,
+                  pos INTEGER DEFAULT 0,
+                  neg INTEGER DEFAULT 0,
+                  neu INTEGER DEFAULT 0,
+                  risk2 INTEGER DEFAULT 0,
+                  risk3 INTEGER DEFAULT 0) WITHOUT ROWID''')
+    # 已有数据一次性回灌 (小时汇总表一并重算)
+    from radar_rollup import fill_rollup
+    fill_rollup(c)
+    # 客户列表：全部客户最近 7 天的趋势按小时区间读取 (覆盖索引)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_rollup_hour ON mention_rollup_hourly(hour, client_id, total)")
+
+@migration(10, "data_generations")
+def _m010_data_generations(c):
+    # 每个客户的数据代数 ('' 为全局内容)，统计结果可能变化的写入 +1；看板响应缓存与 ETag 据此判断是否失效
+    c.execute('''CREATE TABLE IF NOT EXISTS data_generations
+                 (client_id VARCHAR(64) PRIMARY KEY,
+                  generation INTEGER DEFAULT 0) WITHOUT ROWID''')
+
+@migration(11, "opinion_clusters")
+def _m011_opinion_clusters(c):
+    # 负面观点聚类 (看板「用户槽点」)，入库时增量维护，见 radar_opinion
+    c.execute('''CREATE TABLE IF NOT EXISTS opinion_clusters
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  client_id VARCHAR(64) NOT NULL,
+                  label TEXT,
+                  centroid JSON,
+                  size INTEGER DEFAULT 0,
+                  first_seen REAL,
+                  last_seen REAL)''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_opinion_clusters_client ON opinion_clusters(client_id, last_seen)")
+    c.execute('''CREATE TABLE IF NOT EXISTS opinion_cluster_members
+                 (mention_id INTEGER NOT NULL,
+                  client_id VARCHAR(64) NOT NULL,
+                  cluster_id INTEGER,
+                  similarity REAL,
+                  PRIMARY KEY (mention_id, client_id)) WITHOUT ROWID''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_opinion_members_cluster ON opinion_cluster_members(cluster_id)")
+    # 字符 n-gram 的文档频率，term='' 一行记录文档总数
+    c.execute('''CREATE TABLE IF NOT EXISTS opinion_terms
+                 (term TEXT PRIMARY KEY,
+                  df INTEGER DEFAULT 0) WITHOUT ROWID''')
+
+@migration(12, "spam_scores")
+def _m012_spam_scores(c):
+    # 入库时的垃圾广告打分 (见 radar_spam)；存量内容为 NULL，由 python radar_spam.py backfill 补齐
+    add_column(c, "mentions", "spam_score", "REAL")
+    add_column(c, "mentions", "is_spam", "INTEGER DEFAULT 0")
+    # 质检统计的垃圾计数只读索引；内容库按 is_spam 过滤
+    c.execute("CREATE INDEX IF NOT EXISTS idx_mentions_spam ON mentions(client_id, is_spam, publish_time, clean_status)")
+
+@migration(13, "mentions_fts")
+def _m013_mentions_fts(c):
+    # 内容库全文检索 (trigram)，由触发器同步；建表时从 mentions 重建索引，见 radar_search
+    from radar_search import create_fts
+    create_fts(c, "mentions", "mentions_fts", ["title", "content_text", "ai_fact", "event_title"])
+
+@migration(14, "article_tags_mention_id")
+def _m014_article_tags_mention_id(c):
+    # 内容库按整数 mention_id 取当前页的标签，不再用 cast(m.id as text) 关联字符串 article_id
+    add_column(c, "article_tags", "mention_id", "INTEGER")
+    c.execute('''UPDATE article_tags SET mention_id = CAST(article_id AS INTEGER)
+                 WHERE mention_id IS NULL AND article_id != '' AND article_id NOT GLOB '*[^0-9]*' ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_article_tags_mention ON article_tags(mention_id, tag_id)")
+
+@migration(15, "content_scores")
+def _m015_content_scores(c):
+    # 入库时计算的热度 (按参考时刻衰减) 与质量分，内容库按其排序，见 radar_scores
+    add_column(c, "mentions", "hotness", "REAL DEFAULT 0")
+    c.execute('''CREATE TABLE IF NOT EXISTS score_state
+                 (name TEXT PRIMARY KEY,
+                  value REAL) WITHOUT ROWID''')
+    from radar_scores import recompute_hotness, fill_quality
+    recompute_hotness(c, time.time())
+    fill_quality(c)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_mentions_hotness ON mentions(hotness)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_mentions_quality ON mentions(quality_score)")
+
+@migration(16, "saved_searches")
+def _m016_saved_searches(c):
+    # 用户保存的检索条件与已看过的最新内容 (seen_created_at, seen_id)，增量查询只取 id > seen_id 的内容
+    c.execute('''CREATE TABLE IF NOT EXISTS saved_searches
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  user_id VARCHAR(64) NOT NULL,
+                  name TEXT,
+                  filter JSON,
+                  seen_created_at REAL,
+                  seen_id INTEGER DEFAULT 0,
+                  created_at REAL,
+                  seen_at REAL)''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_saved_searches_user ON saved_searches(user_id, created_at)")
+
+@migration(17, "global_rollup_risk")
+def _m017_global_rollup_risk(c):
+    # 全局汇总的风险计数改取各客户命中中最高的风险等级 (全局内容本身不评估风险)，按新口径重算
+    from radar_rollup import fill_rollup
+    fill_rollup(c)
+
+# ==========================================
+# 3. 执行器
+# ==========================================
+def run_migrations(db_file=None):
+    """执行尚未应用的迁移，返回本次执行的版本号列表；同一进程内对同一数据库只检查一次"""
+    db_file = db_file or DB_FILE
+    key = os.path.abspath(db_file)
+    if key in _migrated:
+        return []
+    with _lock:
+        if key in _migrated:
+            return []
+        conn = sqlite3.connect(db_file, timeout=30.0, isolation_level=None)
+        c = conn.cursor()
+        applied_now = []
+        try:
+            c.execute('''CREATE TABLE IF NOT EXISTS schema_migrations
+                         (version INTEGER PRIMARY KEY,
+                          name TEXT,
+                          applied_at REAL)''')
+            for version, name, fn in sorted(MIGRATIONS):
+                # 每个版本单独加写锁并复查，其他进程可能已经执行过
+                c.execute("BEGIN IMMEDIATE")
+                try:
+                    c.execute("SELECT 1 FROM schema_migrations WHERE version=?", (version,))
+                    if c.fetchone():
+                        c.execute("COMMIT")
+                        continue
+                    fn(c)
+                    c.execute("INSERT INTO schema_migrations (version, name, applied_at) VALUES (?,?,?)",
+                              (version, name, time.time()))
+                    c.execute("COMMIT")
+                    applied_now.append(version)
+                except Exception:
+                    c.execute("ROLLBACK")
+                    raise
+        finally:
+            conn.close()
+        if applied_now:
+            print(f"[migrations] applied {applied_now} on {db_file}")
+        _migrated.add(key)
+        return applied_now
+
+def get_migration_status(db_file=None):
+    conn = sqlite3.connect(db_file or DB_FILE)
+    c = conn.cursor()
+    applied = {}
+    if table_exists(c, "schema_migrations"):
+        c.execute("SELECT version, applied_at FROM schema_migrations")
+        applied = dict(c.fetchall())
+    conn.close()
+    return [{"version": v, "name": n, "applied_at": applied.get(v)} for v, n, _ in sorted(MIGRATIONS)]
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "status":
+        for m in get_migration_status():
+            state = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(m["applied_at"])) if m["applied_at"] else "pending"
+            print(f"{m['version']:>4}  {m['name']:<28} {state}")
+    else:
+        print(run_migrations())
@@ -2,123 +2,37 @@ import sqlite3
 import json
 import time
 import random
-import re
 import hashlib
-from datetime import datetime, timedelta
-from ai_engine import generate_news_summary
+import os
+from radar_matcher import RULE_CACHE
+from radar_jobs import enqueue_pending_summaries
+from radar_sentiment import score_sentiment, score_sentiments
+from radar_dedup import NearDupIndex, DEDUP_WINDOW_SECONDS
+from radar_migrations import run_migrations
+from radar_rollup import rollup_globals, rollup_matches, rollup_mentions, bump_generations, floor_hour, ROLLUP_HOUR, GLOBAL_KEY
+from radar_cache import RESPONSE_CACHE, make_etag, etag_matches
+from radar_opinion import is_opinion, assign_opinions, remove_opinions, top_opinion_clusters
+from radar_forecast import FORECASTS
+from radar_spam import score_spam, is_spam
+from radar_search import fts_phrase, bm25, highlight, snippet, MENTION_WEIGHTS
+from radar_pagination import decode_cursor, keyset_after, next_cursor
+from radar_scores import get_source_weight, hotness_base, stored_hotness, hotness_ref, decay_factor, RISK_SQL, HOTNESS_WINDOW
+from radar_scores import quality_score as score_quality
 
 DB_FILE = "radar_data.db"
 
+# 客户维度的内容：mention_matches 中的命中 (命中时间、该客户的风险等级与情感) + 全局内容的标题 / 来源等，
+# 列名与原先的客户行一致。只用到命中表字段的计数查询，LEFT JOIN 会被 SQLite 省略，只走命中表的覆盖索引
+CLIENT_MENTIONS = """(SELECT mm.mention_id AS id, mm.client_id, mm.publish_time, mm.risk_level, mm.sentiment AS sentiment_score,
+                             mm.match_detail, m.title, m.source, m.url
+                      FROM mention_matches mm LEFT JOIN mentions m ON m.id = mm.mention_id)"""
+
 # ==========================================
 # 1. 数据库初始化
 # ==========================================
 def init_monitor_db():
-    conn = sqlite3.connect(DB_FILE, timeout=30.0)
-    c = conn.cursor()
-    
-    # 客户配置表
-    c.execute('''CREATE TABLE IF NOT EXISTS client_config
-                 (client_id VARCHAR(64) PRIMARY KEY,
-                  name VARCHAR(100),
-                  industry VARCHAR(50), 
-                  status INTEGER DEFAULT 1,
-                  monitor_logic JSON,
-                  risk_sensitivity FLOAT DEFAULT 1.0,
-                  alert_webhook VARCHAR(255),
-                  competitors JSON)''')
-                  
-    # 自动迁移旧表结构
-    try: c.execute("ALTER TABLE client_config ADD COLUMN industry VARCHAR(50)")
-    except: pass 
-    try: c.execute("ALTER TABLE client_config ADD COLUMN status INTEGER DEFAULT 1")
-    except: pass
-
-    # 舆情数据表
-    c.execute('''CREATE TABLE IF NOT EXISTS mentions
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  client_id VARCHAR(64),
-                  source TEXT,
-                  title TEXT,
-                  content_text TEXT,
-                  url TEXT,
-                  publish_time REAL,
-                  sentiment_score REAL,
-                  risk_level INTEGER,
-                  match_detail JSON,
-                  clean_status VARCHAR(20) DEFAULT 'uncleaned',
-                  manual_category VARCHAR(50),
-                  manual_sentiment VARCHAR(20),
-                  is_archived INTEGER DEFAULT 0,
-                  ai_fact TEXT,
-                  ai_angle TEXT,
-                  content_hash VARCHAR(64),
-                  is_duplicate INTEGER DEFAULT 0,
-                  FOREIGN KEY(client_id) REFERENCES client_config(client_id))''')
-    
-    # 自动迁移新字段
-    try: c.execute("ALTER TABLE mentions ADD COLUMN clean_status VARCHAR(20) DEFAULT 'uncleaned'")
-    except: pass
-    try: c.execute("ALTER TABLE mentions ADD COLUMN manual_category VARCHAR(50)")
-    except: pass
-    try: c.execute("ALTER TABLE mentions ADD COLUMN manual_sentiment VARCHAR(20)")
-    except: pass
-    try: c.execute("ALTER TABLE mentions ADD COLUMN is_archived INTEGER DEFAULT 0")
-    except: pass
-    try: c.execute("ALTER TABLE mentions ADD COLUMN ai_fact TEXT")
-    except: pass
-    try: c.execute("ALTER TABLE mentions ADD COLUMN ai_angle TEXT")
-    except: pass
-    try: c.execute("ALTER TABLE mentions ADD COLUMN manual_tags TEXT")
-    except: pass
-    try: c.execute("ALTER TABLE mentions ADD COLUMN content_hash VARCHAR(64)")
-    except: pass
-    try: c.execute("ALTER TABLE mentions ADD COLUMN is_duplicate INTEGER DEFAULT 0")
-    except: pass
-
-    # 黑名单表
-    c.execute('''CREATE TABLE IF NOT EXISTS source_blacklist
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  source_name TEXT UNIQUE,
-                  source_type VARCHAR(20),
-                  reason TEXT,
-                  created_at REAL,
-                  created_by VARCHAR(100))''')
-    
-    # 内容库表（按客户分类）
-    c.execute('''CREATE TABLE IF NOT EXISTS content_library
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  mention_id INTEGER,
-                  client_id VARCHAR(64),
-                  assigned_category VARCHAR(50),
-                  assigned_by VARCHAR(100),
-                  assigned_at REAL,
-                  FOREIGN KEY(mention_id) REFERENCES mentions(id),
-                  FOREIGN KEY(client_id) REFERENCES client_config(client_id))''')
-
-    # 我的选题表 (User Topics)
-    c.execute('''CREATE TABLE IF NOT EXISTS user_topics
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  user_id VARCHAR(64),
-                  topic TEXT,
-                  source VARCHAR(50), 
-                  created_at REAL,
-                  status INTEGER DEFAULT 1,
-                  notes TEXT)''')
-
-    # === 3. 新增字段迁移 ===
-    try: c.execute("ALTER TABLE mentions ADD COLUMN event_title TEXT")
-    except: pass
-    try: c.execute("ALTER TABLE mentions ADD COLUMN primary_tag VARCHAR(50)")
-    except: pass
-    try: c.execute("ALTER TABLE mentions ADD COLUMN secondary_tag VARCHAR(50)")
-    except: pass
-    try: c.execute("ALTER TABLE mentions ADD COLUMN quality_score INTEGER DEFAULT 0")
-    except: pass
-    try: c.execute("ALTER TABLE mentions ADD COLUMN created_at REAL")
-    except: pass
-        
-    conn.commit()
-    conn.close()
+    """表结构由 radar_migrations 统一维护 (含舆情、摘要任务、近重复分桶等全部版本)"""
+    run_migrations()
 
 init_monitor_db()
 
@@ -126,61 +40,7 @@ init_monitor_db()
 # 2. 核心逻辑工具函数
 # ==========================================
 
-def get_source_weight(source_name):
-    if source_name in ["微博热搜", "央视新闻", "人民日报", "财联社"]: return 100
-    if source_name in ["36氪", "虎嗅", "钛媒体", "头条号"]: return 80
-    return 50
-
-def calculate_distance(text, word1, word2):
-    if word1 not in text or word2 not in text: return float('inf')
-    indices1 = [m.start() for m in re.finditer(re.escape(word1), text)]
-    indices2 = [m.start() for m in re.finditer(re.escape(word2), text)]
-    min_dist = float('inf')
-    for i1 in indices1:
-        for i2 in indices2:
-            dist = abs(i1 - i2)
-            if dist < min_dist: min_dist = dist
-    return min_dist
-
-def check_advanced_rule(text, rule):
-    for word in rule.get('must_contain', []):
-        if word not in text: return False, None
-    limit_dist = rule.get('distance', 50)
-    hit_details = []
-    for root_word in rule.get('must_contain', []):
-        for near_word in rule.get('nearby_words', []):
-            dist = calculate_distance(text, root_word, near_word)
-            if dist <= limit_dist:
-                hit_details.append(f"{root_word}..({dist}字)..{near_word}")
-    if not hit_details: return False, None
-    return True, hit_details
-
-def match_client_logic(text, logic_config):
-    logic = logic_config if isinstance(logic_config, dict) else json.loads(logic_config)
-    for excl in logic.get('exclude_keywords', []):
-        if excl and excl in text: return None
-    matched_brand = None
-    for brand in logic.get('brand_keywords', []):
-        if brand and brand in text:
-            matched_brand = brand
-            break
-    advanced_hit_info = None
-    for rule in logic.get('advanced_rules', []):
-        is_hit, hit_details = check_advanced_rule(text, rule)
-        if is_hit:
-            advanced_hit_info = {
-                "rule_name": rule['rule_name'],
-                "risk_level": rule.get('risk_level', 3),
-                "details": hit_details
-            }
-            break
-    if matched_brand or advanced_hit_info:
-        return {
-            "type": "advanced" if advanced_hit_info else "brand",
-            "matched_keyword": matched_brand,
-            "advanced_detail": advanced_hit_info
-        }
-    return None
+# 来源权重见 radar_scores.get_source_weight
 
 def analyze_risk(text, match_result, source_weight, sentiment_score):
     if match_result.get('advanced_detail'):
@@ -204,33 +64,20 @@ def analyze_risk(text, match_result, source_weight, sentiment_score):
 
 # [1] 处理爬虫数据 (main.py 需要这个!)
 def process_monitor_data(raw_items):
+    """
+    批量入库：整批内容一次性完成 URL / 内容指纹 / 近重复 (MinHash LSH) 查重，
+    每条内容只写一行全局记录，客户命中写入 mention_matches (指向全局记录)，全部在同一个事务内提交。
+    返回 {"processed": 新增全局条数, "alerts": 风险预警列表}
+    """
     conn = sqlite3.connect(DB_FILE, timeout=30.0)
     c = conn.cursor()
-    c.execute("SELECT client_id, monitor_logic, name FROM client_config WHERE status=1")
-    clients = c.fetchall()
+    # 所有客户的关键词编译进同一个自动机 (按配置版本号缓存，配置未变时不读取 client_config)
+    matcher = RULE_CACHE.get_matcher(c, os.path.abspath(DB_FILE))
     processed_count = 0
     alerts = []
-    
-    def calculate_sentiment_simple(text):
-        score = 0.0 # Default Neutral
-        
-        # Negative Keywords
-        neg_keywords = ["起火", "自燃", "冒烟", "爆炸", "维权", "造假", "破产", "去世", "调查", "暴雷", "事故", "缺陷", "投诉", "致歉", "翻车"]
-        for kw in neg_keywords:
-            if kw in text:
-                # Simple negation check
-                if re.search(f"[不没无非].{{0,2}}{kw}", text):
-                    continue 
-                score -= 0.5
-                
-        # Positive Keywords
-        pos_keywords = ["遥遥领先", "大涨", "突破", "创新", "第一", "首发", "获赞", "好评"]
-        for kw in pos_keywords:
-             if kw in text:
-                 score += 0.3
-                 
-        return max(-1.0, min(1.0, score))
 
+    # 1. 逐条预处理 (情感 / 指纹)，这一步不访问数据库，也不调用大模型
+    prepared = []
     for item in raw_items:
         # Handle summary (could be dict from enriched AI, or str)
         summary_val = item.get('summary')
@@ -244,114 +91,222 @@ def process_monitor_data(raw_items):
              summary_text = ai_fact
         elif isinstance(summary_val, str):
              summary_text = summary_val
-        
+
         text = item['title'] + " " + summary_text
-        
+
         # 🟢 获取正文 (如果有)
         full_content = item.get('full_content', '')
-        # 如果有抓取到正文，则入库正文，否则入库摘要
-        db_content = full_content if len(full_content) > 50 else text
 
-        source = item['source']
-        url = item.get('url', '')
-        weight = get_source_weight(source)
-        sentiment = calculate_sentiment_simple(text)
-        
-        # If AI summary wasn't pre-generated, generate it now
-        if not ai_fact and not ai_angle:
-            ai_data = generate_news_summary(item['title'], text)
-            ai_fact = ai_data.get('fact', '')
-            ai_angle = ai_data.get('angle', '')
-        
-        # 计算内容指纹 (Title + Summary)
-        content_hash = hashlib.md5(text.encode('utf-8')).hexdigest()
+        prepared.append({
+            "item": item,
+            "text": text,
+            # 如果有抓取到正文，则入库正文，否则入库摘要
+            "db_content": full_content if len(full_content) > 50 else text,
+            "source": item['source'],
+            "url": item.get('url', ''),
+            "weight": get_source_weight(item['source']),
+            "ai_fact": ai_fact,
+            "ai_angle": ai_angle,
+            # 没有预生成的 AI 摘要：先入库，由摘要任务队列异步补齐
+            "summary_status": None if (ai_fact or ai_angle) else 'pending',
+            # 计算内容指纹 (Title + Summary)
+            "content_hash": hashlib.md5(text.encode('utf-8')).hexdigest()
+        })
+        prepared[-1]['spam_score'] = score_spam(item['title'], prepared[-1]['db_content'])
 
-        # Check Duplicate Logic
-        c.execute("SELECT id, is_duplicate FROM mentions WHERE client_id IS NULL AND url=?", (url,))
-        existing_url_row = c.fetchone()
-        
+    # 情感分整批计算 (共享的预编译词典，每条文本只扫描一次)
+    for p, score in zip(prepared, score_sentiments([p['text'] for p in prepared])):
+        p['sentiment'] = score
+
+    # 2. 整批查重：本批 URL / 指纹写入临时表，各用一次查询取回库中已存在的记录
+    c.execute("CREATE TEMP TABLE IF NOT EXISTS ingest_keys (url TEXT, content_hash TEXT)")
+    c.execute("DELETE FROM ingest_keys")
+    c.executemany("INSERT INTO ingest_keys (url, content_hash) VALUES (?,?)",
+                  [(p['url'], p['content_hash']) for p in prepared])
+
+    # 同一 URL 有多条时以最早入库的为准 (与逐条 fetchone 的结果一致)
+    c.execute("""SELECT url, is_duplicate, ai_fact, ai_angle, summary_status FROM mentions
+                 WHERE client_id IS NULL AND url IN (SELECT url FROM ingest_keys)
+                 ORDER BY id DESC""")
+    global_urls = {r[0]: r[1:] for r in c.fetchall()}
+
+    c.execute("""SELECT DISTINCT content_hash FROM mentions
+                 WHERE client_id IS NULL AND is_duplicate=0
+                 AND content_hash IN (SELECT content_hash FROM ingest_keys)""")
+    original_hashes = {r[0] for r in c.fetchall()}
+
+    c.execute("""SELECT mm.client_id, m.url FROM mention_matches mm JOIN mentions m ON m.id = mm.mention_id
+                 WHERE m.client_id IS NULL AND m.url IN (SELECT url FROM ingest_keys)""")
+    client_urls = set(c.fetchall())
+
+    # 近重复候选：整批标题的 LSH 分桶键一次查询取回 (最近 7 天内的全局内容)
+    now = time.time()
+    ref = hotness_ref(c)
+    dedup = NearDupIndex(c, [None if p['url'] in global_urls else p['item']['title'] for p in prepared],
+                         now - DEDUP_WINDOW_SECONDS)
+
+    # 3. 内存中完成判重与客户匹配，批内重复按先后顺序处理
+    global_rows = []
+    new_globals = []
+    match_rows = []
+    match_titles = []
+    for i, p in enumerate(prepared):
+        item, text, url = p['item'], p['text'], p['url']
+
+        existing_url = url in global_urls
         is_dup = 0
-        if existing_url_row:
-             is_dup = existing_url_row[1]
-        else:
-             c.execute("SELECT id FROM mentions WHERE client_id IS NULL AND content_hash=? AND is_duplicate=0", (content_hash,))
-             if c.fetchone():
-                 is_dup = 1 
-        
+        if existing_url:
+             is_dup = global_urls[url][0]
+        elif p['content_hash'] in original_hashes:
+             is_dup = 1
+
+        if not existing_url:
+            # 近重复 (改字转载 / 换来源后缀)：归入已有的重复簇，簇代表已有摘要时直接沿用
+            near = dedup.find(i)
+            if near is not None:
+                is_dup = 1
+                if p['summary_status'] == 'pending' and (near['ai_fact'] or near['ai_angle']):
+                    p['ai_fact'], p['ai_angle'], p['summary_status'] = near['ai_fact'], near['ai_angle'], near['summary_status']
+            p['near'] = near
+            dedup.add(i, p)
+
         item['is_duplicate'] = is_dup
 
-        if not existing_url_row:
+        # 根据客户监控逻辑保存到特定客户：一次扫描得到所有命中客户
+        # 使用 标题+摘要 进行匹配 (效率较高且通常足够)
+        max_risk = 0
+        for c_id, c_name, match_res in matcher.match(text):
+            if (c_id, url) in client_urls: continue
+            client_urls.add((c_id, url))
+
+            risk_level, reason = analyze_risk(text, match_res, p['weight'], p['sentiment'])
+            max_risk = max(max_risk, risk_level)
+
+            # FORCE SENTIMENT IF RISK LEVEL (CONFIG DRIVEN)
+            final_sentiment = p['sentiment']
+            if risk_level >= 2:
+                final_sentiment = -0.6 # Force negative
+            elif risk_level == 1:
+                final_sentiment = 0.6 # Force positive
+
+            match_rows.append((url, c_id, risk_level, final_sentiment,
+                               json.dumps({"reason": reason, "match_info": match_res}, ensure_ascii=False), now))
+            match_titles.append(item['title'])
+            # 每条命中单独评估预警：近重复判定可能把不同事件归入同一簇，重复内容也照常预警，并标明是否为重复
+            if risk_level >= 2:
+                alerts.append({"client": c_name, "level": risk_level, "title": item['title'], "reason": reason,
+                               "duplicate": bool(is_dup)})
+
+        if not existing_url:
             risk_level_global = 0  # 全局库中的内容不评估风险等级
-            c.execute('''INSERT INTO mentions 
-                          (client_id, source, title, content_text, url, publish_time, 
-                           sentiment_score, risk_level, match_detail, clean_status, ai_fact, ai_angle, content_hash, is_duplicate)
-                          VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)''',
-                       (None, source, item['title'], db_content, url, time.time(),
-                        sentiment, risk_level_global, json.dumps({"source": source}, ensure_ascii=False), 'uncleaned', ai_fact, ai_angle, content_hash, is_dup))
+            # 热度按各客户命中中最高的风险等级计，与衰减任务的重算口径一致 (radar_scores)
+            hotness = stored_hotness(hotness_base(max_risk, p['source'], p['sentiment']), now, ref)
+            quality = score_quality(len(p['db_content']), item['title'], p['source'], p['spam_score'])
+            global_rows.append((None, p['source'], item['title'], p['db_content'], url, now,
+                                p['sentiment'], risk_level_global, json.dumps({"source": p['source']}, ensure_ascii=False),
+                                'uncleaned', p['ai_fact'], p['ai_angle'], p['content_hash'], is_dup, p['summary_status'],
+                                p['spam_score'], is_spam(p['spam_score']), hotness, quality, now))
+            global_urls[url] = (is_dup, p['ai_fact'], p['ai_angle'], p['summary_status'])
+            new_globals.append((i, p))
+            if not is_dup:
+                original_hashes.add(p['content_hash'])
             processed_count += 1
-        
-        # 再根据客户监控逻辑保存到特定客户（现有逻辑）
-        for client_row in clients:
-            c_id, c_logic_str, c_name = client_row
-            try: c_logic = json.loads(c_logic_str) if isinstance(c_logic_str, str) else c_logic_str
-            except: continue
-            
-            # 使用 标题+摘要 进行匹配 (效率较高且通常足够)
-            match_res = match_client_logic(text, c_logic)
-            if match_res:
-                c.execute("SELECT id FROM mentions WHERE client_id=? AND url=?", (c_id, url))
-                if c.fetchone(): continue 
-                
-                risk_level, reason = analyze_risk(text, match_res, weight, sentiment)
-                
-                # FORCE SENTIMENT IF RISK LEVEL (CONFIG DRIVEN)
-                final_sentiment = sentiment
-                if risk_level >= 2:
-                    final_sentiment = -0.6 # Force negative
-                elif risk_level == 1:
-                    final_sentiment = 0.6 # Force positive
-                
-                c.execute('''INSERT INTO mentions 
-                             (client_id, source, title, content_text, url, publish_time, 
-                              sentiment_score, risk_level, match_detail, ai_fact, ai_angle)
-                             VALUES (?,?,?,?,?,?,?,?,?,?,?)''',
-                          (c_id, source, item['title'], db_content, url, time.time(),
-                           final_sentiment, risk_level, json.dumps({"reason": reason, "match_info": match_res}, ensure_ascii=False), ai_fact, ai_angle))
-                if risk_level >= 2:
-                    alerts.append({"client": c_name, "level": risk_level, "title": item['title'], "reason": reason})
+
+    # 4. 同一事务内批量写入
+    c.executemany('''INSERT INTO mentions
+                      (client_id, source, title, content_text, url, publish_time,
+                       sentiment_score, risk_level, match_detail, clean_status, ai_fact, ai_angle, content_hash, is_duplicate, summary_status,
+                       spam_score, is_spam, hotness, quality_score, created_at)
+                      VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)''', global_rows)
+    if new_globals or match_rows:
+        # 全局内容的 id 按 URL 取回 (同一 URL 有多条时以最早的为准)，写入重复簇、分桶键与客户命中
+        c.execute("SELECT url, id FROM mentions WHERE client_id IS NULL AND url IN (SELECT url FROM ingest_keys) ORDER BY id DESC")
+        url_ids = dict(c.fetchall())
+        cluster_rows = []
+        band_rows = []
+        for i, p in new_globals:
+            mention_id = url_ids[p['url']]
+            p['cluster_id'] = p['near']['cluster_id'] if p['near'] is not None else mention_id
+            cluster_rows.append((p['cluster_id'], mention_id))
+            band_rows.extend(dedup.band_rows(i, mention_id))
+        c.executemany("UPDATE mentions SET cluster_id=? WHERE id=?", cluster_rows)
+        c.executemany("INSERT INTO minhash_bands (band_key, mention_id) VALUES (?,?)", band_rows)
+        match_rows = [(url_ids[r[0]],) + r[1:] for r in match_rows]
+        # 已有的全局内容新增了客户命中：全局风险等级取各命中中最高的，写入命中前先扣除其旧的贡献
+        new_ids = [r[1] for r in cluster_rows]
+        rematched = sorted({r[0] for r in match_rows} - set(new_ids))
+        rollup_globals(c, rematched, -1)
+        c.executemany('''INSERT OR IGNORE INTO mention_matches
+                         (mention_id, client_id, risk_level, sentiment, match_detail, publish_time)
+                         VALUES (?,?,?,?,?,?)''', match_rows)
+        # 小时汇总表：新增的全局内容与客户命中
+        rollup_globals(c, new_ids + rematched)
+        rollup_matches(c, [r[:2] for r in match_rows])
+        # 负面 / 高风险的新内容增量聚类 (全局看板与各客户看板的「用户槽点」)
+        assign_opinions(c, [(GLOBAL_KEY, url_ids[p['url']], p['item']['title'], now)
+                            for i, p in new_globals if is_opinion(0, p['sentiment'])] +
+                           [(r[1], r[0], title, now) for r, title in zip(match_rows, match_titles) if is_opinion(r[2], r[3])])
+    # 待摘要的内容在同一事务里登记摘要任务
+    enqueue_pending_summaries(c)
     conn.commit()
     conn.close()
     return {"processed": processed_count, "alerts": alerts}
 
 # [5] 获取实时监控统计 (Dashboard)
-def get_monitor_stats(client_id=None):
+def get_monitor_stats(client_id=None, now=None):
     conn = sqlite3.connect(DB_FILE)
     c = conn.cursor()
     
-    # 基础统计 (Top Cards)
-    now = time.time()
+    # 基础统计 (Top Cards)；所有时间窗口按整点对齐，同一小时内结果只随数据变化 (见 get_monitor_stats_cached)
+    now = now or time.time()
     day_seconds = 86400
     
-    # Client Filter Condition
+    # Client Filter Condition (客户维度读 mention_matches)
     base_filter = ""
     params = []
+    table = "mentions"
     if client_id:
+        table = CLIENT_MENTIONS
         base_filter = " AND client_id = ?"
         params.append(client_id)
         
-    c.execute(f"SELECT count(*) FROM mentions WHERE publish_time > ? {base_filter}", [now - day_seconds] + params)
-    today_count = c.fetchone()[0]
+    # 所有计数在一条语句里完成，读小时汇总表 (每个客户每小时每个信源一行)：
+    # 今日 = 最近 24 个整点小时 (含当前小时)，昨日为其前 24 小时；7 天趋势按自然日分段
+    rollup_key = client_id or GLOBAL_KEY
+    today_start = floor_hour(now) - day_seconds + ROLLUP_HOUR
+    trend_x = []
+    trend_ranges = []
+    for i in range(6, -1, -1):
+        t = now - i * day_seconds
+        trend_x.append(time.strftime("%m-%d", time.localtime(t)))
+        d_start = t - (t % day_seconds) # 00:00 (rough approx)
+        d_end = d_start + day_seconds   # 23:59
+        trend_ranges.append((d_start, d_end))
+    range_count = "(SELECT COALESCE(sum(total), 0) FROM mention_rollup_hourly WHERE client_id = ? AND hour >= ? AND hour < ?)"
+    range_params = [rollup_key, today_start - day_seconds, today_start]
+    for d_start, d_end in trend_ranges:
+        range_params += [rollup_key, d_start, d_end]
+    c.execute(f"""SELECT COALESCE(sum(total), 0), sum(risk2 + risk3), sum(pos), sum(neg), sum(neu),
+                         {", ".join([range_count] * (1 + len(trend_ranges)))}
+                  FROM mention_rollup_hourly WHERE client_id = ? AND hour >= ?""",
+              range_params + [rollup_key, today_start])
+    row = c.fetchone()
+    today_count, risk_count, pos, neg, neu = row[0], row[1] or 0, row[2] or 0, row[3] or 0, row[4] or 0
+    yesterday_count = row[5]
     
     # Yesterday for Prophet Velocity
-    c.execute(f"SELECT count(*) FROM mentions WHERE publish_time BETWEEN ? AND ? {base_filter}", [now - day_seconds * 2, now - day_seconds] + params)
-    yesterday_count = c.fetchone()[0]
-    
     velocity = today_count - yesterday_count
     velocity_display = f"{'+' if velocity > 0 else ''}{velocity}/d"
     
-    c.execute(f"SELECT count(*) FROM mentions WHERE risk_level >= 2 AND publish_time > ? {base_filter}", [now - day_seconds] + params)
-    risk_count = c.fetchone()[0]
-    
+    # 声量预测：按客户缓存的 Holt-Winters 状态，整点小时结束后才增量更新
+    forecast = FORECASTS.get((os.path.abspath(DB_FILE), rollup_key), c, rollup_key, now)
+    if forecast:
+        peak_day = "今日" if time.localtime(forecast["peak_hour"]).tm_yday == time.localtime(now).tm_yday else "明日"
+        peak_time = f"{peak_day} {time.strftime('%H:%M', time.localtime(forecast['peak_hour']))}"
+        prediction = f"预测 {forecast['ahead_hours']}小时内 约{forecast['ahead']}条 ({forecast['lower']}~{forecast['upper']})"
+    else:
+        peak_time, prediction = "-", "数据不足，暂无预测"
+
     # Level: 1-5 based on risk count
     level = 1
     if risk_count > 50: level = 5
@@ -360,56 +315,28 @@ def get_monitor_stats(client_id=None):
     elif risk_count > 5: level = 2
     
     # 图表数据 (Charts)
-    # 模拟 7 天趋势
-    trend = {"x": [], "y": []}
-    for i in range(6, -1, -1):
-        t = now - i * day_seconds
-        d_str = time.strftime("%m-%d", time.localtime(t))
-        trend["x"].append(d_str)
+    # 7 天趋势
+    trend = {"x": trend_x, "y": list(row[6:])}
         
-        # 实际查询每一天的数据量
-        d_start = t - (t % day_seconds) # 00:00 (rough approx)
-        d_end = d_start + day_seconds   # 23:59
-        
-        c.execute(f"SELECT count(*) FROM mentions WHERE publish_time BETWEEN ? AND ? {base_filter}", 
-                  [d_start, d_end] + params)
-        cnt = c.fetchone()[0]
-        trend["y"].append(cnt)
-        
-    # 情感分布
-    c.execute(f"SELECT count(*) FROM mentions WHERE sentiment_score > 0.3 {base_filter}", params)
-    pos = c.fetchone()[0]
-    c.execute(f"SELECT count(*) FROM mentions WHERE sentiment_score < -0.1 {base_filter}", params)
-    neg = c.fetchone()[0]
-    neu = today_count - pos - neg
-    if neu < 0: neu = 0
-    
+    # 情感分布 (与今日声量同一时间窗口，三者之和即今日声量)
     sentiment = {"pos": pos, "neg": neg, "neu": neu}
     
-    # Opinion Clusters (Simple Extraction)
-    c.execute(f"SELECT title FROM mentions WHERE (risk_level >= 2 OR sentiment_score < -0.3) AND publish_time > ? {base_filter} LIMIT 50", [now - day_seconds] + params)
-    neg_titles = [r[0] for r in c.fetchall()]
-    cluster_counter = {}
-    mock_keywords = ["价格", "电池", "续航", "服务", "质量", "发热", "卡顿", "闪退", "广告", "抄袭"]
-    for t in neg_titles:
-        for k in mock_keywords:
-            if k in t:
-                cluster_counter[k] = cluster_counter.get(k, 0) + 1
-    
-    top_clusters = sorted(cluster_counter.items(), key=lambda x: x[1], reverse=True)[:3]
+    # Opinion Clusters：入库时增量维护的负面观点簇，取今日窗口内活跃的最大几个
+    top_clusters = top_opinion_clusters(c, rollup_key, today_start)
     clusters_data = []
     total_relevant = sum([x[1] for x in top_clusters]) if top_clusters else 1
     colors = ["red", "orange", "green"]
-    for idx, (k, count) in enumerate(top_clusters):
+    for idx, (label, count) in enumerate(top_clusters):
          clusters_data.append({
-             "text": f"用户槽点-{k}",
+             "text": label,
+             "count": count,
              "percent": f"{int((count / total_relevant) * 100)}%",
              "val": int((count / total_relevant) * 100),
              "color": colors[idx % 3]
          })
     
     # 最新日志 (Logs)
-    c.execute(f"SELECT title, source, risk_level, publish_time, sentiment_score FROM mentions WHERE publish_time > ? {base_filter} ORDER BY publish_time DESC LIMIT 10", [now - day_seconds*7] + params)
+    c.execute(f"SELECT title, source, risk_level, publish_time, sentiment_score FROM {table} WHERE publish_time >= ? {base_filter} ORDER BY publish_time DESC LIMIT 10", [today_start - day_seconds*6] + params)
     logs = []
     for r in c.fetchall():
         logs.append({
@@ -429,8 +356,9 @@ def get_monitor_stats(client_id=None):
         "prophet": {
             "level": level,
             "velocity": velocity_display,
-            "peak_time": "今日 14:00", # Mock
-            "prediction": "预测 2小时后 传播达峰" # Mock
+            "peak_time": peak_time,
+            "prediction": prediction,
+            "forecast": forecast
         },
         "charts": {
             "trend": trend,
@@ -440,6 +368,14 @@ def get_monitor_stats(client_id=None):
         "logs": logs
     }
 
+# 客户配置全局版本号 +1，各进程的规则缓存据此重建
+def bump_config_version(cursor):
+    cursor.execute("UPDATE config_versions SET version = version + 1 WHERE name='client_config'")
+
+# 规则缓存命中统计：稳态入库应只有 hits 增长
+def get_rule_cache_stats():
+    return RULE_CACHE.stats()
+
 # [3] 保存客户配置
 def save_full_client_config(name, industry, status, logic_dict, client_id=None):
     conn = sqlite3.connect(DB_FILE, timeout=20)
@@ -470,14 +406,20 @@ def save_full_client_config(name, industry, status, logic_dict, client_id=None):
     
     if target_id:
         # Update existing
-        c.execute("UPDATE client_config SET name=?, industry=?, status=?, monitor_logic=? WHERE client_id=?", 
+        c.execute("UPDATE client_config SET name=?, industry=?, status=?, monitor_logic=?, config_version=config_version+1 WHERE client_id=?", 
                   (name, industry, status, logic_json, target_id))
         cid = target_id
     else:
         # Create new
         cid = f"CLI_{int(time.time())}_{random.randint(100,999)}"
-        c.execute("INSERT INTO client_config (client_id, name, industry, status, monitor_logic) VALUES (?,?,?,?,?)", 
+        # 同一秒内连续创建时避免随机后缀撞号
+        c.execute("SELECT 1 FROM client_config WHERE client_id=?", (cid,))
+        while c.fetchone():
+            cid = f"CLI_{int(time.time())}_{random.randint(100,999)}"
+            c.execute("SELECT 1 FROM client_config WHERE client_id=?", (cid,))
+        c.execute("INSERT INTO client_config (client_id, name, industry, status, monitor_logic, config_version) VALUES (?,?,?,?,?,1)", 
                   (cid, name, industry, status, logic_json))
+    bump_config_version(c)
                   
     conn.commit()
     conn.close()
@@ -488,50 +430,55 @@ def delete_client_by_id(client_id):
     conn = sqlite3.connect(DB_FILE)
     c = conn.cursor()
     c.execute("DELETE FROM client_config WHERE client_id=?", (client_id,))
-    c.execute("DELETE FROM mentions WHERE client_id=?", (client_id,))
+    # 全局汇总的风险计数取各客户命中中最高的，删除命中前后各维护一次这些内容的全局贡献
+    c.execute("SELECT mention_id FROM mention_matches WHERE client_id=?", (client_id,))
+    matched_ids = [r[0] for r in c.fetchall()]
+    rollup_globals(c, matched_ids, -1)
+    c.execute("DELETE FROM mention_matches WHERE client_id=?", (client_id,))
+    rollup_globals(c, matched_ids, 1)
+    c.execute("DELETE FROM mention_rollup_hourly WHERE client_id=?", (client_id,))
+    c.execute("DELETE FROM mention_rollup_totals WHERE client_id=?", (client_id,))
+    bump_generations(c, "SELECT ? AS client_id", (client_id,))
+    bump_config_version(c)
     conn.commit()
     conn.close()
     return {"status": "success"}
 
 # [5] 获取所有客户列表
-def get_all_clients():
+def get_all_clients(now=None):
     conn = sqlite3.connect(DB_FILE)
     c = conn.cursor()
     c.execute("SELECT client_id, name, monitor_logic, industry, status FROM client_config")
+    clients = c.fetchall()
     res = []
-    today_start = time.time() - 86400
-    res = []
-    
-    # Pre-fetch stats for efficiency (or just loop query for simplicity if volume low)
-    # Looping is fine for < 50 clients.
     
-    for row in c.fetchall():
+    # 所有客户的统计一次取回 (原先每个客户 1 条情感 + 7 条趋势查询)
+    # 1. Sentiment Distribution (All time, 全量累计表每个客户一行) — Pos: >0.3, Neg: <-0.1
+    c.execute("SELECT client_id, pos, neg, neu FROM mention_rollup_totals WHERE client_id != ?", (GLOBAL_KEY,))
+    sentiments = {r[0]: r[1:] for r in c.fetchall()}
+    
+    # 2. 7-Day Trend (每段 24 个整点小时，最后一段含当前小时)；按小时索引只读最近 7 天
+    end_hour = floor_hour(now or time.time()) + ROLLUP_HOUR
+    trend_start = end_hour - 7 * 86400
+    c.execute("""SELECT client_id, (hour - ?) / 86400 AS day, sum(total) FROM mention_rollup_hourly
+                 WHERE hour >= ? AND hour < ? AND client_id != ? GROUP BY client_id, day""",
+              (trend_start, trend_start, end_hour, GLOBAL_KEY))
+    trends = {}
+    for t_cid, day, cnt in c.fetchall():
+        trends.setdefault(t_cid, [0] * 7)[day] = cnt
+    
+    for row in clients:
         cid, cname, logic_str, industry, status = row
         try:
             logic = json.loads(logic_str)
         except:
             logic = {}
             
-        # 1. Sentiment Distribution (All time or last 30 days)
-        # Pos: >0.3, Neg: <-0.1
-        c.execute("SELECT count(*) FROM mentions WHERE client_id=? AND sentiment_score > 0.3", (cid,))
-        pos = c.fetchone()[0]
-        c.execute("SELECT count(*) FROM mentions WHERE client_id=? AND sentiment_score < -0.1", (cid,))
-        neg = c.fetchone()[0]
-        c.execute("SELECT count(*) FROM mentions WHERE client_id=? AND sentiment_score BETWEEN -0.1 AND 0.3", (cid,))
-        neu = c.fetchone()[0]
+        pos, neg, neu = sentiments.get(cid, (0, 0, 0))
+        trend_vals = trends.get(cid, [0] * 7)
         
         total_sent = pos + neg + neu
         if total_sent == 0: total_sent = 1
-        
-        # 2. 7-Day Trend
-        trend_vals = []
-        now = time.time()
-        for i in range(6, -1, -1):
-            t_start = now - (i+1) * 86400
-            t_end = now - i * 86400
-            c.execute("SELECT count(*) FROM mentions WHERE client_id=? AND publish_time BETWEEN ? AND ?", (cid, t_start, t_end))
-            trend_vals.append(c.fetchone()[0])
             
         res.append({
             "client_id": cid,
@@ -552,6 +499,42 @@ def get_all_clients():
     conn.close()
     return res
 
+# [5b] 看板 / 客户列表的缓存读取
+# 版本 = (整点时间桶, 数据代数)：同一小时内只要没有写入改变统计，多个编辑轮询同一看板都直接复用结果；
+# 返回 (etag, 结果)，客户端带来的 If-None-Match 仍然有效时结果为 None (对应 304)，连缓存也不用读
+def get_monitor_stats_cached(client_id=None, if_none_match=None):
+    conn = sqlite3.connect(DB_FILE)
+    c = conn.cursor()
+    c.execute("SELECT generation FROM data_generations WHERE client_id=?", (client_id or GLOBAL_KEY,))
+    row = c.fetchone()
+    conn.close()
+    now = time.time()
+    key = (os.path.abspath(DB_FILE), "monitor_stats", client_id or GLOBAL_KEY)
+    version = (floor_hour(now), row[0] if row else 0)
+    etag = make_etag(key, version)
+    if etag_matches(if_none_match, etag):
+        return etag, None
+    return etag, RESPONSE_CACHE.get(key, version, lambda: get_monitor_stats(client_id, now))
+
+def get_all_clients_cached(if_none_match=None):
+    conn = sqlite3.connect(DB_FILE)
+    c = conn.cursor()
+    # 客户增删改看全局配置版本号，各客户的数据变化看代数之和 (只增不减)
+    c.execute("""SELECT (SELECT version FROM config_versions WHERE name='client_config'),
+                        (SELECT COALESCE(sum(generation), 0) FROM data_generations WHERE client_id != ?)""", (GLOBAL_KEY,))
+    config_version, generations = c.fetchone()
+    conn.close()
+    now = time.time()
+    key = (os.path.abspath(DB_FILE), "all_clients", None)
+    version = (floor_hour(now), config_version, generations)
+    etag = make_etag(key, version)
+    if etag_matches(if_none_match, etag):
+        return etag, None
+    return etag, RESPONSE_CACHE.get(key, version, lambda: get_all_clients(now))
+
+def get_response_cache_stats():
+    return RESPONSE_CACHE.stats()
+
 # [6] 生成客户日报
 def generate_client_report(client_id):
     conn = sqlite3.connect(DB_FILE)
@@ -567,17 +550,15 @@ def generate_client_report(client_id):
     client_name = row[0]
     industry = row[1]
     
-    # 获取过去24小时数据
+    # 获取过去24小时数据 (声量与高危数读小时汇总表，最近 24 个整点小时)
     start_time = time.time() - 86400
-    c.execute("SELECT count(*) FROM mentions WHERE client_id=? AND publish_time > ?", (client_id, start_time))
-    total_count = c.fetchone()[0]
-    
-    c.execute("SELECT count(*) FROM mentions WHERE client_id=? AND risk_level >= 2 AND publish_time > ?", (client_id, start_time))
-    risk_count = c.fetchone()[0]
+    c.execute("SELECT COALESCE(sum(total), 0), COALESCE(sum(risk2 + risk3), 0) FROM mention_rollup_hourly WHERE client_id=? AND hour >= ?",
+              (client_id, floor_hour(start_time) + ROLLUP_HOUR))
+    total_count, risk_count = c.fetchone()
     
     # 获取Top 5 负面/高危
     alerts = []
-    c.execute("SELECT title, source, risk_level, match_detail FROM mentions WHERE client_id=? AND risk_level>=2 AND publish_time > ? ORDER BY risk_level DESC LIMIT 5", (client_id, start_time))
+    c.execute(f"SELECT title, source, risk_level, match_detail FROM {CLIENT_MENTIONS} WHERE client_id=? AND risk_level>=2 AND publish_time > ? ORDER BY risk_level DESC LIMIT 5", (client_id, start_time))
     for r in c.fetchall():
         try: reason = json.loads(r[3]).get('reason', '')
         except: reason = ''
@@ -608,58 +589,57 @@ def generate_client_report(client_id):
 # ==========================================
 
 # [7] 获取全网内容库列表（支持搜索、筛选）
-def get_global_content_library(search_text="", client_id=None, source_filter=None, sentiment_filter=None, 
-                                clean_status_filter=None, time_range="24h", page=1, page_size=20):
+LIBRARY_TIME_RANGES = {"1h": 3600, "24h": 86400, "7d": 604800}
+LIBRARY_FILTER_KEYS = ("search_text", "client_id", "source_filter", "sentiment_filter",
+                       "clean_status_filter", "time_range", "exclude_spam")
+
+def _library_filter(search_text="", client_id=None, source_filter=None, sentiment_filter=None,
+                    clean_status_filter=None, time_range="24h", exclude_spam=False, after_id=None):
     """
-    获取全网内容库，支持多维度筛选
-    client_id: 若指定，则只返回该客户关联的内容
-    time_range: "1h" / "24h" / "7d" / "all"
-    clean_status_filter: ["uncleaned", "cleaned", "discarded", "archived"]
-    sentiment_filter: ["positive", "negative", "neutral"]
-    source_filter: ["微博", "微信", "B站", "36氪"] 等
+    内容库筛选条件 (列表、计数、批量操作按筛选条件选取内容共用)
+    after_id: 只取 id 大于此值 (在其之后入库) 的内容，保存的检索的增量查询用
+    返回 {"from": FROM 子句, "where": WHERE 条件, "params": 参数, "fts": 全文检索短语或 None,
+          "time_col" / "score_col" / "risk_col" / "client_col": 按是否指定客户取自 mentions 或 mention_matches}
     """
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
     # 构建时间条件
-    time_map = {"1h": 3600, "24h": 86400, "7d": 604800}
-    time_seconds = time_map.get(time_range, 86400 * 365)
+    time_seconds = LIBRARY_TIME_RANGES.get(time_range, 86400 * 365)
     start_time = time.time() - time_seconds if time_range != "all" else 0
-    
-    # 基础查询
-    # Join with article_tags to get tags
-    # We use a subquery or direct join? Direct join with Group By might mess up pagination if not careful.
-    # Safe way: Select base items first (with limit), THEN fetch tags for them?
-    # OR: Join and Group By ID.
-    
-    # Let's use GROUP BY id to ensure unique items and agg tags
-    # Added new fields: event_title, quality_score, primary_tag, secondary_tag, created_at
-    base_cols = "m.id, m.client_id, m.source, m.title, m.content_text, m.url, m.publish_time, m.sentiment_score, m.risk_level, m.clean_status, m.manual_category, m.manual_sentiment, m.event_title, m.quality_score, m.primary_tag, m.secondary_tag, m.ai_fact, m.created_at"
-    
-    sql = f"""
-        SELECT {base_cols}, GROUP_CONCAT(t.name) as tag_names
-        FROM mentions m
-        LEFT JOIN article_tags at ON cast(m.id as text) = at.article_id
-        LEFT JOIN tags t ON at.tag_id = t.id
-        WHERE m.publish_time > ?
-    """
+
+    # 指定客户时通过 mention_matches 关联：命中时间、该客户的风险等级与情感取自命中记录
+    client_col, time_col, score_col, risk_col = "m.client_id", "m.publish_time", "m.sentiment_score", "m.risk_level"
+    from_sql = "mentions m"
+    if client_id:
+        client_col, time_col, score_col, risk_col = "mm.client_id", "mm.publish_time", "mm.sentiment", "mm.risk_level"
+        from_sql = "mention_matches mm JOIN mentions m ON m.id = mm.mention_id"
+
+    # 关键词检索走 trigram 全文索引 (mentions_fts)；不足 3 个字时退回 LIKE
+    fts_query = fts_phrase(search_text) if search_text else None
+    if fts_query:
+        from_sql += " JOIN mentions_fts ON mentions_fts.rowid = m.id"
+
+    # 增量查询时新内容只在 id 区间的末尾：时间条件加一元 + 使其不走时间索引，让查询沿主键
+    # (或命中记录的 mention_id) 区间只读新行，否则新内容很少时会沿时间索引扫完整个时间范围 (排序同理，见内容库列表)
+    where = [f"+{time_col} > ?" if after_id is not None else f"{time_col} > ?"]
     params = [start_time]
-    
+
     # Client ID 筛选
     if client_id:
-        sql += " AND m.client_id = ?"
+        where.append("mm.client_id = ?")
         params.append(client_id)
 
     # 搜索条件（全文检索）
-    if search_text:
-        sql += " AND (m.title LIKE ? OR m.content_text LIKE ?)"
+    if fts_query:
+        where.append("mentions_fts MATCH ?")
+        params.append(fts_query)
+    elif search_text:
+        where.append("(m.title LIKE ? OR m.content_text LIKE ?)")
         search_pattern = f"%{search_text}%"
         params.extend([search_pattern, search_pattern])
     
     # 来源筛选
     if source_filter and len(source_filter) > 0:
         placeholders = ",".join(["?" for _ in source_filter])
-        sql += f" AND m.source IN ({placeholders})"
+        where.append(f"m.source IN ({placeholders})")
         params.extend(source_filter)
     
     # 情感筛选
@@ -669,141 +649,214 @@ def get_global_content_library(search_text="", client_id=None, source_filter=Non
         else:
             sentiment_conditions = []
             if "positive" in sentiment_filter:
-                sentiment_conditions.append("m.sentiment_score > 0.3")
+                sentiment_conditions.append(f"{score_col} > 0.3")
             if "negative" in sentiment_filter:
-                sentiment_conditions.append("m.sentiment_score < -0.1")
+                sentiment_conditions.append(f"{score_col} < -0.1")
             if "neutral" in sentiment_filter:
-                sentiment_conditions.append("m.sentiment_score BETWEEN -0.1 AND 0.3")
+                sentiment_conditions.append(f"{score_col} BETWEEN -0.1 AND 0.3")
             if sentiment_conditions:
-                sql += " AND (" + " OR ".join(sentiment_conditions) + ")"
+                where.append("(" + " OR ".join(sentiment_conditions) + ")")
     
     # 清洗状态筛选
     if clean_status_filter and len(clean_status_filter) > 0:
         placeholders = ",".join(["?" for _ in clean_status_filter])
-        sql += f" AND m.clean_status IN ({placeholders})"
+        where.append(f"m.clean_status IN ({placeholders})")
         params.extend(clean_status_filter)
     else:
         # 默认不显示已废弃的
-        sql += " AND (m.clean_status != 'discarded' OR m.clean_status IS NULL)"
-    
-    # 不显示已归档的
-    sql += " AND m.is_archived = 0"
-    
-    # 不显示重复的
-    sql += " AND m.is_duplicate = 0"
+        where.append("(m.clean_status != 'discarded' OR m.clean_status IS NULL)")
     
-    # Group By ID to combine tags
-    sql += " GROUP BY m.id"
+    # 垃圾广告筛选
+    if exclude_spam:
+        where.append("m.is_spam = 0")
+
+    # 不显示已归档的、重复的
+    where.append("m.is_archived = 0")
+    where.append("m.is_duplicate = 0")
+    if after_id is not None:
+        where.append("mm.mention_id > ?" if client_id else "m.id > ?")
+        params.append(after_id)
+
+    return {"from": from_sql, "where": " AND ".join(where), "params": params, "fts": fts_query,
+            "time_col": time_col, "score_col": score_col, "risk_col": risk_col, "client_col": client_col}
+
+# 列表字段 -> (用到的查询列, 取值函数)；取值函数的参数为一行查询结果 (列名 -> 值，另含当前页标签 "tags")
+PREVIEW_CHARS = 100
+# 可选排序 -> 排序列 (各有索引)；时间排序用筛选条件里的时间列
+LIBRARY_SORTS = {"time": None, "hotness": "m.hotness", "quality": "m.quality_score"}
+
+def _sentiment_label(row):
+    sentiment = row["sentiment_score"] or 0
+    risk = row["risk_level"] or 0
+    return "负面" if risk >= 2 else ("正面" if risk == 1 else ("正面" if sentiment > 0.3 else ("负面" if sentiment < -0.1 else "中性")))
+
+def _time_display(t):
+    return time.strftime("%m-%d %H:%M", time.localtime(t))
+
+def _tag_at(row, column, index):
+    # 未设置主/次标签时取当前页标签
+    if row[column]:
+        return row[column]
+    return row["tags"][index] if len(row["tags"]) > index else row[column]
+
+LIBRARY_FIELDS = {
+    "id": (("id",), lambda r: r["id"]),
+    "client_id": (("client_id",), lambda r: r["client_id"]),
+    "source": (("source",), lambda r: r["source"]),
+    "article_title": (("title",), lambda r: r["title"]),
+    "event_title": (("event_title", "title"), lambda r: r["event_title"] or r["title"]),
+    "title": (("title",), lambda r: r["title"]),
+    "summary": (("ai_fact",), lambda r: r["ai_fact"]),
+    "content_text": (("content_text",), lambda r: r["content_text"]),
+    "content_preview": (("content_preview",), lambda r: r["content_preview"] or ""),
+    "title_highlight": (("title_highlight",), lambda r: r.get("title_highlight")),
+    "snippet": (("snippet",), lambda r: r.get("snippet")),
+    "url": (("url",), lambda r: r["url"]),
+    "publish_time": (("publish_time",), lambda r: r["publish_time"]),
+    "ingest_time": (("created_at",), lambda r: r["created_at"] or r["publish_time"]),
+    "ingest_time_display": (("created_at",), lambda r: _time_display(r["created_at"] or r["publish_time"])),
+    "time_display": (("publish_time",), lambda r: _time_display(r["publish_time"])),
+    "sentiment_score": (("sentiment_score",), lambda r: round(r["sentiment_score"] or 0, 2)),
+    "sentiment_label": (("sentiment_score", "risk_level"), _sentiment_label),
+    "risk_level": (("risk_level",), lambda r: r["risk_level"] or 0),
+    "quality_score": (("quality_score",), lambda r: r["quality_score"] or 0),
+    "spam_score": (("spam_score",), lambda r: r["spam_score"]),
+    "is_spam": (("spam_score",), lambda r: is_spam(r["spam_score"]) if r["spam_score"] is not None else 0),
+    "clean_status": (("clean_status",), lambda r: r["clean_status"] or "uncleaned"),
+    "manual_category": (("manual_category",), lambda r: r["manual_category"]),
+    "manual_sentiment": (("manual_sentiment",), lambda r: r["manual_sentiment"]),
+    "category": (("manual_category",), lambda r: r["manual_category"]),
+    "primary_tag": (("primary_tag", "tags"), lambda r: _tag_at(r, "primary_tag", 0)),
+    "secondary_tag": (("secondary_tag", "tags"), lambda r: _tag_at(r, "secondary_tag", 1)),
+    # 前端按数组处理：`Array.isArray(item.tags) ? ...`
+    "tags": (("tags",), lambda r: r["tags"]),
+    # 热度入库时计算并按参考时刻衰减存储 (radar_scores)，查询时已换算为当前热度
+    "hotness": (("hotness",), lambda r: round(r["hotness"] or 0, 0)),
+    "hotness_display": (("hotness",), lambda r: "🔥" * min(5, max(1, int((r["hotness"] or 0) / 1000)))),
+    # --- 看板信息流展示用的模拟字段 ---
+    "author_level": (("source",), lambda r: random.randint(3, 5) if "微博" in r["source"] or "36氪" in r["source"] else random.randint(1, 3)),
+    "author_verify": ((), lambda r: 1 if random.random() > 0.7 else 0),
+    "read_count": ((), lambda r: f"{random.randint(1, 400)/10.0:.1f}w"),
+    "comment_count": ((), lambda r: random.randint(10, 2000)),
+}
+
+def get_global_content_library(search_text="", client_id=None, source_filter=None, sentiment_filter=None, 
+                                clean_status_filter=None, time_range="24h", page=1, page_size=20, exclude_spam=False,
+                                cursor=None, fields=None, sort=None, after_id=None):
+    """
+    获取全网内容库，支持多维度筛选
+    client_id: 若指定，则只返回该客户关联的内容
+    time_range: "1h" / "24h" / "7d" / "all"
+    clean_status_filter: ["uncleaned", "cleaned", "discarded", "archived"]
+    sentiment_filter: ["positive", "negative", "neutral"]
+    source_filter: ["微博", "微信", "B站", "36氪"] 等
+    exclude_spam: 不显示入库时判为垃圾广告的内容
+    cursor: 游标分页 (见 radar_pagination)，传空字符串从第一页开始；传入时忽略 page，
+            始终按时间倒序 (检索也不按相关度排序)，不计算总数。两种方式都会在取满一页时返回 next_cursor
+    fields: 只返回这些字段 (LIBRARY_FIELDS 的键)，None 时返回全部；未知字段抛出 ValueError。
+            列表不需要正文时不要请求 content_text，正文按需通过 get_mention_by_id 获取
+    sort: "time" / "hotness" / "quality"，均为倒序并由对应的索引直接给出顺序；None 时按时间，检索时按相关度。
+          游标只能用于生成它的同一排序；热度衰减任务运行后 (每小时) 之前的热度游标位置会有偏差
+    after_id: 只返回在该 id 之后入库的内容 (见 get_saved_search_delta)
+    """
+    if sort is not None and sort not in LIBRARY_SORTS:
+        raise ValueError(f"未知排序: {sort}")
+    # 游标先解析，格式不对时直接抛出 InvalidCursor
+    position = decode_cursor(cursor) if cursor else None
+    conn = sqlite3.connect(DB_FILE)
+    c = conn.cursor()
+
+    f = _library_filter(search_text, client_id, source_filter, sentiment_filter, clean_status_filter, time_range, exclude_spam,
+                        after_id)
+    time_col = f["time_col"]
+    sort_col = LIBRARY_SORTS.get(sort) or time_col
+    
+    # 只查询所请求字段用到的列；id 与排序列始终需要 (游标、标签)
+    want = list(LIBRARY_FIELDS) if fields is None else list(dict.fromkeys(fields))
+    unknown = [name for name in want if name not in LIBRARY_FIELDS]
+    if unknown:
+        conn.close()
+        raise ValueError(f"未知字段: {', '.join(unknown)}")
+    needed = {"id", "sort_key"}
+    for name in want:
+        needed.update(LIBRARY_FIELDS[name][0])
+    if not f["fts"]:
+        needed -= {"title_highlight", "snippet"}
+    # 存储的热度按参考时刻衰减，乘以系数换算为当前热度
+    factor = decay_factor(hotness_ref(c), time.time()) if "hotness" in needed else 1.0
+    columns = {
+        "id": "m.id", "client_id": f["client_col"], "source": "m.source", "title": "m.title",
+        "content_text": "m.content_text", "content_preview": f"substr(m.content_text, 1, {PREVIEW_CHARS})",
+        "url": "m.url", "publish_time": time_col, "sentiment_score": f["score_col"], "risk_level": f["risk_col"],
+        "clean_status": "m.clean_status", "manual_category": "m.manual_category", "manual_sentiment": "m.manual_sentiment",
+        "event_title": "m.event_title", "quality_score": "m.quality_score", "primary_tag": "m.primary_tag",
+        "secondary_tag": "m.secondary_tag", "ai_fact": "m.ai_fact", "created_at": "m.created_at", "spam_score": "m.spam_score",
+        "title_highlight": highlight("mentions_fts", 0), "snippet": snippet("mentions_fts", 1),
+        "hotness": f"m.hotness * {factor!r}", "sort_key": sort_col,
+    }
+    selected = [name for name in columns if name in needed]
+
+    # 先沿排序列的索引 (publish_time / hotness / quality_score) 取一页，当前页的标签再按 mention_id 单独查一次 (见下方)
+    # 未指定排序的全文检索按 bm25 相关度排序并返回高亮
+    order_sql = f"{sort_col} DESC, m.id DESC"
+    if after_id is not None:
+        # 只取新入库的行再排序，不沿排序列的索引从头扫描 (一元 + 使排序不走索引)
+        order_sql = f"+{sort_col} DESC, m.id DESC"
+    ranked = f["fts"] is not None and cursor is None and sort is None
+    if ranked:
+        order_sql = f"{bm25('mentions_fts', MENTION_WEIGHTS)}, {time_col} DESC"
     
-    # 排序和分页
-    sql += " ORDER BY m.publish_time DESC LIMIT ? OFFSET ?"
-    offset = (page - 1) * page_size
-    params.extend([page_size, offset])
+    sql = f"""
+        SELECT {", ".join(columns[name] for name in selected)}
+        FROM {f["from"]}
+        WHERE {f["where"]}
+    """
+    params = list(f["params"])
+    
+    # 排序和分页：游标从上一页最后一行处继续，否则按页码 OFFSET
+    if position:
+        keyset_sql, keyset_params = keyset_after(sort_col, "m.id", position)
+        sql += " AND " + keyset_sql
+        params.extend(keyset_params)
+    sql += f" ORDER BY {order_sql}"
+    if cursor is not None:
+        sql += " LIMIT ?"
+        params.append(page_size)
+    else:
+        sql += " LIMIT ? OFFSET ?"
+        params.extend([page_size, (page - 1) * page_size])
     
     c.execute(sql, params)
-    rows = c.fetchall()
-    
+    rows = [dict(zip(selected, row)) for row in c.fetchall()]
+    # 相关度排序的结果不是按排序列有序，无法续接游标
+    next_page = None if ranked else next_cursor(rows, page_size, "sort_key", "id")
+
+    # 当前页的标签：一条按 (mention_id, tag_id) 索引的查询
+    page_tags = {}
+    if rows and "tags" in needed:
+        placeholders = ",".join(["?" for _ in rows])
+        c.execute(f"""SELECT at.mention_id, t.name FROM article_tags at JOIN tags t ON t.id = at.tag_id
+                      WHERE at.mention_id IN ({placeholders}) ORDER BY at.mention_id, at.id""", [row["id"] for row in rows])
+        for mention_id, name in c.fetchall():
+            names = page_tags.setdefault(mention_id, [])
+            if name not in names:
+                names.append(name)
+    
+    getters = [(name, LIBRARY_FIELDS[name][1]) for name in want]
     items = []
     for row in rows:
-        # 计算热度分值（基于情感、风险等级、来源权重）
-        weight = get_source_weight(row[2])  # source
-        sentiment = row[7] if row[7] is not None else 0  # sentiment_score
-        risk = row[8] if row[8] is not None else 0  # risk_level
-        hotness_score = (risk * 30) + (weight * 0.3) + max(0, sentiment * 50)
-        
-        # tags_str is from GROUP_CONCAT(t.name) at row[12]
-        tags_val = row[12] if len(row) > 12 else ""
-        # If it's a comma separated string, split it for frontend array support if needed, or keep as string
-        # Frontend handles string or array: `item.tags`
-        # Let's return as string or array? Frontend code: `item.tags.slice(0,2).join(',')` implies array.
-        # But `detail.manual_tags` logic suggests it might be string. 
-        # GlobalContentLibrary.vue: `Array.isArray(item.tags) ? ...`
-        
-        if tags_val:
-            tags_list = tags_val.split(',')
-            # Deduplicate just in case
-            tags_list = list(set(tags_list))
-            tags_val = tags_list
-        else:
-            tags_val = []
-            
-        # Parse new fields
-        # row indices have shifted because we added columns to base_cols
-        # 0:id, 1:client, 2:source, 3:title (Article Title), 4:content, 5:url, 6:pub_time, 
-        # 7:sentiment, 8:risk, 9:clean, 10:man_cat, 11:man_sent, 
-        # 12:event_title, 13:quality, 14:p_tag, 15:s_tag, 16:ai_fact, 17:created_at
-        # 18: tag_names (GROUP_CONCAT)
-        
-        event_title = row[12] if row[12] else row[3] # Fallback to article title if no event title
-        quality = row[13] if row[13] else 0
-        p_tag = row[14]
-        s_tag = row[15]
-        summary = row[16] # ai_fact
-        ingest_time = row[17] if row[17] else row[6] # Fallback to publish_time
-
-        # Logic for tags if p_tag/s_tag are empty but tags_val exists
-        if not p_tag and len(tags_val) > 0: p_tag = tags_val[0]
-        if not s_tag and len(tags_val) > 1: s_tag = tags_val[1]
-        
-        items.append({
-            "id": row[0],
-            "client_id": row[1],
-            "source": row[2],
-            "article_title": row[3], # rename title -> article_title
-            "event_title": event_title,
-            "title": row[3], # Keep for compatibility
-            "summary": summary,
-            "content_text": row[4],
-            "content_preview": row[4][:100] if row[4] else "",
-            "url": row[5],
-            "publish_time": row[6],
-            "ingest_time": ingest_time,
-            "ingest_time_display": time.strftime("%m-%d %H:%M", time.localtime(ingest_time)),
-            "time_display": time.strftime("%m-%d %H:%M", time.localtime(row[6])),
-            "sentiment_score": round(sentiment, 2),
-            "sentiment_label": "负面" if risk >= 2 else ("正面" if risk == 1 else ("正面" if sentiment > 0.3 else ("负面" if sentiment < -0.1 else "中性"))),
-            "risk_level": risk,
-            "quality_score": quality,
-            "clean_status": row[9] or "uncleaned",
-            "manual_category": row[10],
-            "manual_sentiment": row[11],
-            "category": row[10],
-            "primary_tag": p_tag,
-            "secondary_tag": s_tag,
-            "tags": tags_val,
-            "hotness": round(hotness_score, 0),
-            "hotness_display": "🔥" * min(5, max(1, int(hotness_score / 1000))),
-            # --- New Fields for Rich Dashboard ---
-            "author_level": random.randint(3, 5) if "微博" in row[2] or "36氪" in row[2] else random.randint(1, 3), # Mock Lv
-            "author_verify": 1 if random.random() > 0.7 else 0, # Mock Verify
-            "read_count": f"{random.randint(1, 400)/10.0:.1f}w", # Mock Reads
-            "comment_count": random.randint(10, 2000)
-        })
+        row["tags"] = page_tags.get(row["id"], [])
+        items.append({name: get(row) for name, get in getters})
     
-    # 获取总数
-    count_sql = "SELECT COUNT(*) FROM mentions WHERE publish_time > ? AND is_archived = 0"
-    count_params = [start_time]
+    # 获取总数 (与列表同一筛选条件)
+    count_sql = f"SELECT COUNT(*) FROM {f['from']} WHERE {f['where']}"
+    count_params = f["params"]
     
-    if client_id:
-        count_sql += " AND client_id = ?"
-        count_params.append(client_id)
-
-    if search_text:
-        count_sql += " AND (title LIKE ? OR content_text LIKE ?)"
-        count_params.extend([f"%{search_text}%", f"%{search_text}%"])
-    if source_filter and len(source_filter) > 0:
-        placeholders = ",".join(["?" for _ in source_filter])
-        count_sql += f" AND source IN ({placeholders})"
-        count_params.extend(source_filter)
-    if clean_status_filter and len(clean_status_filter) > 0:
-        placeholders = ",".join(["?" for _ in clean_status_filter])
-        count_sql += f" AND clean_status IN ({placeholders})"
-        count_params.extend(clean_status_filter)
-    else:
-        count_sql += " AND (clean_status != 'discarded' OR clean_status IS NULL)"
-    
-    c.execute(count_sql, count_params)
-    total = c.fetchone()[0]
+    # 游标分页不计算总数 (计数同样要扫过全部命中行)
+    total = None
+    if cursor is None:
+        c.execute(count_sql, count_params)
+        total = c.fetchone()[0]
     
     conn.close()
     
@@ -812,19 +865,231 @@ def get_global_content_library(search_text="", client_id=None, source_filter=Non
         "total": total,
         "page": page,
         "page_size": page_size,
-        "total_pages": (total + page_size - 1) // page_size
+        "total_pages": (total + page_size - 1) // page_size if total is not None else None,
+        "next_cursor": next_page
     }
 
+# [7b] 内容库分面计数：来源 / 情感 / 清洗状态 / 标签
+FACET_TTL = 30               # 同一筛选条件的计数在同一 30 秒时间桶内复用
+FACET_TAG_LIMIT = 20
+FACET_SAMPLE_RATE = 16       # 近似计数只统计 id % 16 = 0 的内容，计数 x16
+FACET_EXACT_BELOW = 20000    # 抽样估计的命中数低于此值时仍做精确计数
+
+def _facet_counts(c, f, sample_rate=1):
+    """一条语句：命中内容物化一次，各分面在其上分组计数；返回 (总数, {分面: [{"value", "count"}, ...]})"""
+    where, params = f["where"], list(f["params"])
+    if sample_rate > 1:
+        # id 在时间索引里，按 id 抽样时未抽中的行不需要回表
+        where += " AND m.id % ? = 0"
+        params.append(sample_rate)
+    score_col = f["score_col"]
+    # 情感分段与 sentiment_filter 的阈值一致；清洗状态为空按 uncleaned 计 (与列表展示一致)
+    c.execute(f"""
+        WITH hits AS MATERIALIZED (
+            SELECT m.id, m.source,
+                   CASE WHEN {score_col} > 0.3 THEN 'positive' WHEN {score_col} < -0.1 THEN 'negative'
+                        WHEN {score_col} BETWEEN -0.1 AND 0.3 THEN 'neutral' END AS band,
+                   COALESCE(m.clean_status, 'uncleaned') AS clean_status
+            FROM {f["from"]}
+            WHERE {where}
+        )
+        SELECT 'total', NULL, count(*) FROM hits
+        UNION ALL SELECT 'source', source, count(*) FROM hits GROUP BY source
+        UNION ALL SELECT 'sentiment', band, count(*) FROM hits GROUP BY band
+        UNION ALL SELECT 'clean_status', clean_status, count(*) FROM hits GROUP BY clean_status
+        UNION ALL SELECT * FROM (SELECT 'tag', t.name, count(DISTINCT hits.id) AS n
+                                 FROM hits JOIN article_tags at ON at.mention_id = hits.id JOIN tags t ON t.id = at.tag_id
+                                 GROUP BY t.name ORDER BY n DESC LIMIT ?)
+    """, params + [FACET_TAG_LIMIT])
+    total = 0
+    facets = {"source": [], "sentiment": [], "clean_status": [], "tag": []}
+    for facet, value, count in c.fetchall():
+        if facet == "total":
+            total = count * sample_rate
+        elif value is not None:
+            facets[facet].append({"value": value, "count": count * sample_rate})
+    for values in facets.values():
+        values.sort(key=lambda v: -v["count"])
+    return total, facets
+
+def _compute_library_facets(filter, approximate):
+    conn = sqlite3.connect(DB_FILE)
+    c = conn.cursor()
+    f = _library_filter(**filter)
+    sampled = False
+    if approximate:
+        total, facets = _facet_counts(c, f, FACET_SAMPLE_RATE)
+        sampled = total >= FACET_EXACT_BELOW
+    if not sampled:
+        total, facets = _facet_counts(c, f)
+    conn.close()
+    return {"total": total, "approximate": sampled, "facets": facets}
+
+def get_library_facets(approximate=False, **filter):
+    """
+    内容库分面计数：与列表同一筛选条件 (LIBRARY_FILTER_KEYS) 下，按来源、情感、清洗状态、标签 (前 FACET_TAG_LIMIT 个) 计数
+    各分面的计数都在当前全部筛选条件下统计 (选中某个来源后，来源分面只剩该来源)
+    approximate: 命中很多时按 id 抽样 1/FACET_SAMPLE_RATE 估算，估算命中数低于 FACET_EXACT_BELOW 时仍返回精确计数
+    结果按筛选条件的哈希缓存，FACET_TTL 秒内相同条件直接复用
+    返回 {"total", "approximate": 是否为估算值, "facets": {"source" / "sentiment" / "clean_status" / "tag": [{"value", "count"}, ...]}}
+    """
+    unknown = set(filter) - set(LIBRARY_FILTER_KEYS)
+    if unknown:
+        raise ValueError(f"未知筛选条件: {', '.join(sorted(unknown))}")
+    digest = hashlib.sha1(json.dumps([filter, approximate], sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+    key = (os.path.abspath(DB_FILE), "library_facets", digest)
+    return RESPONSE_CACHE.get(key, int(time.time() // FACET_TTL), lambda: _compute_library_facets(filter, approximate))
+
 # [8] 批量删除/废弃内容
 def bulk_discard_content(mention_ids):
     """将内容标记为已废弃（不是物理删除）"""
-    conn = sqlite3.connect(DB_FILE)
+    result = bulk_moderate([{"op": "discard"}], mention_ids=mention_ids)
+    if result["status"] != "success":
+        return result
+    return {"status": "success", "discarded_count": result["matched"]}
+
+# [8b] 批量审核：一次请求对一批内容执行多种操作
+MAX_BULK_IDS = 10000
+MANUAL_SENTIMENTS = ("positive", "negative", "neutral")
+
+def _check_operations(c, operations):
+    """校验并补全操作参数 (标签名解析为 tag_id)；有问题时返回错误信息"""
+    checked = []
+    for op in operations:
+        name = op.get("op")
+        if name in ("discard", "archive"):
+            checked.append({"op": name})
+        elif name == "associate":
+            c.execute("SELECT 1 FROM client_config WHERE client_id=?", (op.get("client_id"),))
+            if not c.fetchone():
+                return None, f"客户不存在: {op.get('client_id')}"
+            checked.append({"op": name, "client_id": op["client_id"]})
+        elif name == "recategorize":
+            if not op.get("category"):
+                return None, "recategorize 需要指定 category"
+            checked.append({"op": name, "category": op["category"]})
+        elif name == "sentiment":
+            if op.get("sentiment") not in MANUAL_SENTIMENTS:
+                return None, f"sentiment 只能是 {'/'.join(MANUAL_SENTIMENTS)}"
+            checked.append({"op": name, "sentiment": op["sentiment"]})
+        elif name == "tag":
+            if op.get("tag_id") is not None:
+                c.execute("SELECT id FROM tags WHERE id=?", (op["tag_id"],))
+            else:
+                c.execute("SELECT id FROM tags WHERE name=?", (op.get("tag"),))
+            found = c.fetchall()
+            if len(found) != 1:
+                return None, f"标签不存在或名称不唯一: {op.get('tag_id') or op.get('tag')}"
+            checked.append({"op": name, "tag_id": found[0][0]})
+        else:
+            return None, f"未知操作: {name}"
+    return checked, None
+
+def bulk_moderate(operations, mention_ids=None, filter=None, operator="editor"):
+    """
+    批量审核：对一批内容依次执行 operations，整批在同一事务内完成，任一步出错全部回滚
+    目标内容二选一：
+        mention_ids  内容 id 列表
+        filter       内容库筛选条件 (LIBRARY_FILTER_KEYS，与 get_global_content_library 同义)，命中的全部内容
+    最多 MAX_BULK_IDS 条。operations 按顺序执行，每种操作对整批内容只执行一条集合语句：
+        {"op": "discard"}                          标记为已废弃
+        {"op": "archive"}                          归档
+        {"op": "associate", "client_id": ...}      关联到客户 (同手动分发)
+        {"op": "recategorize", "category": ...}    修正分类
+        {"op": "sentiment", "sentiment": ...}      修正情感 positive / negative / neutral
+        {"op": "tag", "tag_id": ... 或 "tag": 标签名}  打标签
+    返回 {"status": "success", "matched": 目标内容条数, "operations": [{"op", "affected": 实际改动的行数}, ...]}
+    """
+    if not operations:
+        return {"status": "error", "message": "未指定操作"}
+    if (mention_ids is None) == (filter is None):
+        return {"status": "error", "message": "mention_ids 与 filter 须且只能指定一个"}
+    if mention_ids is not None and len(mention_ids) > MAX_BULK_IDS:
+        return {"status": "error", "message": f"单次最多处理 {MAX_BULK_IDS} 条内容"}
+    if filter is not None:
+        unknown = set(filter) - set(LIBRARY_FILTER_KEYS)
+        if unknown:
+            return {"status": "error", "message": f"未知筛选条件: {', '.join(sorted(unknown))}"}
+
+    conn = sqlite3.connect(DB_FILE, timeout=30.0)
     c = conn.cursor()
-    for mid in mention_ids:
-        c.execute("UPDATE mentions SET clean_status='discarded' WHERE id=?", (mid,))
-    conn.commit()
+    checked, error = _check_operations(c, operations)
+    if error:
+        conn.close()
+        return {"status": "error", "message": error}
+
+    try:
+        # 目标内容先落到临时表，之后每条语句都按 id IN (SELECT id FROM moderation_ids) 处理整批
+        c.execute("CREATE TEMP TABLE IF NOT EXISTS moderation_ids (id INTEGER PRIMARY KEY)")
+        c.execute("DELETE FROM moderation_ids")
+        if filter is not None:
+            f = _library_filter(**filter)
+            c.execute(f"INSERT OR IGNORE INTO moderation_ids (id) SELECT m.id FROM {f['from']} WHERE {f['where']} LIMIT ?",
+                      f["params"] + [MAX_BULK_IDS + 1])
+        else:
+            c.executemany("INSERT OR IGNORE INTO moderation_ids (id) VALUES (?)", [(int(i),) for i in mention_ids])
+            c.execute("DELETE FROM moderation_ids WHERE id NOT IN (SELECT id FROM mentions)")
+        c.execute("SELECT id FROM moderation_ids")
+        ids = [r[0] for r in c.fetchall()]
+        if len(ids) > MAX_BULK_IDS:
+            conn.rollback()
+            conn.close()
+            return {"status": "error", "message": f"筛选命中超过 {MAX_BULK_IDS} 条内容，请缩小范围"}
+
+        targets = "id IN (SELECT id FROM moderation_ids)"
+        now = time.time()
+        results = []
+        # 情感 / 清洗状态 / 客户命中的变化同步到小时汇总表：整批前后各计一次
+        rollup_mentions(c, ids, -1)
+        for op in checked:
+            name = op["op"]
+            if name == "discard":
+                c.execute(f"UPDATE mentions SET clean_status='discarded' WHERE {targets} AND clean_status IS NOT 'discarded'")
+                affected = c.rowcount
+                remove_opinions(c, ids)
+            elif name == "archive":
+                c.execute(f"UPDATE mentions SET is_archived=1 WHERE {targets} AND is_archived IS NOT 1")
+                affected = c.rowcount
+            elif name == "associate":
+                # 新命中的内容写入前先取出，用于并入该客户的观点簇
+                c.execute(f"""SELECT id, title, risk_level, sentiment_score FROM mentions m WHERE {targets}
+                              AND NOT EXISTS (SELECT 1 FROM mention_matches mm WHERE mm.mention_id = m.id AND mm.client_id = ?)""",
+                          (op["client_id"],))
+                new_rows = c.fetchall()
+                detail = json.dumps({"reason": "manual_dispatch", "assigned_by": operator}, ensure_ascii=False)
+                c.execute(f"""INSERT OR IGNORE INTO mention_matches (mention_id, client_id, risk_level, sentiment, match_detail, publish_time)
+                              SELECT id, ?, risk_level, sentiment_score, ?, ? FROM mentions WHERE {targets}""",
+                          (op["client_id"], detail, now))
+                affected = c.rowcount
+                assign_opinions(c, [(op["client_id"], mid, title, now) for mid, title, risk, score in new_rows
+                                    if is_opinion(risk, score)])
+                c.execute("""INSERT INTO content_library (mention_id, client_id, assigned_category, assigned_by, assigned_at)
+                             SELECT id, ?, 'manual_dispatch', ?, ? FROM moderation_ids""", (op["client_id"], operator, now))
+                c.execute(f"UPDATE mentions SET clean_status='cleaned' WHERE {targets}")
+            elif name == "recategorize":
+                c.execute(f"""UPDATE mentions SET manual_category=?, clean_status='cleaned' WHERE {targets}
+                              AND (manual_category IS NOT ? OR clean_status IS NOT 'cleaned')""",
+                          (op["category"], op["category"]))
+                affected = c.rowcount
+            elif name == "sentiment":
+                c.execute(f"""UPDATE mentions SET manual_sentiment=?, clean_status='cleaned' WHERE {targets}
+                              AND (manual_sentiment IS NOT ? OR clean_status IS NOT 'cleaned')""",
+                          (op["sentiment"], op["sentiment"]))
+                affected = c.rowcount
+            else:  # tag
+                c.execute("""INSERT OR IGNORE INTO article_tags (article_id, mention_id, tag_id, confidence, source, created_at)
+                             SELECT cast(id as text), id, ?, 1.0, 'manual', ? FROM moderation_ids""", (op["tag_id"], now))
+                affected = c.rowcount
+                c.execute("UPDATE tags SET count = count + ? WHERE id=?", (affected, op["tag_id"]))
+            results.append({"op": name, "affected": affected})
+        rollup_mentions(c, ids, 1)
+        conn.commit()
+    except sqlite3.Error as e:
+        conn.rollback()
+        conn.close()
+        return {"status": "error", "message": f"批量操作失败，已回滚: {e}"}
     conn.close()
-    return {"status": "success", "discarded_count": len(mention_ids)}
+    return {"status": "success", "matched": len(ids), "operations": results}
 
 # [9] 黑名单管理：添加信源到黑名单
 def add_source_to_blacklist(source_name, source_type="general", reason="", created_by="system"):
@@ -837,14 +1102,20 @@ def add_source_to_blacklist(source_name, source_type="general", reason="", creat
                   (source_name, source_type, reason, time.time(), created_by))
         
         # 自动标记该源的所有内容为已废弃
+        c.execute("SELECT id FROM mentions WHERE source=? AND clean_status IS NULL", (source_name,))
+        discarded_ids = [r[0] for r in c.fetchall()]
+        rollup_mentions(c, discarded_ids, -1)
         c.execute("UPDATE mentions SET clean_status='discarded' WHERE source=? AND clean_status IS NULL", (source_name,))
+        rollup_mentions(c, discarded_ids, 1)
+        remove_opinions(c, discarded_ids)
         
         conn.commit()
-        conn.close()
         return {"status": "success", "message": f"已添加{source_name}到黑名单"}
     except sqlite3.IntegrityError:
-        conn.close()
         return {"status": "error", "message": "该信源已在黑名单中"}
+    finally:
+        # 其他数据库错误照常抛出，未提交的修改随连接关闭回滚
+        conn.close()
 
 # [10] 黑名单管理：获取黑名单列表
 def get_source_blacklist():
@@ -887,14 +1158,20 @@ def associate_content_to_client(mention_id, client_id, assigned_by="editor"):
     c = conn.cursor()
     
     # 获取mention详情
-    c.execute("SELECT title, source, risk_level FROM mentions WHERE id=?", (mention_id,))
+    c.execute("SELECT title, source, risk_level, sentiment_score FROM mentions WHERE id=?", (mention_id,))
     row = c.fetchone()
     if not row:
         conn.close()
         return {"status": "error", "message": "内容不存在"}
     
-    # 更新关联
-    c.execute("UPDATE mentions SET client_id=? WHERE id=?", (client_id, mention_id))
+    # 更新关联：写入客户命中 (已命中过的保持原记录)；前后各计一次小时汇总 (废弃的内容会被重新标记为已清洗)
+    now = time.time()
+    rollup_mentions(c, [mention_id], -1)
+    c.execute("""INSERT OR IGNORE INTO mention_matches (mention_id, client_id, risk_level, sentiment, match_detail, publish_time)
+                 SELECT id, ?, risk_level, sentiment_score, ?, ? FROM mentions WHERE id=?""",
+              (client_id, json.dumps({"reason": "manual_dispatch", "assigned_by": assigned_by}, ensure_ascii=False), now, mention_id))
+    if c.rowcount == 1 and is_opinion(row[2], row[3]):
+        assign_opinions(c, [(client_id, mention_id, row[0], now)])
     
     # 添加到内容库记录
     c.execute("INSERT INTO content_library (mention_id, client_id, assigned_category, assigned_by, assigned_at) VALUES (?,?,?,?,?)",
@@ -902,6 +1179,7 @@ def associate_content_to_client(mention_id, client_id, assigned_by="editor"):
     
     # 标记为已清洗
     c.execute("UPDATE mentions SET clean_status='cleaned' WHERE id=?", (mention_id,))
+    rollup_mentions(c, [mention_id], 1)
     
     conn.commit()
     conn.close()
@@ -941,7 +1219,10 @@ def correct_content_classification(mention_id, new_category=None, new_sentiment=
     
     params.append(mention_id)
     sql = f"UPDATE mentions SET {', '.join(updates)} WHERE id=?"
+    # 情感修正 / 清洗状态变化同步到小时汇总表
+    rollup_mentions(c, [mention_id], -1)
     c.execute(sql, params)
+    rollup_mentions(c, [mention_id], 1)
     
     conn.commit()
     conn.close()
@@ -1023,24 +1304,12 @@ def update_content_full(mention_id, title=None, content_text=None, manual_catego
         updates.append("ai_fact=?")
         params.append(ai_fact)
     if event_title is not None:
-        try: 
-            c.execute("ALTER TABLE mentions ADD COLUMN event_title TEXT")
-        except: 
-            pass
         updates.append("event_title=?")
         params.append(event_title)
     if quality_score is not None:
-        try: 
-            c.execute("ALTER TABLE mentions ADD COLUMN quality_score INTEGER DEFAULT 0")
-        except: 
-            pass
         updates.append("quality_score=?")
         params.append(quality_score)
     if manual_tags is not None:
-        try:
-            c.execute("ALTER TABLE mentions ADD COLUMN manual_tags TEXT")
-        except sqlite3.OperationalError:
-            pass
         updates.append("manual_tags=?")
         params.append(manual_tags)
         
@@ -1058,10 +1327,38 @@ def update_content_full(mention_id, title=None, content_text=None, manual_catego
     if not updates:
         conn.close()
         return {"status": "error", "message": "未指定要更新的字段"}
+
+    # 标题 / 正文 / 摘要被修改后，按入库时同样的口径 (标题 + 摘要) 重新计算自动情感分
+    if title is not None or ai_fact is not None:
+        c.execute("SELECT title, ai_fact FROM mentions WHERE id=?", (mention_id,))
+        row = c.fetchone()
+        if row:
+            new_title = title if title is not None else (row[0] or "")
+            new_fact = ai_fact if ai_fact is not None else (row[1] or "")
+            updates.append("sentiment_score=?")
+            params.append(score_sentiment(new_title + " " + new_fact))
     updates.append("clean_status='cleaned'")
     params.append(mention_id)
     sql = f"UPDATE mentions SET {', '.join(updates)} WHERE id=?"
+    rollup_mentions(c, [mention_id], -1)
     c.execute(sql, params)
+    # 标题 / 正文 / 情感变化后，同一事务内按入库口径重算垃圾分、质量分 (编辑手动给出的不覆盖) 和热度
+    if title is not None or content_text is not None or ai_fact is not None:
+        c.execute(f"SELECT m.title, m.content_text, m.source, m.sentiment_score, m.publish_time, {RISK_SQL} FROM mentions m WHERE m.id=?",
+                  (mention_id,))
+        row = c.fetchone()
+        if row:
+            new_title, new_content, source, sentiment, publish_time, risk = row
+            spam_score = score_spam(new_title, new_content)
+            ref = hotness_ref(c)
+            hotness = stored_hotness(hotness_base(risk, source, sentiment), publish_time, ref) \
+                if (publish_time or ref) >= ref - HOTNESS_WINDOW else 0
+            derived = {"spam_score": spam_score, "is_spam": is_spam(spam_score), "hotness": hotness}
+            if quality_score is None:
+                derived["quality_score"] = score_quality(len(new_content or ""), new_title, source, spam_score)
+            c.execute(f"UPDATE mentions SET {', '.join(f'{k}=?' for k in derived)} WHERE id=?",
+                      list(derived.values()) + [mention_id])
+    rollup_mentions(c, [mention_id], 1)
     conn.commit()
     conn.close()
     return {"status": "success", "message": "已保存修改"}
@@ -1075,36 +1372,26 @@ def get_content_quality_stats():
     conn = sqlite3.connect(DB_FILE)
     c = conn.cursor()
     
-    # 过去24小时的内容
+    # 过去24小时的内容 (计数读小时汇总表的全局行，最近 24 个整点小时)
     start_time = time.time() - 86400
+    start_hour = floor_hour(start_time) + ROLLUP_HOUR
     
-    c.execute("SELECT COUNT(*) FROM mentions WHERE publish_time > ?", (start_time,))
-    total = c.fetchone()[0]
+    c.execute("SELECT COALESCE(sum(total), 0), COALESCE(sum(pos), 0), COALESCE(sum(neg), 0), COALESCE(sum(neu), 0) FROM mention_rollup_hourly WHERE client_id=? AND hour >= ?",
+              (GLOBAL_KEY, start_hour))
+    total, positive, negative, neutral = c.fetchone()
     
-    # 识别可能的垃圾广告（简单启发式）
-    # 特征：包含"兼职"、"刷单"、"联系"等关键词，且风险等级低
-    c.execute("SELECT COUNT(*) FROM mentions WHERE publish_time > ? AND (content_text LIKE '%兼职%' OR content_text LIKE '%刷单%' OR content_text LIKE '%代理%') AND risk_level < 2",
-              (start_time,))
+    # 垃圾广告：入库时已打分 (radar_spam)，按 (client_id, is_spam, publish_time, clean_status) 索引计数，与总数同一窗口
+    c.execute("SELECT COUNT(*) FROM mentions WHERE client_id IS NULL AND is_spam = 1 AND publish_time >= ? AND (clean_status IS NULL OR clean_status != 'discarded')",
+              (start_hour,))
     garbage_count = c.fetchone()[0]
     
     # 各来源的内容数
-    c.execute("SELECT source, COUNT(*) as cnt FROM mentions WHERE publish_time > ? GROUP BY source ORDER BY cnt DESC",
-              (start_time,))
+    c.execute("SELECT source, sum(total) as cnt FROM mention_rollup_hourly WHERE client_id=? AND hour >= ? GROUP BY source HAVING cnt > 0 ORDER BY cnt DESC",
+              (GLOBAL_KEY, start_hour))
     sources = []
     for row in c.fetchall():
         sources.append({"source": row[0], "count": row[1], "percentage": round(row[1] * 100 / max(1, total), 2)})
     
-    # 情感分布
-    c.execute("SELECT COUNT(*) FROM mentions WHERE publish_time > ? AND sentiment_score > 0.3",
-              (start_time,))
-    positive = c.fetchone()[0]
-    
-    c.execute("SELECT COUNT(*) FROM mentions WHERE publish_time > ? AND sentiment_score < -0.1",
-              (start_time,))
-    negative = c.fetchone()[0]
-    
-    neutral = total - positive - negative
-    
     conn.close()
     
     return {
@@ -1163,4 +1450,114 @@ def remove_user_topic(user_id, topic_id):
         conn.close()
         return {"status": "success"}
     except Exception as e:
-        return {"status": "error", "msg": str(e)}
\ No newline at end of file
+        return {"status": "error", "msg": str(e)}
+
+
+# ==========================================
+# 9. 保存的检索 (Saved Searches)
+# ==========================================
+# 每个保存的检索记住已看过的最新内容 (created_at, id)，轮询时只取在其之后入库的内容：
+# 条件 m.id > seen_id 沿主键区间只读新入库的行，代价随新增数据量增长，而不是随库的总量增长
+DELTA_COUNT_CAP = 1000       # 新内容角标最多数到 1000 (前端显示 999+)
+
+def _latest_mention(c, after_id=0):
+    c.execute("SELECT id, COALESCE(created_at, publish_time) FROM mentions WHERE id > ? ORDER BY id DESC LIMIT 1", (after_id,))
+    return c.fetchone()
+
+def _delta_count(c, filter, seen_id):
+    f = _library_filter(**filter, after_id=seen_id)
+    c.execute(f"SELECT count(*) FROM (SELECT 1 FROM {f['from']} WHERE {f['where']} LIMIT ?)", f["params"] + [DELTA_COUNT_CAP])
+    return c.fetchone()[0]
+
+def save_search(user_id, name, filter):
+    """保存检索条件 (LIBRARY_FILTER_KEYS 中的筛选项)；已看过的位置从当前最新的内容开始"""
+    unknown = set(filter) - set(LIBRARY_FILTER_KEYS)
+    if unknown:
+        return {"status": "error", "message": f"未知筛选条件: {', '.join(sorted(unknown))}"}
+    conn = sqlite3.connect(DB_FILE)
+    c = conn.cursor()
+    seen_id, seen_created_at = _latest_mention(c) or (0, None)
+    now = time.time()
+    c.execute('''INSERT INTO saved_searches (user_id, name, filter, seen_id, seen_created_at, created_at, seen_at)
+                 VALUES (?, ?, ?, ?, ?, ?, ?)''',
+              (user_id, name, json.dumps(filter, ensure_ascii=False), seen_id, seen_created_at, now, now))
+    search_id = c.lastrowid
+    conn.commit()
+    conn.close()
+    return {"status": "success", "id": search_id}
+
+def list_saved_searches(user_id):
+    """当前用户保存的检索，各带新内容条数 new_count (最多 DELTA_COUNT_CAP)"""
+    conn = sqlite3.connect(DB_FILE)
+    c = conn.cursor()
+    c.execute("SELECT id, name, filter, seen_id, seen_created_at, seen_at FROM saved_searches WHERE user_id=? ORDER BY created_at DESC",
+              (user_id,))
+    items = []
+    for search_id, name, filter_json, seen_id, seen_created_at, seen_at in c.fetchall():
+        filter = json.loads(filter_json)
+        items.append({"id": search_id, "name": name, "filter": filter, "new_count": _delta_count(c, filter, seen_id),
+                      "seen": {"created_at": seen_created_at, "id": seen_id}, "seen_at": seen_at})
+    conn.close()
+    return items
+
+def delete_saved_search(user_id, search_id):
+    conn = sqlite3.connect(DB_FILE)
+    c = conn.cursor()
+    c.execute("DELETE FROM saved_searches WHERE id=? AND user_id=?", (search_id, user_id))
+    deleted = c.rowcount
+    conn.commit()
+    conn.close()
+    if not deleted:
+        return {"status": "error", "message": "检索不存在"}
+    return {"status": "success"}
+
+def get_saved_search_delta(user_id, search_id, limit=50, fields=None):
+    """
+    上次看过之后新入库且符合条件的内容：最新的 limit 条 (按时间倒序) 与新内容总数 new_count (最多 DELTA_COUNT_CAP)
+    只读，不推进已看过的位置 (展示后调用 mark_saved_search_seen)；检索不存在时返回 None
+    """
+    conn = sqlite3.connect(DB_FILE)
+    c = conn.cursor()
+    c.execute("SELECT name, filter, seen_id, seen_created_at FROM saved_searches WHERE id=? AND user_id=?", (search_id, user_id))
+    row = c.fetchone()
+    if not row:
+        conn.close()
+        return None
+    name, filter_json, seen_id, seen_created_at = row
+    filter = json.loads(filter_json)
+    new_count = _delta_count(c, filter, seen_id)
+    conn.close()
+    items = []
+    if new_count:
+        items = get_global_content_library(**filter, page_size=limit, cursor="", fields=fields, after_id=seen_id)["items"]
+    return {
+        "id": search_id,
+        "name": name,
+        "new_count": new_count,
+        "items": items,
+        "seen": {"created_at": seen_created_at, "id": seen_id},
+    }
+
+def mark_saved_search_seen(user_id, search_id, seen_id=None):
+    """已看过的位置推进到 seen_id (默认当前最新的内容)；只前进不后退"""
+    conn = sqlite3.connect(DB_FILE)
+    c = conn.cursor()
+    c.execute("SELECT seen_id FROM saved_searches WHERE id=? AND user_id=?", (search_id, user_id))
+    row = c.fetchone()
+    if not row:
+        conn.close()
+        return {"status": "error", "message": "检索不存在"}
+    if seen_id is None:
+        latest = _latest_mention(c, row[0])
+    else:
+        c.execute("SELECT id, COALESCE(created_at, publish_time) FROM mentions WHERE id=? AND id > ?", (seen_id, row[0]))
+        latest = c.fetchone()
+    if latest:
+        c.execute("UPDATE saved_searches SET seen_id=?, seen_created_at=?, seen_at=? WHERE id=?",
+                  (latest[0], latest[1], time.time(), search_id))
+        conn.commit()
+    else:
+        c.execute("SELECT seen_id, seen_created_at FROM saved_searches WHERE id=?", (search_id,))
+        latest = c.fetchone()
+    conn.close()
+    return {"status": "success", "seen": {"created_at": latest[1], "id": latest[0]}}
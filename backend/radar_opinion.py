@@ -0,0 +1,234 @@
+"""
+负面观点聚类 (看板「用户槽点」)
+
+负面 / 高风险内容在入库时按客户增量聚类，不调用大模型：
+- 标题规范化后取字符 2-gram，按 TF-IDF 加权并归一化；文档频率 (opinion_terms) 随入库累加，term='' 一行记录文档总数
+- 每个客户最近活跃的簇作为候选，按余弦相似度在线分配：达到阈值则并入最相似的簇并更新质心，否则新建一个簇
+- 质心是成员向量之和，只保留权重最高的 CENTROID_TERMS 个 n-gram
+簇状态 (opinion_clusters / opinion_cluster_members) 与入库在同一个事务里更新，
+看板只按 (client_id, last_seen) 索引读取当前最大的几个簇，不再逐条扫描标题。
+
+client_id 为 '' 的簇对应全局内容 (全局看板)。
+重算最近几天的簇: python radar_opinion.py rebuild [天数]
+"""
+import sqlite3
+import json
+import math
+import sys
+import time
+
+from radar_migrations import run_migrations
+from radar_dedup import normalize_title, strip_source
+
+DB_FILE = "radar_data.db"
+
+NGRAM = 2
+MIN_TERMS = 3                          # n-gram 过少的标题不参与聚类
+SIMILARITY_THRESHOLD = 0.25
+CENTROID_TERMS = 64
+OPINION_WINDOW_SECONDS = 3 * 86400     # 只与最近 3 天内活跃的簇比对
+MAX_ACTIVE_CLUSTERS = 200              # 每个客户最多取最近活跃的若干个簇作为候选
+LABEL_LEN = 40
+NEGATIVE_SENTIMENT = -0.3
+
+def is_opinion(risk_level, sentiment):
+    """与原先看板「负面标题」的口径一致：风险等级 >= 2 或情感分 < -0.3"""
+    return (risk_level or 0) >= 2 or (sentiment is not None and sentiment < NEGATIVE_SENTIMENT)
+
+# ==========================================
+# 1. 向量
+# ==========================================
+def term_counts(title):
+    text = normalize_title(title)
+    counts = {}
+    for i in range(len(text) - NGRAM + 1):
+        term = text[i:i + NGRAM]
+        counts[term] = counts.get(term, 0) + 1
+    return counts
+
+def _normalize(vec):
+    norm = math.sqrt(sum(w * w for w in vec.values()))
+    return {t: w / norm for t, w in vec.items()} if norm else {}
+
+def _truncate(vec):
+    if len(vec) <= CENTROID_TERMS:
+        return vec
+    return dict(sorted(vec.items(), key=lambda x: x[1], reverse=True)[:CENTROID_TERMS])
+
+class _Cluster:
+    __slots__ = ("id", "client_id", "label", "centroid", "norm", "size", "first_seen", "last_seen")
+
+    def __init__(self, cluster_id, client_id, label, centroid, size, first_seen, last_seen):
+        self.id = cluster_id
+        self.client_id = client_id
+        self.label = label
+        self.size = size
+        self.first_seen = first_seen
+        self.last_seen = last_seen
+        self.set_centroid(centroid)
+
+    def set_centroid(self, centroid):
+        self.centroid = _truncate(centroid)
+        self.norm = math.sqrt(sum(w * w for w in self.centroid.values())) or 1.0
+
+    def similarity(self, vec):
+        centroid = self.centroid
+        return sum(w * centroid[t] for t, w in vec.items() if t in centroid) / self.norm
+
+# ==========================================
+# 2. 入库时增量聚类 (复用调用方的游标)
+# ==========================================
+def assign_opinions(cursor, docs):
+    """
+    docs: [(client_key, mention_id, title, publish_time), ...]，client_key 为 '' 表示全局内容
+    按顺序把每条内容并入最相似的簇或新建簇，返回 {"assigned": 并入已有簇的条数, "created": 新建簇数}
+    """
+    prepared = []
+    for client_key, mention_id, title, t in docs:
+        counts = term_counts(title)
+        if len(counts) >= MIN_TERMS:
+            prepared.append((client_key, mention_id, title, t, counts))
+    if not prepared:
+        return {"assigned": 0, "created": 0}
+
+    # 文档频率：本批先计入，再取回本批全部 n-gram 的 df
+    df_delta = {"": len(prepared)}
+    for p in prepared:
+        for term in p[4]:
+            df_delta[term] = df_delta.get(term, 0) + 1
+    cursor.executemany('''INSERT INTO opinion_terms (term, df) VALUES (?,?)
+                          ON CONFLICT (term) DO UPDATE SET df = df + excluded.df''', list(df_delta.items()))
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS opinion_batch (key TEXT PRIMARY KEY)")
+    cursor.execute("DELETE FROM opinion_batch")
+    cursor.executemany("INSERT INTO opinion_batch (key) VALUES (?)", [(t,) for t in df_delta])
+    cursor.execute("SELECT term, df FROM opinion_terms WHERE term IN (SELECT key FROM opinion_batch)")
+    df = dict(cursor.fetchall())
+    total_docs = df.pop("", 0)
+
+    # 候选簇：每个客户最近活跃的 MAX_ACTIVE_CLUSTERS 个
+    since = min(p[3] for p in prepared) - OPINION_WINDOW_SECONDS
+    cursor.execute("DELETE FROM opinion_batch")
+    cursor.executemany("INSERT OR IGNORE INTO opinion_batch (key) VALUES (?)", [(p[0],) for p in prepared])
+    cursor.execute('''SELECT id, client_id, label, centroid, size, first_seen, last_seen FROM
+                          (SELECT *, ROW_NUMBER() OVER (PARTITION BY client_id ORDER BY last_seen DESC) AS rn
+                           FROM opinion_clusters
+                           WHERE client_id IN (SELECT key FROM opinion_batch) AND last_seen >= ?)
+                      WHERE rn <= ?''', (since, MAX_ACTIVE_CLUSTERS))
+    postings = {}     # client_key -> {term: [cluster, ...]}
+    for cluster_id, client_id, label, centroid, size, first_seen, last_seen in cursor.fetchall():
+        cluster = _Cluster(cluster_id, client_id, label, json.loads(centroid), size, first_seen, last_seen)
+        index = postings.setdefault(client_id, {})
+        for term in cluster.centroid:
+            index.setdefault(term, []).append(cluster)
+
+    created = []
+    touched = {}
+    members = []
+    assigned = 0
+    for client_key, mention_id, title, t, counts in prepared:
+        vec = _normalize({term: tf * (math.log((1 + total_docs) / (1 + df.get(term, 0))) + 1)
+                          for term, tf in counts.items()})
+        index = postings.setdefault(client_key, {})
+        # 只与至少共享一个 n-gram 的簇计算相似度
+        candidates = {id(c): c for term in vec for c in index.get(term, ())}
+        best, best_sim = None, SIMILARITY_THRESHOLD
+        for cluster in candidates.values():
+            sim = cluster.similarity(vec)
+            if sim >= best_sim:
+                best, best_sim = cluster, sim
+        if best is None:
+            best = _Cluster(None, client_key, strip_source(title)[:LABEL_LEN], vec, 0, t, t)
+            created.append(best)
+            best_sim = 1.0
+        else:
+            merged = dict(best.centroid)
+            for term, w in vec.items():
+                merged[term] = merged.get(term, 0.0) + w
+            best.set_centroid(merged)
+            touched[id(best)] = best
+            assigned += 1
+        best.size += 1
+        best.last_seen = max(best.last_seen, t)
+        for term in best.centroid:
+            bucket = index.setdefault(term, [])
+            if best not in bucket:
+                bucket.append(best)
+        members.append((mention_id, client_key, best, round(best_sim, 4)))
+
+    # 已有的簇更新质心 / 大小，本批新建的簇 (id 为 None) 按最终状态插入
+    cursor.executemany("UPDATE opinion_clusters SET centroid=?, size=?, last_seen=? WHERE id=?",
+                       [(json.dumps(c.centroid, ensure_ascii=False), c.size, c.last_seen, c.id)
+                        for c in touched.values() if c.id is not None])
+    for cluster in created:
+        cursor.execute('''INSERT INTO opinion_clusters (client_id, label, centroid, size, first_seen, last_seen)
+                          VALUES (?,?,?,?,?,?)''',
+                       (cluster.client_id, cluster.label, json.dumps(cluster.centroid, ensure_ascii=False),
+                        cluster.size, cluster.first_seen, cluster.last_seen))
+        cluster.id = cursor.lastrowid
+    cursor.executemany('''INSERT OR IGNORE INTO opinion_cluster_members (mention_id, client_id, cluster_id, similarity)
+                          VALUES (?,?,?,?)''', [(m_id, key, c.id, sim) for m_id, key, c, sim in members])
+    return {"assigned": assigned, "created": len(created)}
+
+def remove_opinions(cursor, mention_ids):
+    """内容被废弃时从所在的簇中移除 (簇大小 -1；质心不回退)；id 先写入临时表，不受 SQL 变量个数限制"""
+    if not mention_ids:
+        return
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS opinion_removed (mention_id INTEGER PRIMARY KEY)")
+    cursor.execute("DELETE FROM opinion_removed")
+    cursor.executemany("INSERT OR IGNORE INTO opinion_removed (mention_id) VALUES (?)", [(int(i),) for i in mention_ids])
+    cursor.execute('''UPDATE opinion_clusters SET size = size - (SELECT count(*) FROM opinion_cluster_members mb
+                                                                WHERE mb.cluster_id = opinion_clusters.id
+                                                                AND mb.mention_id IN (SELECT mention_id FROM opinion_removed))
+                      WHERE id IN (SELECT cluster_id FROM opinion_cluster_members
+                                   WHERE mention_id IN (SELECT mention_id FROM opinion_removed))''')
+    cursor.execute("DELETE FROM opinion_cluster_members WHERE mention_id IN (SELECT mention_id FROM opinion_removed)")
+
+# ==========================================
+# 3. 读取
+# ==========================================
+def top_opinion_clusters(cursor, client_key, since, limit=3):
+    """最近活跃 (last_seen >= since) 的簇中最大的几个：[(label, size), ...]"""
+    cursor.execute('''SELECT label, size FROM opinion_clusters
+                      WHERE client_id = ? AND last_seen >= ? AND size > 0
+                      ORDER BY size DESC, last_seen DESC LIMIT ?''', (client_key, since, limit))
+    return cursor.fetchall()
+
+# ==========================================
+# 4. 重算
+# ==========================================
+def rebuild_opinions(days=3, batch_size=500):
+    """清空后按发布时间顺序重算最近 days 天的负面 / 高风险内容 (全局内容与各客户命中)"""
+    run_migrations()
+    conn = sqlite3.connect(DB_FILE, timeout=30.0)
+    c = conn.cursor()
+    since = time.time() - days * 86400
+    c.execute("DELETE FROM opinion_cluster_members")
+    c.execute("DELETE FROM opinion_clusters")
+    c.execute("DELETE FROM opinion_terms")
+    c.execute('''SELECT '', m.id, m.title, m.publish_time FROM mentions m
+                 WHERE m.client_id IS NULL AND m.publish_time >= ? AND m.sentiment_score < ?
+                 AND (m.clean_status IS NULL OR m.clean_status != 'discarded')
+                 UNION ALL
+                 SELECT mm.client_id, mm.mention_id, m.title, mm.publish_time
+                 FROM mention_matches mm JOIN mentions m ON m.id = mm.mention_id
+                 WHERE mm.publish_time >= ? AND (mm.risk_level >= 2 OR mm.sentiment < ?)
+                 AND (m.clean_status IS NULL OR m.clean_status != 'discarded')
+                 ORDER BY 4''', (since, NEGATIVE_SENTIMENT, since, NEGATIVE_SENTIMENT))
+    docs = c.fetchall()
+    assigned = created = 0
+    for start in range(0, len(docs), batch_size):
+        res = assign_opinions(c, docs[start:start + batch_size])
+        assigned += res["assigned"]
+        created += res["created"]
+    conn.commit()
+    conn.close()
+    return {"status": "success", "mentions": len(docs), "assigned": assigned, "clusters": created}
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "rebuild":
+        days = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+        t0 = time.time()
+        print(rebuild_opinions(days))
+        print(f"done in {time.time() - t0:.1f}s")
+    else:
+        print("用法: python radar_opinion.py rebuild [天数]")
@@ -0,0 +1,40 @@
+"""
+游标 (keyset) 分页
+
+列表按 (排序列, id) 倒序，游标记录上一页最后一行的这两个值，下一页用
+    排序列 <= ? AND (排序列 < ? OR id < ?)
+从索引上的位置继续读，不再用 OFFSET 跳过前面所有行，翻到多深都是同样的代价。
+游标对调用方不透明 (base64url 编码)，与原有的 page / page_size 参数并存。
+"""
+import base64
+import json
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(sort_value, row_id):
+    raw = json.dumps([sort_value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(token):
+    """返回 (排序值, id)；格式不对时抛出 InvalidCursor"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        sort_value, row_id = json.loads(raw)
+    except Exception:
+        raise InvalidCursor(f"无效的分页游标: {token}")
+    if not isinstance(sort_value, (int, float)) or isinstance(row_id, bool) or not isinstance(row_id, int):
+        raise InvalidCursor(f"无效的分页游标: {token}")
+    return sort_value, row_id
+
+def keyset_after(sort_col, id_col, position):
+    """position 为 decode_cursor 的结果；返回游标之后 (更旧) 的行的 WHERE 条件与参数"""
+    sort_value, row_id = position
+    return f"{sort_col} <= ? AND ({sort_col} < ? OR {id_col} < ?)", [sort_value, sort_value, row_id]
+
+def next_cursor(rows, limit, sort_index, id_index=0):
+    """取满一页时由最后一行生成下一页的游标，否则返回 None (已到末尾)"""
+    if len(rows) < limit or not rows:
+        return None
+    last = rows[-1]
+    return encode_cursor(last[sort_index], last[id_index])
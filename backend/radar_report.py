@@ -3,6 +3,8 @@ import json
 import time
 import random
 
+from radar_rollup import floor_hour, ROLLUP_HOUR
+
 DB_FILE = "radar_data.db"
 
 def safe_json_load(json_str):
@@ -26,12 +28,13 @@ def get_client_info(client_id):
     except:
         return "未知客户", "未知行业", []
 
-def get_volume(client_name, start_time, end_time):
+def get_volume(client_id, start_time, end_time):
+    """客户在时间段内的命中声量 (小时汇总表，按整点小时对齐)"""
     try:
         conn = sqlite3.connect(DB_FILE)
         c = conn.cursor()
-        c.execute("SELECT count(*) FROM mentions WHERE (title LIKE ? OR content_text LIKE ?) AND publish_time BETWEEN ? AND ?", 
-                  (f"%{client_name}%", f"%{client_name}%", start_time, end_time))
+        c.execute("SELECT COALESCE(sum(total), 0) FROM mention_rollup_hourly WHERE client_id=? AND hour >= ? AND hour < ?", 
+                  (client_id, floor_hour(start_time) + ROLLUP_HOUR, floor_hour(end_time) + ROLLUP_HOUR))
         count = c.fetchone()[0]
         conn.close()
         return count
@@ -55,17 +58,18 @@ def generate_client_report(client_id, time_range_hours=24):
         # 2. 查询数据
         conn = sqlite3.connect(DB_FILE)
         c = conn.cursor()
-        c.execute('''SELECT source, title, sentiment_score, risk_level, match_detail, publish_time 
-                     FROM mentions 
-                     WHERE client_id=? AND publish_time > ? 
-                     ORDER BY publish_time DESC''', (client_id, past_24h))
+        # 客户命中记录 (mention_matches) 关联全局内容
+        c.execute('''SELECT m.source, m.title, mm.sentiment, mm.risk_level, mm.match_detail, mm.publish_time 
+                     FROM mention_matches mm JOIN mentions m ON m.id = mm.mention_id 
+                     WHERE mm.client_id=? AND mm.publish_time > ? 
+                     ORDER BY mm.publish_time DESC''', (client_id, past_24h))
         mentions = c.fetchall()
         conn.close()
 
         total_count = len(mentions)
         
         # 3. 计算指标
-        prev_count = get_volume(client_name, past_48h, past_24h)
+        prev_count = get_volume(client_id, past_48h, past_24h)
         if prev_count == 0: prev_count = 1
         growth_rate = ((total_count - prev_count) / prev_count) * 100
         
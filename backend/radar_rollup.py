@@ -0,0 +1,153 @@
+"""
+按小时预聚合的声量汇总表 mention_rollup_hourly
+
+看板、客户列表、日报、质检等统计不再扫描 mentions / mention_matches 原始行，而是读取按 (客户, 小时, 信源) 汇总的计数：
+    client_id  ''=全局内容，否则为客户命中 (mention_matches)
+    hour       发布时间所在整点 (epoch 秒)
+    total / pos / neg / neu / risk2 / risk3
+以及同口径的全量累计 mention_rollup_totals (每个客户一行)，供客户列表的全量情感分布使用。
+
+口径：
+- 已废弃 (clean_status='discarded') 的内容不计入
+- 情感以人工修正 (manual_sentiment) 为准，否则按分数分档：> 0.3 正面，< -0.1 负面，其余中性；客户命中用命中记录上的情感分
+- risk2 为风险等级 = 2，risk3 为风险等级 >= 3；全局内容本身不评估风险，取其各客户命中中最高的风险等级
+  (客户命中增减时，写入方需对该内容做 -1 / +1 维护)
+
+增量维护：写入方在同一事务内调用 rollup_mentions / rollup_globals / rollup_matches，
+修改已有内容时先以 sign=-1 扣除旧的贡献，更新后再以 sign=+1 加回。
+每次维护同时把受影响客户在 data_generations 中的代数 +1 (看板响应缓存据此失效，见 radar_cache)。
+
+回灌 / 校正: python radar_rollup.py rebuild
+"""
+import sqlite3
+import sys
+import time
+
+from radar_migrations import run_migrations
+from radar_scores import RISK_SQL
+
+DB_FILE = "radar_data.db"
+
+ROLLUP_HOUR = 3600
+GLOBAL_KEY = ""
+
+# 生效的情感档位：1 正面 / -1 负面 / 0 中性
+EFFECTIVE_SENTIMENT = """CASE WHEN m.manual_sentiment = 'positive' THEN 1
+                              WHEN m.manual_sentiment = 'negative' THEN -1
+                              WHEN m.manual_sentiment = 'neutral' THEN 0
+                              WHEN {score} > 0.3 THEN 1
+                              WHEN {score} < -0.1 THEN -1
+                              ELSE 0 END"""
+
+LIVE = "(m.clean_status IS NULL OR m.clean_status != 'discarded')"
+
+# ==========================================
+# 1. 贡献行 (每条全局内容 / 每条客户命中一行)
+# ==========================================
+def _global_rows(where):
+    return f"""SELECT '' AS client_id, COALESCE(m.source, '') AS source, m.publish_time AS publish_time,
+                      {EFFECTIVE_SENTIMENT.format(score="m.sentiment_score")} AS sent, {RISK_SQL} AS risk
+               FROM mentions m
+               WHERE m.client_id IS NULL AND {LIVE} AND m.publish_time IS NOT NULL {where}"""
+
+def _match_rows(where):
+    return f"""SELECT mm.client_id AS client_id, COALESCE(m.source, '') AS source, mm.publish_time AS publish_time,
+                      {EFFECTIVE_SENTIMENT.format(score="mm.sentiment")} AS sent, COALESCE(mm.risk_level, 0) AS risk
+               FROM mention_matches mm JOIN mentions m ON m.id = mm.mention_id
+               WHERE {LIVE} AND mm.publish_time IS NOT NULL {where}"""
+
+COUNTERS_UPSERT = """total = total + excluded.total, pos = pos + excluded.pos, neg = neg + excluded.neg,
+                      neu = neu + excluded.neu, risk2 = risk2 + excluded.risk2, risk3 = risk3 + excluded.risk3"""
+
+def _apply(cursor, rows_sql, sign, bump=True):
+    """把贡献行按 (客户, 小时, 信源) 聚合后累加 (sign=-1 时扣减) 到小时汇总表与全量累计表"""
+    cursor.execute("""CREATE TEMP TABLE IF NOT EXISTS rollup_delta
+                      (client_id TEXT, source TEXT, hour INTEGER, total INTEGER, pos INTEGER, neg INTEGER,
+                       neu INTEGER, risk2 INTEGER, risk3 INTEGER)""")
+    cursor.execute("DELETE FROM rollup_delta")
+    cursor.execute(f"""INSERT INTO rollup_delta (client_id, source, hour, total, pos, neg, neu, risk2, risk3)
+                       SELECT client_id, source, CAST(publish_time / {ROLLUP_HOUR} AS INTEGER) * {ROLLUP_HOUR},
+                              ? * count(*), ? * sum(sent > 0), ? * sum(sent < 0), ? * sum(sent = 0),
+                              ? * sum(risk = 2), ? * sum(risk >= 3)
+                       FROM ({rows_sql})
+                       GROUP BY 1, 2, 3""", [sign] * 6)
+    cursor.execute(f"""INSERT INTO mention_rollup_hourly (client_id, source, hour, total, pos, neg, neu, risk2, risk3)
+                       SELECT client_id, source, hour, total, pos, neg, neu, risk2, risk3 FROM rollup_delta WHERE 1
+                       ON CONFLICT (client_id, hour, source) DO UPDATE SET {COUNTERS_UPSERT}""")
+    cursor.execute(f"""INSERT INTO mention_rollup_totals (client_id, total, pos, neg, neu, risk2, risk3)
+                       SELECT client_id, sum(total), sum(pos), sum(neg), sum(neu), sum(risk2), sum(risk3)
+                       FROM rollup_delta GROUP BY client_id
+                       ON CONFLICT (client_id) DO UPDATE SET {COUNTERS_UPSERT}""")
+    if bump:
+        bump_generations(cursor, "SELECT DISTINCT client_id FROM rollup_delta")
+
+def bump_generations(cursor, client_ids_sql, params=()):
+    """受影响客户的数据代数 +1"""
+    cursor.execute(f"""INSERT INTO data_generations (client_id, generation)
+                       SELECT client_id, 1 FROM ({client_ids_sql}) WHERE 1
+                       ON CONFLICT (client_id) DO UPDATE SET generation = generation + 1""", params)
+
+def _load_ids(cursor, mention_ids):
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS rollup_ids (id INTEGER PRIMARY KEY)")
+    cursor.execute("DELETE FROM rollup_ids")
+    cursor.executemany("INSERT OR IGNORE INTO rollup_ids (id) VALUES (?)", [(int(i),) for i in mention_ids])
+
+# ==========================================
+# 2. 增量维护 (复用调用方的游标，与业务写入在同一事务)
+# ==========================================
+def rollup_globals(cursor, mention_ids, sign=1):
+    """全局内容本身的贡献"""
+    if not mention_ids:
+        return
+    _load_ids(cursor, mention_ids)
+    _apply(cursor, _global_rows("AND m.id IN (SELECT id FROM rollup_ids)"), sign)
+
+def rollup_matches(cursor, pairs, sign=1):
+    """客户命中 [(mention_id, client_id), ...] 的贡献"""
+    if not pairs:
+        return
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS rollup_pairs (mention_id INTEGER, client_id TEXT, PRIMARY KEY (mention_id, client_id))")
+    cursor.execute("DELETE FROM rollup_pairs")
+    cursor.executemany("INSERT OR IGNORE INTO rollup_pairs (mention_id, client_id) VALUES (?,?)", pairs)
+    _apply(cursor, _match_rows("AND (mm.mention_id, mm.client_id) IN (SELECT mention_id, client_id FROM rollup_pairs)"), sign)
+
+def rollup_mentions(cursor, mention_ids, sign=1):
+    """内容本身及其全部客户命中的贡献；修改内容前后各调用一次 (sign=-1 / +1)"""
+    if not mention_ids:
+        return
+    _load_ids(cursor, mention_ids)
+    _apply(cursor, _global_rows("AND m.id IN (SELECT id FROM rollup_ids)"), sign)
+    _apply(cursor, _match_rows("AND mm.mention_id IN (SELECT id FROM rollup_ids)"), sign)
+
+def fill_rollup(cursor):
+    """清空后从原始数据全量重算 (迁移与 rebuild 共用，不改动数据代数)"""
+    cursor.execute("DELETE FROM mention_rollup_hourly")
+    cursor.execute("DELETE FROM mention_rollup_totals")
+    _apply(cursor, _global_rows(""), 1, bump=False)
+    _apply(cursor, _match_rows(""), 1, bump=False)
+
+# ==========================================
+# 3. 整点对齐 / 全量重建
+# ==========================================
+def floor_hour(t):
+    return int(t) - int(t) % ROLLUP_HOUR
+
+def rebuild_rollup():
+    run_migrations()
+    conn = sqlite3.connect(DB_FILE, timeout=30.0)
+    c = conn.cursor()
+    t0 = time.time()
+    fill_rollup(c)
+    # 重算后所有客户的缓存结果一律失效
+    bump_generations(c, "SELECT client_id FROM mention_rollup_totals UNION SELECT client_id FROM data_generations")
+    conn.commit()
+    c.execute("SELECT count(*), COALESCE(sum(total), 0) FROM mention_rollup_hourly")
+    rows, total = c.fetchone()
+    conn.close()
+    return {"status": "success", "rows": rows, "total": total, "elapsed": round(time.time() - t0, 2)}
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "rebuild":
+        print(rebuild_rollup())
+    else:
+        print("usage: python radar_rollup.py rebuild")
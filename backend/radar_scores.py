@@ -0,0 +1,131 @@
+"""
+内容热度 / 质量分 (入库时计算，存入带索引的 mentions.hotness / quality_score，内容库按其排序)
+
+热度 = 基础分 × 时间衰减：
+    基础分 = 风险等级 × 30 + 来源权重 × 0.3 + max(0, 情感分 × 50)   (风险等级取内容与各客户命中中最高的)
+    衰减   = 2 ^ ((publish_time - now) / HOTNESS_HALF_LIFE)
+全部内容按同一个参考时刻 ref (score_state 表) 衰减后存储：hotness = 基础分 × 2 ^ ((publish_time - ref) / 半衰期)，
+同一 ref 下各内容的相对大小与按当前时刻计算时一致，索引顺序就是热度顺序；读取时再乘 2 ^ ((ref - now) / 半衰期)
+得到当前热度。衰减任务 (python radar_scores.py decay，API 进程内每小时一次) 把 ref 推进到当前时刻，按最新的
+风险等级 / 情感 / 来源权重重算 HOTNESS_WINDOW 内的内容，更早的内容热度已可忽略，直接置 0。
+
+质量分 0~100：正文长度、标题长度、来源权重，再乘 (1 - 垃圾分)；只在入库时计算，编辑手动修改后不会被覆盖。
+存量内容由迁移 15 一次性回填。
+"""
+import sqlite3
+import sys
+import threading
+import time
+
+from radar_migrations import run_migrations
+
+DB_FILE = "radar_data.db"
+
+HOTNESS_HALF_LIFE = 12 * 3600
+HOTNESS_WINDOW = 7 * 86400            # 14 个半衰期后热度不足原来的万分之一
+MAX_EXPONENT = 512                    # ref 长期未推进时防止溢出
+DECAY_INTERVAL = 3600
+
+QUALITY_FULL_BODY = 800               # 正文达到 800 字记满分
+QUALITY_TITLE_RANGE = (8, 60)
+
+SOURCE_WEIGHTS = {
+    "微博热搜": 100, "央视新闻": 100, "人民日报": 100, "财联社": 100,
+    "36氪": 80, "虎嗅": 80, "钛媒体": 80, "头条号": 80,
+}
+DEFAULT_SOURCE_WEIGHT = 50
+
+def get_source_weight(source_name):
+    return SOURCE_WEIGHTS.get(source_name, DEFAULT_SOURCE_WEIGHT)
+
+# ==========================================
+# 1. 打分
+# ==========================================
+def hotness_base(risk_level, source, sentiment):
+    return (risk_level or 0) * 30 + get_source_weight(source) * 0.3 + max(0, (sentiment or 0) * 50)
+
+def stored_hotness(base, publish_time, ref):
+    """按参考时刻 ref 衰减后的热度 (写入 mentions.hotness)"""
+    return base * 2 ** min(MAX_EXPONENT, ((publish_time or ref) - ref) / HOTNESS_HALF_LIFE)
+
+def decay_factor(ref, now):
+    """存储值 x 此系数 = now 时刻的热度"""
+    return 2 ** ((ref - now) / HOTNESS_HALF_LIFE)
+
+def quality_score(content_len, title, source, spam_score):
+    body = min(1.0, (content_len or 0) / QUALITY_FULL_BODY)
+    low, high = QUALITY_TITLE_RANGE
+    n = len(title or "")
+    title_fit = 1.0 if low <= n <= high else (n / low if n < low else high / n)
+    score = 40 * body + 20 * title_fit + 40 * get_source_weight(source) / 100
+    return int(round(score * (1 - (spam_score or 0))))
+
+def register_functions(conn):
+    """SQL 中可用 hotness(risk, source, sentiment, publish_time, ref) / quality(content_len, title, source, spam_score)"""
+    conn.create_function("hotness", 5, lambda risk, source, sentiment, t, ref:
+                         stored_hotness(hotness_base(risk, source, sentiment), t, ref), deterministic=True)
+    conn.create_function("quality", 4, quality_score, deterministic=True)
+
+# ==========================================
+# 2. 参考时刻 / 重算
+# ==========================================
+def hotness_ref(cursor):
+    cursor.execute("SELECT value FROM score_state WHERE name='hotness_ref'")
+    row = cursor.fetchone()
+    return row[0] if row else 0.0
+
+# 内容与各客户命中中最高的风险等级
+RISK_SQL = """MAX(COALESCE(m.risk_level, 0),
+                  COALESCE((SELECT max(mm.risk_level) FROM mention_matches mm WHERE mm.mention_id = m.id), 0))"""
+
+def recompute_hotness(cursor, now):
+    """ref 推进到 now：窗口内按当前数据重算，窗口外置 0；返回 (重算条数, 置 0 条数)"""
+    register_functions(cursor.connection)
+    cursor.execute("INSERT OR REPLACE INTO score_state (name, value) VALUES ('hotness_ref', ?)", (now,))
+    cursor.execute(f"""UPDATE mentions AS m SET hotness = hotness({RISK_SQL}, m.source, m.sentiment_score, m.publish_time, ?)
+                       WHERE m.publish_time >= ?""", (now, now - HOTNESS_WINDOW))
+    updated = cursor.rowcount
+    cursor.execute("UPDATE mentions SET hotness = 0 WHERE hotness > 0 AND publish_time < ?", (now - HOTNESS_WINDOW,))
+    return updated, cursor.rowcount
+
+def fill_quality(cursor):
+    """给质量分为空 / 0 的内容打分 (编辑设置过的不动)"""
+    register_functions(cursor.connection)
+    cursor.execute("""UPDATE mentions SET quality_score = quality(length(content_text), title, source, spam_score)
+                      WHERE quality_score IS NULL OR quality_score = 0""")
+    return cursor.rowcount
+
+def decay_hotness(now=None):
+    run_migrations()
+    now = now or time.time()
+    conn = sqlite3.connect(DB_FILE, timeout=30.0)
+    c = conn.cursor()
+    updated, expired = recompute_hotness(c, now)
+    conn.commit()
+    conn.close()
+    return {"status": "success", "updated": updated, "expired": expired, "ref": now}
+
+def run_decay_worker(stop_event, interval=DECAY_INTERVAL):
+    while not stop_event.wait(interval):
+        try:
+            decay_hotness()
+        except sqlite3.Error as e:
+            print(f"[hotness] decay failed: {e}")
+
+def start_decay_worker(interval=DECAY_INTERVAL):
+    """后台定时衰减线程，返回用于停止的 Event"""
+    stop_event = threading.Event()
+    threading.Thread(target=run_decay_worker, args=(stop_event, interval), name="hotness-decay", daemon=True).start()
+    return stop_event
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "decay":
+        print(decay_hotness())
+    elif len(sys.argv) > 1 and sys.argv[1] == "backfill-quality":
+        run_migrations()
+        conn = sqlite3.connect(DB_FILE, timeout=30.0)
+        print({"status": "success", "scored": fill_quality(conn.cursor())})
+        conn.commit()
+        conn.close()
+    else:
+        print("用法: python radar_scores.py decay | backfill-quality")
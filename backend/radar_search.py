@@ -0,0 +1,56 @@
+"""
+全文检索 (SQLite FTS5, trigram 分词)
+
+trigram 分词按 3 个字符切分，中文子串无需分词即可命中，查询语义与 LIKE '%关键词%' 一致 (不区分大小写)，
+但走倒排索引而不是逐行扫描正文。索引表为外部内容表，由触发器与原表保持同步：
+    mentions_fts   title / content_text / ai_fact / event_title  (迁移 13)
+    articles_fts   title / summary / content                    (radar_articles.init_article_db)
+少于 3 个字的关键词无法用 trigram 索引，调用方退回 LIKE。
+"""
+MIN_FTS_CHARS = 3
+
+HIGHLIGHT_OPEN = "<mark>"
+HIGHLIGHT_CLOSE = "</mark>"
+SNIPPET_ELLIPSIS = "…"
+SNIPPET_TOKENS = 24
+
+# bm25 各列权重 (与建表时的列顺序一致)：标题命中最重要
+MENTION_WEIGHTS = (10.0, 1.0, 3.0, 5.0)
+ARTICLE_WEIGHTS = (10.0, 3.0, 1.0)
+
+def fts_phrase(text):
+    """整个关键词作为一个短语查询 (与 LIKE 子串语义一致)；过短时返回 None"""
+    text = (text or "").strip()
+    if len(text) < MIN_FTS_CHARS:
+        return None
+    return '"' + text.replace('"', '""') + '"'
+
+def bm25(table, weights):
+    return f"bm25({table}, {', '.join(str(w) for w in weights)})"
+
+def highlight(table, column):
+    return f"highlight({table}, {column}, '{HIGHLIGHT_OPEN}', '{HIGHLIGHT_CLOSE}')"
+
+def snippet(table, column):
+    return f"snippet({table}, {column}, '{HIGHLIGHT_OPEN}', '{HIGHLIGHT_CLOSE}', '{SNIPPET_ELLIPSIS}', {SNIPPET_TOKENS})"
+
+def _fts_triggers(cursor, table, fts_table, columns, key="id"):
+    """外部内容 FTS 表的同步触发器：插入 / 删除 / 更新被索引的列"""
+    cols = ", ".join(columns)
+    new_vals = ", ".join(f"new.{col}" for col in columns)
+    old_vals = ", ".join(f"old.{col}" for col in columns)
+    insert_new = f"INSERT INTO {fts_table} (rowid, {cols}) VALUES (new.{key}, {new_vals});"
+    delete_old = f"INSERT INTO {fts_table} ({fts_table}, rowid, {cols}) VALUES ('delete', old.{key}, {old_vals});"
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN {insert_new} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN {delete_old} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {cols} ON {table} BEGIN {delete_old} {insert_new} END")
+
+def create_fts(cursor, table, fts_table, columns, key="id"):
+    """建外部内容 FTS 表与触发器；新建时从原表一次性重建索引"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (fts_table,))
+    exists = cursor.fetchone() is not None
+    cursor.execute(f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5
+                       ({", ".join(columns)}, content='{table}', content_rowid='{key}', tokenize='trigram')""")
+    _fts_triggers(cursor, table, fts_table, columns, key)
+    if not exists:
+        cursor.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
@@ -3,6 +3,8 @@ import sqlite3
 import time
 from typing import Optional, List
 
+from radar_pagination import decode_cursor, keyset_after, next_cursor
+
 DB_FILE = "radar_data.db"
 
 # ==========================================
@@ -25,6 +27,8 @@ def init_selection_db():
                   note TEXT,
                   created_at REAL,
                   updated_at REAL)''')
+    # 选题列表按用户、创建时间倒序分页
+    c.execute("CREATE INDEX IF NOT EXISTS idx_selections_user_created ON selections(user_id, created_at)")
                   
     conn.commit()
     conn.close()
@@ -56,7 +60,13 @@ def add_selection(user_id: str, topic: str, source: str = "Manual", hotspot_id:
     conn.close()
     return {"status": "success", "id": sid}
 
-def get_selections(user_id: str, status: Optional[str] = None, page: int = 1, page_size: int = 20):
+def get_selections(user_id: str, status: Optional[str] = None, page: int = 1, page_size: int = 20,
+                   cursor: Optional[str] = None):
+    """
+    cursor: 游标分页 (见 radar_pagination)，按 (created_at, id) 倒序续接，传空字符串从第一页开始；
+            传入时忽略 page，不计算总数
+    """
+    position = decode_cursor(cursor) if cursor else None
     conn = sqlite3.connect(DB_FILE)
     c = conn.cursor()
     
@@ -67,15 +77,25 @@ def get_selections(user_id: str, status: Optional[str] = None, page: int = 1, pa
         sql += " AND status=?"
         params.append(status)
         
-    # Count
-    count_sql = sql.replace("SELECT id, topic, source, status, created_at, updated_at", "SELECT count(*)")
-    c.execute(count_sql, params)
-    total = c.fetchone()[0]
+    # Count (游标分页不计数)
+    total = None
+    if cursor is None:
+        count_sql = sql.replace("SELECT id, topic, source, status, created_at, updated_at", "SELECT count(*)")
+        c.execute(count_sql, params)
+        total = c.fetchone()[0]
     
     # Pagination
-    sql += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
-    offset = (page - 1) * page_size
-    params.extend([page_size, offset])
+    if position:
+        keyset_sql, keyset_params = keyset_after("created_at", "id", position)
+        sql += " AND " + keyset_sql
+        params.extend(keyset_params)
+    sql += " ORDER BY created_at DESC, id DESC"
+    if cursor is not None:
+        sql += " LIMIT ?"
+        params.append(page_size)
+    else:
+        sql += " LIMIT ? OFFSET ?"
+        params.extend([page_size, (page - 1) * page_size])
     
     c.execute(sql, params)
     rows = c.fetchall()
@@ -96,7 +116,8 @@ def get_selections(user_id: str, status: Optional[str] = None, page: int = 1, pa
         "items": items,
         "total": total,
         "page": page,
-        "page_size": page_size
+        "page_size": page_size,
+        "next_cursor": next_cursor(rows, page_size, 4)
     }
 
 def update_selection_status(selection_id: int, user_id: str, status: str):
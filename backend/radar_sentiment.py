@@ -0,0 +1,170 @@
+"""
+情感词典打分模块 (入库打分 / 热榜兜底情感 / 细粒度情绪 共用)
+
+所有正面词、负面词、情绪词在模块加载时编译进同一个正则，每条文本只扫描一遍，
+得到的词集合同时供入库情感分、兜底情感、细粒度情绪使用；
+否定判断 (「不/没/无/非」+ 至多 2 个字 + 负面词) 的正则也只编译一次，且只对实际出现的负面词执行。
+"""
+import re
+import random
+
+# ==========================================
+# 1. 词典
+# ==========================================
+
+# 入库打分 (process_monitor_data / 内容库纠偏)
+MONITOR_NEG_KEYWORDS = ["起火", "自燃", "冒烟", "爆炸", "维权", "造假", "破产", "去世", "调查", "暴雷", "事故", "缺陷", "投诉", "致歉", "翻车"]
+MONITOR_POS_KEYWORDS = ["遥遥领先", "大涨", "突破", "创新", "第一", "首发", "获赞", "好评"]
+NEGATION_CHARS = "不没无非"
+NEGATION_WINDOW = 2
+
+# 热榜兜底情感 (enrich_items)
+FALLBACK_POS_KEYWORDS = ["突破", "大涨", "新高", "发布", "成功", "增长", "获批", "首发", "利好"]
+FALLBACK_NEG_KEYWORDS = ["裁员", "暴跌", "亏损", "调查", "罚款", "警示", "下跌", "失败", "漏洞"]
+
+# 细粒度情绪 (关键词, 情绪, 基础分)
+EMOTION_RULES = [
+    (["裁员", "制裁", "担忧", "风险", "警告", "延期", "暴雷"], "anxiety", 60),
+    (["被查", "罚款", "侵权", "丑闻", "造假", "抗议", "做空"], "anger", 70),
+    (["逝世", "暴跌", "亏损", "失败", "腰斩", "惨淡"], "sadness", 60),
+    (["首发", "突破", "大涨", "新高", "获批", "重磅", "遥遥领先"], "excitement", 80),
+    (["反转", "吃瓜", "打脸", "离谱", "震惊", "辟谣"], "sarcasm", 50)
+]
+
+# ==========================================
+# 2. 打分器
+# ==========================================
+
+class LexiconScorer:
+    """
+    全部词典按长度降序编译成一个分支正则，一次 findall 得到文本中出现的词，再与各词表做集合运算。
+    正则匹配不重叠，被报出的词可能遮住别的词：
+    - 被包含的短词 (如长词里的子串) 直接由包含关系补齐
+    - 首尾重叠的词 (如「创新」与「新高」) 只在对应的词被报出时再用 `in` 复核
+    因此结果与逐词 `in` 判断完全一致。
+    """
+
+    def __init__(self):
+        words = set(MONITOR_NEG_KEYWORDS) | set(MONITOR_POS_KEYWORDS) | set(FALLBACK_POS_KEYWORDS) | set(FALLBACK_NEG_KEYWORDS)
+        for keywords, _, _ in EMOTION_RULES:
+            words.update(keywords)
+        ordered = sorted(words, key=len, reverse=True)
+        self._pattern = re.compile("|".join(re.escape(w) for w in ordered))
+        # 词 -> 它所包含的所有词典词 (含自身)
+        self._contains = {w: frozenset(x for x in words if x in w) for w in words}
+        # 词 -> 与它首尾重叠、可能被它遮住的词
+        self._masks = {}
+        for v in words:
+            masked = frozenset(w for w in words if w != v and any(v[-k:] == w[:k] for k in range(1, min(len(v), len(w)))))
+            if masked:
+                self._masks[v] = masked
+        # 需要补齐包含 / 重叠关系的词，其余词被报出即代表自身
+        self._complex = frozenset(w for w in words if len(self._contains[w]) > 1 or w in self._masks)
+        # 否定规则与原先一致：否定字 + 至多 2 个字 + 负面词，每个负面词的正则只编译一次
+        self._negation = {kw: re.compile(f"[{NEGATION_CHARS}].{{0,{NEGATION_WINDOW}}}{re.escape(kw)}") for kw in MONITOR_NEG_KEYWORDS}
+        # 入库打分用的词性：-1 负面 / 1 正面
+        self._monitor_kind = {kw: -1 for kw in MONITOR_NEG_KEYWORDS}
+        self._monitor_kind.update({kw: 1 for kw in MONITOR_POS_KEYWORDS})
+        self._fallback_pos = frozenset(FALLBACK_POS_KEYWORDS)
+        self._fallback_neg = frozenset(FALLBACK_NEG_KEYWORDS)
+        self._emotion_words = frozenset(w for keywords, _, _ in EMOTION_RULES for w in keywords)
+
+    def scan(self, text):
+        """一次扫描：返回文本中出现的词典词集合"""
+        reported = self._pattern.findall(text)
+        return self._expand(text, reported) if reported else set()
+
+    def _expand(self, text, reported):
+        found = set(reported)
+        if not found.isdisjoint(self._complex):
+            contains, masks = self._contains, self._masks
+            for w in found & self._complex:
+                found |= contains[w]
+                for m in masks.get(w, ()):
+                    if m not in found and m in text:
+                        found |= contains[m]
+        return found
+
+    def monitor_score(self, text, hits=None):
+        """入库情感分 [-1, 1]：负面词 -0.5 (被否定的跳过)，正面词 +0.3"""
+        hits = self.scan(text) if hits is None else hits
+        neg = 0
+        pos = 0
+        for w in hits:
+            kind = self._monitor_kind.get(w)
+            if kind is None:
+                continue
+            if kind < 0:
+                if not self._negation[w].search(text):
+                    neg += 1
+            else:
+                pos += 1
+        # 与原实现相同的累加顺序，保证浮点结果逐位一致
+        score = 0.0 - 0.5 * neg
+        for _ in range(pos):
+            score += 0.3
+        if score < -1.0: return -1.0
+        if score > 1.0: return 1.0
+        return score
+
+    def monitor_scores(self, texts):
+        """批量入库情感分：未命中任何词典词的文本直接记 0 分"""
+        findall = self._pattern.findall
+        scores = []
+        for text in texts:
+            reported = findall(text)
+            if reported:
+                scores.append(self.monitor_score(text, self._expand(text, reported)))
+            else:
+                scores.append(0.0)
+        return scores
+
+    def fallback_sentiment(self, title, hits=None):
+        hits = self.scan(title) if hits is None else hits
+        score = len(hits & self._fallback_pos) - len(hits & self._fallback_neg)
+
+        if score > 0: return {"positive": 80, "neutral": 15, "negative": 5}
+        elif score < 0: return {"positive": 5, "neutral": 15, "negative": 80}
+        else: return {"positive": 10, "neutral": 80, "negative": 10}
+
+    def fallback_emotions(self, title, hits=None):
+        hits = self.scan(title) if hits is None else hits
+        emotions = { "anxiety": 5, "anger": 5, "sadness": 5, "excitement": 5, "sarcasm": 5 }
+        if hits.isdisjoint(self._emotion_words):
+            return emotions
+        # 按规则顺序取随机抖动，随机数的消耗顺序与原实现一致
+        for keywords, emo_key, score in EMOTION_RULES:
+            for k in keywords:
+                if k in hits:
+                    emotions[emo_key] = max(emotions[emo_key], score + random.randint(-10, 10))
+        return emotions
+
+SCORER = LexiconScorer()
+
+# ==========================================
+# 3. 对外接口 (单条 / 批量)
+# ==========================================
+
+def score_sentiment(text):
+    return SCORER.monitor_score(text)
+
+def score_sentiments(texts):
+    """批量入库情感分"""
+    return SCORER.monitor_scores(texts)
+
+def fallback_sentiment(title):
+    return SCORER.fallback_sentiment(title)
+
+def fallback_emotions(title):
+    return SCORER.fallback_emotions(title)
+
+def analyze_titles(titles):
+    """批量兜底分析：每个标题只扫描一次，同时产出情感分布与细粒度情绪"""
+    results = []
+    for title in titles:
+        hits = SCORER.scan(title)
+        results.append({
+            "sentiment": SCORER.fallback_sentiment(title, hits),
+            "emotions": SCORER.fallback_emotions(title, hits)
+        })
+    return results
@@ -0,0 +1,106 @@
+"""
+垃圾广告识别 (入库时每条内容打分一次)
+
+spam_score 在 0~1 之间，由几项独立特征按「噪声或」合成：score = 1 - ∏(1 - s_i)
+- 关键词：兼职 / 刷单 / 日结 ... 按权重计分，共享一个 Aho-Corasick 自动机，标题 + 正文只扫描一遍
+- 联系方式：手机号、QQ / 微信号
+- 链接密度：链接字符占正文的比例
+- 重复短语：字符 4-gram 的重复比例 (刷屏式复制粘贴)
+spam_score >= SPAM_THRESHOLD 记为 is_spam=1。结果写入 mentions.spam_score / is_spam，
+质检统计与内容库按 (client_id, is_spam, publish_time) 索引过滤，不再对正文做 LIKE 扫描。
+
+给存量内容打分: python radar_spam.py backfill
+"""
+import re
+import sqlite3
+import sys
+import time
+
+from radar_matcher import KeywordAutomaton
+from radar_migrations import run_migrations
+
+DB_FILE = "radar_data.db"
+
+SPAM_THRESHOLD = 0.5
+MAX_SCAN_CHARS = 2000        # 只看开头的若干字，垃圾广告的特征集中在开头
+SHINGLE = 4
+
+# 关键词权重：单独出现的泛用词 (代理 / 招募) 不足以判为垃圾，多个词同时出现才会越过阈值
+SPAM_KEYWORDS = {
+    "刷单": 0.5, "博彩": 0.5, "日赚": 0.4, "躺赚": 0.4, "无抵押": 0.4, "不限时间地点": 0.4,
+    "加微信": 0.4, "加v": 0.4, "兼职": 0.35, "日结": 0.3, "返利": 0.3, "免费领取": 0.3,
+    "点击链接": 0.3, "微商": 0.3, "代购": 0.2, "私聊": 0.2, "扫码": 0.2, "优惠券": 0.2,
+    "宝妈": 0.2, "贷款": 0.2, "代理": 0.15, "招募": 0.1,
+}
+KEYWORD_CAP = 0.9
+
+_AUTOMATON = KeywordAutomaton(SPAM_KEYWORDS)
+_CONTACT = re.compile(r"(?<!\d)1[3-9]\d{9}(?!\d)|(?:qq|vx|wx|微信|薇信|威信)[:：号\s]*[a-z0-9_-]{5,}")
+_LINK = re.compile(r"(?:https?://|www\.)\S+")
+_NON_WORD = re.compile(r"[\W_]+")
+
+def _keyword_score(text):
+    return min(KEYWORD_CAP, sum(SPAM_KEYWORDS[kw] for kw in _AUTOMATON.find_all(text)))
+
+def _link_score(text):
+    link_chars = sum(len(m) for m in _LINK.findall(text))
+    # 链接占比 20% 以上记满分
+    return min(1.0, link_chars / max(1, len(text)) * 5)
+
+def _repeat_score(text):
+    compact = _NON_WORD.sub("", text)
+    total = len(compact) - SHINGLE + 1
+    if total < 20:
+        return 0.0
+    unique = len({compact[i:i + SHINGLE] for i in range(total)})
+    # 正常文本的 4-gram 几乎不重复；一半以上重复记满分
+    return min(1.0, max(0.0, 1 - unique / total) * 2)
+
+def score_spam(title, content=""):
+    text = f"{title or ''} {content or ''}"[:MAX_SCAN_CHARS].lower()
+    features = [_keyword_score(text), _link_score(text), _repeat_score(text)]
+    if _CONTACT.search(text):
+        features.append(0.3)
+    keep = 1.0
+    for s in features:
+        keep *= 1 - s
+    return round(1 - keep, 3)
+
+def is_spam(score):
+    return 1 if score >= SPAM_THRESHOLD else 0
+
+# ==========================================
+# 存量回填
+# ==========================================
+def backfill_spam(batch_size=1000):
+    """给 spam_score 为空的内容打分，按 id 分批提交"""
+    run_migrations()
+    conn = sqlite3.connect(DB_FILE, timeout=30.0)
+    c = conn.cursor()
+    last_id = 0
+    scored = flagged = 0
+    while True:
+        c.execute("SELECT id, title, content_text FROM mentions WHERE id > ? AND spam_score IS NULL ORDER BY id LIMIT ?",
+                  (last_id, batch_size))
+        rows = c.fetchall()
+        if not rows:
+            break
+        updates = []
+        for mention_id, title, content in rows:
+            score = score_spam(title, content)
+            updates.append((score, is_spam(score), mention_id))
+            flagged += is_spam(score)
+        c.executemany("UPDATE mentions SET spam_score=?, is_spam=? WHERE id=?", updates)
+        conn.commit()
+        scored += len(rows)
+        last_id = rows[-1][0]
+    conn.close()
+    return {"status": "success", "scored": scored, "spam": flagged}
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "backfill":
+        t0 = time.time()
+        print(backfill_spam())
+        print(f"done in {time.time() - t0:.1f}s")
+    else:
+        print("用法: python radar_spam.py backfill")
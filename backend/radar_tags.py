@@ -4,6 +4,8 @@ import json
 from typing import List, Optional
 from pydantic import BaseModel
 
+from radar_migrations import run_migrations
+
 DB_FILE = "radar_data.db"
 
 # ==========================================
@@ -31,20 +33,8 @@ class TagUpdateReq(BaseModel):
 # ==========================================
 
 def init_tag_db():
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    # 标签表
-    c.execute('''CREATE TABLE IF NOT EXISTS tags (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        tag_type TEXT NOT NULL, 
-        alias TEXT,
-        count INTEGER DEFAULT 0,
-        create_time REAL,
-        UNIQUE(name, tag_type)
-    )''')
-    conn.commit()
-    conn.close()
+    # tags / article_tags 见 radar_migrations 第 5 版
+    run_migrations()
 
 def get_tags(tag_type=None):
     conn = sqlite3.connect(DB_FILE)
@@ -0,0 +1,47 @@
+"""
+检查脚本 (test_*.py) 共用的临时数据库
+
+各模块 import 时会在当前目录建表，检查脚本在临时目录里导入，不碰仓库里的 radar_data.db：
+
+    DB = TempDatabase("radar_dedup_")
+    with DB.imports():
+        import radar_monitor
+
+    def setup_module(module=None):
+        DB.enter()
+
+    def teardown_module(module=None):
+        DB.leave()
+
+数据库按相对路径打开，用例运行期间才进入临时目录。同一进程里先运行的检查已经导入过这些模块时，
+import 不会再建表，所以进入时在临时目录里执行全部迁移：多个检查可以同一进程运行 (pytest 一次跑多个文件)。
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+
+from radar_migrations import run_migrations
+
+class TempDatabase:
+    def __init__(self, prefix):
+        self.path = tempfile.mkdtemp(prefix=prefix)
+        self._previous = None
+
+    @contextmanager
+    def imports(self):
+        """在临时目录里导入模块，导入后切回原目录"""
+        previous = os.getcwd()
+        os.chdir(self.path)
+        try:
+            yield
+        finally:
+            os.chdir(previous)
+
+    def enter(self):
+        """进入临时目录并执行迁移 (setup_module 中调用)"""
+        self._previous = os.getcwd()
+        os.chdir(self.path)
+        run_migrations()
+
+    def leave(self):
+        os.chdir(self._previous)
@@ -12,6 +12,7 @@ from concurrent.futures import ThreadPoolExecutor
 
 # 引用 AI
 from radar_ai import generate_news_summary
+from radar_sentiment import fallback_sentiment, fallback_emotions, analyze_titles
 
 DB_FILE = "radar_data.db"
 CACHE_EXPIRE_SECONDS = 600
@@ -39,35 +40,12 @@ def calculate_heat(source_name, score, rank):
     score_boost = (score / 60) ** 2 
     return int(base * rank_drop * score_boost * random.uniform(0.9, 1.1))
 
-# === 智能兜底：基础情感 ===
+# === 智能兜底：基础情感 / 细粒度情绪 (共享预编译词典，见 radar_sentiment) ===
 def calculate_fallback_sentiment(title):
-    pos_keywords = ["突破", "大涨", "新高", "发布", "成功", "增长", "获批", "首发", "利好"]
-    neg_keywords = ["裁员", "暴跌", "亏损", "调查", "罚款", "警示", "下跌", "失败", "漏洞"]
-    score = 0
-    for k in pos_keywords:
-        if k in title: score += 1
-    for k in neg_keywords:
-        if k in title: score -= 1
-        
-    if score > 0: return {"positive": 80, "neutral": 15, "negative": 5}
-    elif score < 0: return {"positive": 5, "neutral": 15, "negative": 80}
-    else: return {"positive": 10, "neutral": 80, "negative": 10}
+    return fallback_sentiment(title)
 
-# === 智能兜底：细粒度情绪 ===
 def calculate_fallback_emotions(title):
-    emotions = { "anxiety": 5, "anger": 5, "sadness": 5, "excitement": 5, "sarcasm": 5 }
-    rules = [
-        (["裁员", "制裁", "担忧", "风险", "警告", "延期", "暴雷"], "anxiety", 60),
-        (["被查", "罚款", "侵权", "丑闻", "造假", "抗议", "做空"], "anger", 70),
-        (["逝世", "暴跌", "亏损", "失败", "腰斩", "惨淡"], "sadness", 60),
-        (["首发", "突破", "大涨", "新高", "获批", "重磅", "遥遥领先"], "excitement", 80),
-        (["反转", "吃瓜", "打脸", "离谱", "震惊", "辟谣"], "sarcasm", 50)
-    ]
-    for keywords, emo_key, score in rules:
-        for k in keywords:
-            if k in title:
-                emotions[emo_key] = max(emotions[emo_key], score + random.randint(-10, 10))
-    return emotions
+    return fallback_emotions(title)
 
 # === 抓取工具 ===
 def fetch_page_content(url):
@@ -86,8 +64,11 @@ def fetch_page_content(url):
 
 def enrich_items(items, source_name):
     print(f"[{source_name}] 抓取成功 {len(items)} 条，正在进行 AI 分析...")
+    # 兜底情感 / 情绪整批预先算好，AI 未返回时直接取用
+    fallbacks = analyze_titles([item['title'] for item in items])
     
-    def process(item):
+    def process(args):
+        item, fallback = args
         item['source'] = source_name 
         
         try:
@@ -103,11 +84,11 @@ def enrich_items(items, source_name):
         
         sentiment = ai_data.get('sentiment')
         if not isinstance(sentiment, dict):
-             sentiment = calculate_fallback_sentiment(item['title'])
+             sentiment = fallback['sentiment']
              
         emotions = ai_data.get('emotions')
         if not isinstance(emotions, dict):
-            emotions = calculate_fallback_emotions(item['title'])
+            emotions = fallback['emotions']
 
         item.update({
             'heat': calculate_heat(source_name, score, item.get('rank', 10)),
@@ -124,7 +105,7 @@ def enrich_items(items, source_name):
         return item
 
     with ThreadPoolExecutor(max_workers=5) as executor:
-        result = list(executor.map(process, items))
+        result = list(executor.map(process, zip(items, fallbacks)))
     
     return result
 
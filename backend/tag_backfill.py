@@ -47,8 +47,8 @@ def refresh_tags_from_json():
              cat_id = get_tag_id_by_name(category, "CATEGORY")
              if cat_id:
                   try:
-                      c.execute("INSERT OR IGNORE INTO article_tags (article_id, tag_id, confidence, source) VALUES (?, ?, ?, ?)",
-                                (str(m_id), cat_id, 1.0, 'Backfill'))
+                      c.execute("INSERT OR IGNORE INTO article_tags (article_id, mention_id, tag_id, confidence, source) VALUES (?, ?, ?, ?, ?)",
+                                (str(m_id), m_id, cat_id, 1.0, 'Backfill'))
                       new_links += c.rowcount
                   except: pass
 
@@ -70,8 +70,8 @@ def refresh_tags_from_json():
             
             if tid:
                 try:
-                    c.execute("INSERT OR IGNORE INTO article_tags (article_id, tag_id, confidence, source) VALUES (?, ?, ?, ?)",
-                              (str(m_id), tid, 1.0, 'Backfill'))
+                    c.execute("INSERT OR IGNORE INTO article_tags (article_id, mention_id, tag_id, confidence, source) VALUES (?, ?, ?, ?, ?)",
+                              (str(m_id), m_id, tid, 1.0, 'Backfill'))
                     if c.rowcount > 0:
                         c.execute("UPDATE tags SET count = count + 1 WHERE id=?", (tid,))
                         new_links += 1
@@ -0,0 +1,87 @@
+"""
+近重复判定检查
+
+在临时目录里建一个全新的数据库：
+- 同一模板、只差编号的短标题是不同事件，不归入同一个簇，各自照常预警
+- 换来源后缀的转载稿仍归入原稿的簇，重复内容也照常预警 (标明 duplicate)
+- 存量回填时簇代表始终是发布时间最早的一条
+
+用法: python test_dedup.py   (也可以用 pytest 运行)
+"""
+import os
+import sys
+import sqlite3
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BACKEND_DIR)
+
+from radar_testdb import TempDatabase
+
+DB = TempDatabase("radar_dedup_")
+with DB.imports():
+    import radar_monitor
+    import radar_dedup
+    from radar_dedup import title_fingerprint, is_near_duplicate
+
+def setup_module(module=None):
+    global CLIENT_ID
+    DB.enter()
+    CLIENT_ID = radar_monitor.save_full_client_config("判重测试", "汽车", 1, {"brand_keywords": ["特斯拉"]})["client_id"]
+
+def teardown_module(module=None):
+    DB.leave()
+
+def item(title, key):
+    return {"title": title, "source": "微博", "url": f"https://example.com/dedup/{key}", "summary": {"fact": "", "angle": ""}}
+
+def rows(where, params=()):
+    conn = sqlite3.connect("radar_data.db")
+    result = conn.execute(f"SELECT id, cluster_id, is_duplicate FROM mentions WHERE {where} ORDER BY id", params).fetchall()
+    conn.close()
+    return result
+
+# ==========================================
+# 用例
+# ==========================================
+
+def test_template_titles_are_distinct():
+    assert is_near_duplicate(title_fingerprint("特斯拉上海工厂发生起火事故 第1起"),
+                             title_fingerprint("特斯拉上海工厂发生起火事故 第2起")) is None
+    result = radar_monitor.process_monitor_data([item(f"特斯拉 起火 事故 {i}", f"incident/{i}") for i in range(1, 9)])
+    assert result["processed"] == 8
+    assert len(result["alerts"]) == 8
+    assert all(dup == 0 for _, _, dup in rows("url LIKE ?", ("https://example.com/dedup/incident/%",)))
+
+def test_repost_is_duplicate_and_still_alerts():
+    assert is_near_duplicate(title_fingerprint("小米汽车SU7发布会定价公布，起售价21.59万元"),
+                             title_fingerprint("小米汽车SU7发布会定价公布,起售价21.59万元 - 新浪财经")) is not None
+    original = "特斯拉召回部分进口车型，涉及起火维权与电池调查风险问题"
+    result = radar_monitor.process_monitor_data([item(original, "repost/0"), item(original + " - 新浪财经", "repost/1")])
+    (first_id, first_cluster, first_dup), (second_id, second_cluster, second_dup) = rows("url LIKE ?", ("https://example.com/dedup/repost/%",))
+    assert (first_cluster, first_dup) == (first_id, 0)
+    assert (second_cluster, second_dup) == (first_id, 1)
+    assert [a["duplicate"] for a in result["alerts"]] == [False, True]
+
+def test_backfill_keeps_earliest_representative():
+    title = "比亚迪二季度销量同比增长四成创下历史新高，海外市场贡献过半"
+    # 新稿已在入库时分簇 (自己是簇代表)，更早发布的原稿后来才回填
+    radar_monitor.process_monitor_data([item(title + " | 虎嗅", "backfill/new")])
+    conn = sqlite3.connect("radar_data.db")
+    conn.execute("""INSERT INTO mentions (source, title, content_text, url, publish_time, is_duplicate)
+                    VALUES ('36氪', ?, ?, 'https://example.com/dedup/backfill/old', ?, 0)""", (title, title, time.time() - 3600))
+    conn.commit()
+    conn.close()
+    radar_dedup.backfill_clusters()
+    new_id, old_id = [r[0] for r in rows("url IN (?, ?)", ("https://example.com/dedup/backfill/new",
+                                                           "https://example.com/dedup/backfill/old"))]
+    assert rows("id = ?", (old_id,)) == [(old_id, old_id, 0)]
+    assert rows("id = ?", (new_id,)) == [(new_id, old_id, 1)]
+
+if __name__ == "__main__":
+    setup_module()
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
+    teardown_module()
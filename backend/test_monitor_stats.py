@@ -0,0 +1,157 @@
+"""
+看板统计口径检查
+
+在临时目录里建一个全新的数据库，入库一批命中客户的高风险内容后对比全局看板与客户看板：
+全局内容本身不评估风险，全局看板的风险计数取各条内容在客户命中中最高的风险等级，应与客户看板一致。
+大批内容被废弃 (批量审核 / 拉黑信源) 时从看板的观点簇中移除，在 SQL 变量上限为 999 的 SQLite 上也不报错。
+编辑标题 / 正文后垃圾分、质量分与热度按入库口径重算，数据质检的垃圾计数随之变化。
+
+用法: python test_monitor_stats.py   (也可以用 pytest 运行)
+"""
+import os
+import sys
+import sqlite3
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BACKEND_DIR)
+
+from radar_testdb import TempDatabase
+
+DB = TempDatabase("radar_stats_")
+with DB.imports():
+    import radar_monitor
+    import radar_rollup
+    import radar_scores
+
+INCIDENTS = ["工厂爆炸", "车主集体维权", "被消费者起诉", "财报造假", "经销商破产", "监管部门调查", "电池暴雷", "门店维权"]
+
+def setup_module(module=None):
+    global CLIENT_ID
+    DB.enter()
+    CLIENT_ID = radar_monitor.save_full_client_config("统计测试", "汽车", 1, {"brand_keywords": ["特斯拉"]})["client_id"]
+
+def teardown_module(module=None):
+    DB.leave()
+
+def ingest_high_risk():
+    items = [{"title": f"特斯拉{incident}，第{i}地区用户愤怒投诉质量问题严重", "source": "微博",
+              "url": f"https://example.com/risk/{i}", "summary": {"fact": "负面", "angle": "风险"}}
+             for i, incident in enumerate(INCIDENTS)]
+    return radar_monitor.process_monitor_data(items)
+
+# ==========================================
+# 用例
+# ==========================================
+
+def test_global_risk_count_after_high_risk_ingest():
+    result = ingest_high_risk()
+    assert result["processed"] == len(INCIDENTS)
+    assert len(result["alerts"]) == len(INCIDENTS)
+    client = radar_monitor.get_monitor_stats(CLIENT_ID)
+    overall = radar_monitor.get_monitor_stats()
+    assert client["risk_count"] == len(INCIDENTS)
+    assert overall["risk_count"] == client["risk_count"]
+    assert overall["prophet"]["level"] == client["prophet"]["level"] == 2
+
+def test_global_risk_count_after_client_deleted():
+    radar_monitor.delete_client_by_id(CLIENT_ID)
+    assert radar_monitor.get_monitor_stats()["risk_count"] == 0
+    # 增量维护的结果与全量重算一致
+    before = radar_monitor.get_monitor_stats()
+    radar_rollup.rebuild_rollup()
+    assert radar_monitor.get_monitor_stats()["risk_count"] == before["risk_count"]
+
+def limited_connect(*args, **kwargs):
+    """模拟编译时 SQLITE_MAX_VARIABLE_NUMBER=999 的 SQLite"""
+    conn = _connect(*args, **kwargs)
+    conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+    return conn
+
+_connect = sqlite3.connect
+
+def opinion_members(source):
+    conn = _connect("radar_data.db")
+    count = conn.execute("""SELECT count(*) FROM opinion_cluster_members mb JOIN mentions m ON m.id = mb.mention_id
+                            WHERE m.source = ?""", (source,)).fetchone()[0]
+    conn.close()
+    return count
+
+def ingest_negative(source, n):
+    items = [{"title": f"{source}第{i}号投诉：产品质量差劲售后推诿，用户愤怒维权{i * 7919 % 10007}", "source": source,
+              "url": f"https://example.com/{source}/{i}", "summary": {"fact": "负面", "angle": "投诉"}} for i in range(n)]
+    radar_monitor.process_monitor_data(items)
+
+def test_bulk_discard_many_ids_under_variable_limit():
+    ingest_negative("批量源", 1200)
+    assert opinion_members("批量源") > 999
+    conn = _connect("radar_data.db")
+    ids = [r[0] for r in conn.execute("SELECT id FROM mentions WHERE source = ?", ("批量源",))]
+    conn.close()
+    sqlite3.connect = limited_connect
+    try:
+        result = radar_monitor.bulk_moderate([{"op": "discard"}], mention_ids=ids)
+    finally:
+        sqlite3.connect = _connect
+    assert result["status"] == "success", result
+    assert opinion_members("批量源") == 0
+
+def test_blacklist_many_ids_under_variable_limit():
+    ingest_negative("拉黑源", 1200)
+    # 拉黑只废弃 clean_status 为空的存量内容
+    conn = _connect("radar_data.db")
+    conn.execute("UPDATE mentions SET clean_status = NULL WHERE source = ?", ("拉黑源",))
+    conn.commit()
+    conn.close()
+    assert opinion_members("拉黑源") > 999
+    sqlite3.connect = limited_connect
+    try:
+        result = radar_monitor.add_source_to_blacklist("拉黑源")
+    finally:
+        sqlite3.connect = _connect
+    assert result["status"] == "success", result
+    assert opinion_members("拉黑源") == 0
+
+def scores(url):
+    conn = _connect("radar_data.db")
+    row = conn.execute("SELECT spam_score, is_spam, quality_score, hotness FROM mentions WHERE url = ?", (url,)).fetchone()
+    mention_id = conn.execute("SELECT id FROM mentions WHERE url = ?", (url,)).fetchone()[0]
+    conn.close()
+    return mention_id, row
+
+def test_edit_recomputes_spam_quality_hotness():
+    url = "https://example.com/edit/1"
+    radar_monitor.process_monitor_data([{"title": "比亚迪新车销量大涨创新高，用户好评如潮", "source": "36氪",
+                                         "url": url, "summary": {"fact": "新品", "angle": "技术"},
+                                         "full_content": "新一代电池在针刺测试中不起火不冒烟，能量密度较上一代提高约百分之十五，"
+                                                         "首款搭载车型预计下半年交付，官方同时公布了电池包的质保政策与回收计划。"}])
+    mention_id, (spam_before, is_spam_before, quality_before, hotness_before) = scores(url)
+    garbage_before = radar_monitor.get_content_quality_stats()["garbage_count"]
+    assert is_spam_before == 0
+
+    spam_text = "兼职刷单日赚三百，加微信私聊，点击链接免费领取优惠券 " * 5
+    assert radar_monitor.update_content_full(mention_id, title="日结兼职刷单躺赚", content_text=spam_text)["status"] == "success"
+    _, (spam_score, is_spam, quality, hotness) = scores(url)
+    assert spam_score > spam_before and is_spam == 1
+    assert quality < quality_before
+    # 新标题情感分变化，热度随之重算，与衰减任务按同一参考时刻重算的结果一致
+    assert hotness != hotness_before
+    conn = _connect("radar_data.db")
+    c = conn.cursor()
+    radar_scores.recompute_hotness(c, radar_scores.hotness_ref(c))
+    assert abs(c.execute("SELECT hotness FROM mentions WHERE id = ?", (mention_id,)).fetchone()[0] - hotness) < 1e-6
+    conn.rollback()
+    conn.close()
+    assert radar_monitor.get_content_quality_stats()["garbage_count"] == garbage_before + 1
+
+    # 编辑手动给出的质量分不被覆盖
+    radar_monitor.update_content_full(mention_id, title="比亚迪新车交付", content_text="正常的产品介绍", quality_score=88)
+    _, (_, is_spam, quality, _) = scores(url)
+    assert (is_spam, quality) == (0, 88)
+
+if __name__ == "__main__":
+    setup_module()
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
+    teardown_module()
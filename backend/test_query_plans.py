@@ -0,0 +1,221 @@
+"""
+热点查询的执行计划检查
+
+在临时目录里建一个全新的数据库 (执行全部迁移)，灌入少量数据后调用看板、内容库、入库查重、快报 / 作品 / 选题列表，
+记录这些函数实际执行的每条 SELECT 并对其做 EXPLAIN QUERY PLAN：
+只要有一条查询对 mentions / mention_matches / raw_flashes / minhash_bands / article_tags / articles / selections 退化成全表扫描 (SCAN 且未使用索引) 即失败。
+
+用法: python test_query_plans.py   (也可以用 pytest 运行)
+"""
+import os
+import sys
+import random
+import sqlite3
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BACKEND_DIR)
+
+# 各模块 import 时会在当前目录建表，先切到临时目录，不碰仓库里的 radar_data.db
+os.chdir(tempfile.mkdtemp(prefix="radar_plans_"))
+
+import radar_monitor
+import radar_flash
+import radar_articles
+import radar_selections
+from radar_migrations import run_migrations
+
+# 热点表 (含查询里用到的别名)
+HOT_TABLES = {"mentions", "m", "raw_flashes", "minhash_bands", "b", "article_tags", "at", "mention_matches", "mm", "articles", "selections"}
+
+PLANS = []  # [(sql, [plan detail, ...]), ...]
+
+class PlanRecorder(sqlite3.Connection):
+    """记录连接上执行过的 SELECT，关闭前在同一连接上逐条 EXPLAIN (临时表此时仍然存在)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._statements = []
+        self.set_trace_callback(self._record)
+
+    def _record(self, sql):
+        if sql.lstrip().upper().startswith(("SELECT", "WITH")):
+            self._statements.append(sql)
+
+    def close(self):
+        self.set_trace_callback(None)
+        for sql in self._statements:
+            details = [row[3] for row in self.execute("EXPLAIN QUERY PLAN " + sql).fetchall()]
+            PLANS.append((sql, details))
+        self._statements = []
+        super().close()
+
+_connect = sqlite3.connect
+
+def recording_connect(*args, **kwargs):
+    kwargs.setdefault("factory", PlanRecorder)
+    return _connect(*args, **kwargs)
+
+def full_scans(details):
+    """SCAN <热点表> 且没有走索引；按索引有序扫描 (ORDER BY ... LIMIT) 不算"""
+    bad = []
+    for d in details:
+        parts = d.split()
+        if len(parts) >= 2 and parts[0] == "SCAN" and parts[1] in HOT_TABLES and "INDEX" not in d:
+            bad.append(d)
+    return bad
+
+# ==========================================
+# 数据准备
+# ==========================================
+
+def seed():
+    run_migrations()
+    client_id = radar_monitor.save_full_client_config("计划测试", "汽车", 1, {"brand_keywords": ["特斯拉", "比亚迪"]})["client_id"]
+    rnd = random.Random(3)
+    words = ["特斯拉", "比亚迪", "小米", "起火", "降价", "发布", "财报", "召回", "新车", "销量"]
+    items = [{"title": "".join(rnd.choice(words) for _ in range(5)) + f"第{i}期",
+              "source": rnd.choice(["微博", "36氪", "知乎"]),
+              "url": f"https://example.com/{i}",
+              "summary": {"fact": "摘要", "angle": "角度"}} for i in range(300)]
+    radar_monitor.process_monitor_data(items)
+
+    conn = _connect("radar_data.db")
+    now = time.time()
+    conn.executemany("INSERT INTO raw_flashes (source_type, title, content, publish_time, content_hash, status, created_at) VALUES (?,?,?,?,?,?,?)",
+                     [(rnd.choice(["cls", "google"]), f"快讯{i}", "内容", now - i * 60, f"h{i}", rnd.choice(["draft", "published"]), now)
+                      for i in range(300)])
+    conn.execute("INSERT INTO tags (name, tag_type) VALUES ('汽车', 'CATEGORY')")
+    conn.executemany("INSERT INTO article_tags (article_id, mention_id, tag_id, source) VALUES (?, ?, 1, 'test')",
+                     [(str(i), i) for i in range(1, 100)])
+    conn.commit()
+    conn.close()
+
+    for i in range(60):
+        radar_articles.save_article("plans", f"作品{i}", "正文", status=rnd.choice(["draft", "published"]))
+        radar_selections.add_selection("plans", f"选题{i}")
+    # 每 3 条同一时刻，翻页时要靠 id 区分
+    conn = _connect("radar_data.db")
+    conn.execute("UPDATE articles SET updated_at = 1000 + id / 3")
+    conn.execute("UPDATE selections SET created_at = 1000 + id / 3")
+    conn.commit()
+    conn.close()
+    return client_id
+
+def check(label, fn):
+    del PLANS[:]
+    sqlite3.connect = recording_connect
+    try:
+        fn()
+    finally:
+        sqlite3.connect = _connect
+    assert PLANS, f"{label}: 没有记录到任何查询"
+    failures = [(sql, bad) for sql, details in PLANS for bad in [full_scans(details)] if bad]
+    assert not failures, f"{label}: 查询退化为全表扫描\n" + "\n".join(f"  {b}\n    {s.strip()[:200]}" for s, b in failures)
+
+CLIENT_ID = seed()
+
+# ==========================================
+# 用例
+# ==========================================
+
+def test_monitor_stats_plans():
+    check("看板", lambda: radar_monitor.get_monitor_stats())
+    check("看板 (单客户)", lambda: radar_monitor.get_monitor_stats(CLIENT_ID))
+
+def test_client_plans():
+    check("客户列表", lambda: radar_monitor.get_all_clients())
+    check("客户日报", lambda: radar_monitor.generate_client_report(CLIENT_ID))
+
+def test_content_library_plans():
+    check("内容库", lambda: radar_monitor.get_global_content_library())
+    check("内容库 (筛选)", lambda: radar_monitor.get_global_content_library(
+        search_text="特斯拉", client_id=CLIENT_ID, source_filter=["微博"], sentiment_filter=["negative"],
+        clean_status_filter=["uncleaned"], time_range="7d", page=2))
+
+def test_library_sort_plans():
+    for sort in ("hotness", "quality"):
+        first = radar_monitor.get_global_content_library(time_range="7d", page_size=50, cursor="", sort=sort)
+        check(f"内容库 (按{sort}排序)", lambda: radar_monitor.get_global_content_library(time_range="7d", sort=sort))
+        check(f"内容库 (按{sort}排序, 游标)", lambda: radar_monitor.get_global_content_library(
+            time_range="7d", page_size=50, cursor=first["next_cursor"], sort=sort))
+
+def test_library_facets_plans():
+    radar_monitor.RESPONSE_CACHE.clear()
+    check("内容库分面", lambda: radar_monitor.get_library_facets(time_range="7d"))
+    check("内容库分面 (筛选)", lambda: radar_monitor.get_library_facets(
+        search_text="特斯拉", client_id=CLIENT_ID, sentiment_filter=["negative"], time_range="7d"))
+    check("内容库分面 (近似)", lambda: radar_monitor.get_library_facets(time_range="all", approximate=True))
+
+def test_saved_search_delta_plans():
+    search_id = radar_monitor.save_search("plans", "特斯拉", {"search_text": "特斯拉", "time_range": "7d"})["id"]
+    client_search = radar_monitor.save_search("plans", "客户", {"client_id": CLIENT_ID, "time_range": "all"})["id"]
+    # 保存之后新入库的内容才计入增量
+    rnd = random.Random(11)
+    words = ["特斯拉", "比亚迪", "小米", "起火", "降价", "发布", "财报", "召回", "新车", "销量"]
+    radar_monitor.process_monitor_data([{"title": "特斯拉" + "".join(rnd.choice(words) for _ in range(6)) + f"第{i}期",
+                                         "source": "微博", "url": f"https://example.com/new/{i}",
+                                         "summary": {"fact": "摘要", "angle": "角度"}} for i in range(20)])
+    assert radar_monitor.get_saved_search_delta("plans", search_id)["new_count"] > 0
+    check("保存的检索 (增量)", lambda: radar_monitor.get_saved_search_delta("plans", search_id))
+    check("保存的检索 (客户, 增量)", lambda: radar_monitor.get_saved_search_delta("plans", client_search))
+    check("保存的检索 (列表)", lambda: radar_monitor.list_saved_searches("plans"))
+
+def test_quality_stats_plans():
+    check("数据质检", lambda: radar_monitor.get_content_quality_stats())
+    check("内容库 (排除垃圾)", lambda: radar_monitor.get_global_content_library(exclude_spam=True))
+
+def test_ingest_dedup_plans():
+    rnd = random.Random(5)
+    items = [{"title": f"特斯拉降价{rnd.randint(0, 10 ** 6)}比亚迪跟进", "source": "微博",
+              "url": f"https://example.com/{rnd.randint(0, 600)}", "summary": {"fact": "摘要", "angle": "角度"}}
+             for _ in range(50)]
+    check("入库查重", lambda: radar_monitor.process_monitor_data(items))
+
+def test_cursor_pagination_plans():
+    first = radar_monitor.get_global_content_library(time_range="all", page_size=50, cursor="")
+    check("内容库 (游标)", lambda: radar_monitor.get_global_content_library(time_range="all", page_size=50, cursor=first["next_cursor"]))
+    flashes = radar_flash.get_flashes("draft", 20, "all", "")
+    check("快报列表 (游标)", lambda: radar_flash.get_flashes("draft", 20, "all", flashes["next_cursor"]))
+
+def walk(fetch):
+    """从第一页起按游标翻到末尾，返回全部 id"""
+    ids, cursor = [], ""
+    while cursor is not None:
+        page = fetch(cursor)
+        ids.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+    return ids
+
+def test_article_selection_cursor_plans():
+    articles = lambda cursor: radar_articles.get_articles("plans", page_size=7, cursor=cursor)
+    selections = lambda cursor: radar_selections.get_selections("plans", page_size=7, cursor=cursor)
+    # 游标翻页与一次取全量 (page/page_size) 的顺序一致，同一时刻的行不重复、不遗漏
+    assert walk(articles) == [a["id"] for a in radar_articles.get_articles("plans", page_size=100)["items"]]
+    assert walk(selections) == [s["id"] for s in radar_selections.get_selections("plans", page_size=100)["items"]]
+    second = articles("")["next_cursor"]
+    check("作品列表 (游标)", lambda: articles(second))
+    check("作品列表 (状态, 游标)", lambda: radar_articles.get_articles("plans", status="draft", page_size=7, cursor=second))
+    check("选题列表 (游标)", lambda: selections(selections("")["next_cursor"]))
+
+def test_flash_list_plans():
+    check("快报列表", lambda: radar_flash.get_flashes())
+    check("快报列表 (状态)", lambda: radar_flash.get_flashes("draft"))
+    check("快报列表 (来源)", lambda: radar_flash.get_flashes("all", 20, "cls"))
+    check("快报列表 (状态+来源)", lambda: radar_flash.get_flashes("published", 20, "google"))
+
+def test_migrations_recorded():
+    conn = _connect("radar_data.db")
+    versions = [r[0] for r in conn.execute("SELECT version FROM schema_migrations ORDER BY version")]
+    conn.close()
+    import radar_migrations
+    assert versions == sorted(v for v, _, _ in radar_migrations.MIGRATIONS)
+    # 同一进程内重复调用不再执行任何迁移
+    assert run_migrations() == []
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
@@ -0,0 +1,117 @@
+"""
+摘要任务队列检查
+
+在临时目录里建一个全新的数据库，把 ai_engine 的大模型客户端替换为假的客户端 (不发出网络请求)：
+- 大模型调用失败时任务按退避重新排队，超过最大次数进入死信，内容标记为摘要失败 (不写入兜底摘要)
+- 租约过期被其他 worker 重新领取后，原 worker 的完成 / 失败不生效
+
+用法: python test_summary_jobs.py   (也可以用 pytest 运行)
+"""
+import os
+import sys
+import sqlite3
+from types import SimpleNamespace
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BACKEND_DIR)
+
+from radar_testdb import TempDatabase
+
+DB = TempDatabase("radar_jobs_")
+with DB.imports():
+    import ai_engine
+    import radar_jobs
+    import radar_monitor
+
+def fake_client(reply=None, error=None):
+    def create(**kwargs):
+        if error:
+            raise error
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))])
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+FAILING = fake_client(error=ConnectionError("upstream timeout"))
+WORKING = fake_client(reply='{"fact": "大模型事实", "angle": "1. 角度", "category": "汽车", "tags": []}')
+
+def setup_module(module=None):
+    global ORIGINAL_CLIENT
+    DB.enter()
+    ORIGINAL_CLIENT = ai_engine.client
+
+def teardown_module(module=None):
+    ai_engine.client = ORIGINAL_CLIENT
+    DB.leave()
+
+def ingest(key):
+    radar_monitor.process_monitor_data([{"title": f"待摘要内容{key}，新车发布会现场直击与价格解读", "source": "36氪",
+                                         "url": f"https://example.com/jobs/{key}", "summary": ""}])
+    conn = sqlite3.connect(radar_jobs.DB_FILE)
+    mention_id = conn.execute("SELECT id FROM mentions WHERE url=?", (f"https://example.com/jobs/{key}",)).fetchone()[0]
+    job_id = conn.execute("SELECT id FROM summary_jobs WHERE mention_id=?", (mention_id,)).fetchone()[0]
+    conn.close()
+    return job_id, mention_id
+
+def state(job_id, mention_id):
+    conn = sqlite3.connect(radar_jobs.DB_FILE)
+    job = conn.execute("SELECT status, attempts, lease_owner FROM summary_jobs WHERE id=?", (job_id,)).fetchone()
+    mention = conn.execute("SELECT summary_status, ai_fact FROM mentions WHERE id=?", (mention_id,)).fetchone()
+    conn.close()
+    return job, mention
+
+def make_available(job_id):
+    conn = sqlite3.connect(radar_jobs.DB_FILE)
+    conn.execute("UPDATE summary_jobs SET available_at=0 WHERE id=?", (job_id,))
+    conn.commit()
+    conn.close()
+
+def claim(worker_id, job_id, lease_seconds=radar_jobs.LEASE_SECONDS):
+    jobs = [j for j in radar_jobs.claim_summary_jobs(worker_id, limit=100, lease_seconds=lease_seconds) if j[0] == job_id]
+    assert jobs, f"{worker_id} 没有领取到任务 {job_id}"
+    return jobs[0]
+
+# ==========================================
+# 用例
+# ==========================================
+
+def test_llm_failure_retries_then_dead_letters():
+    ai_engine.client = FAILING
+    job_id, mention_id = ingest("fail")
+    for attempt in range(1, radar_jobs.MAX_ATTEMPTS):
+        assert radar_jobs.run_summary_job(claim("w1", job_id), "w1") is False
+        (status, attempts, owner), (summary_status, ai_fact) = state(job_id, mention_id)
+        assert (status, attempts, owner) == ("queued", attempt, None)
+        # 失败时不写入兜底摘要
+        assert (summary_status, ai_fact) == ("pending", "")
+        make_available(job_id)
+    assert radar_jobs.run_summary_job(claim("w1", job_id), "w1") is False
+    (status, attempts, _), (summary_status, ai_fact) = state(job_id, mention_id)
+    assert (status, attempts) == ("dead", radar_jobs.MAX_ATTEMPTS)
+    assert (summary_status, ai_fact) == ("failed", "")
+
+def test_llm_success_completes():
+    ai_engine.client = WORKING
+    job_id, mention_id = ingest("ok")
+    assert radar_jobs.run_summary_job(claim("w1", job_id), "w1") is True
+    (status, _, _), (summary_status, ai_fact) = state(job_id, mention_id)
+    assert (status, summary_status, ai_fact) == ("done", "done", "大模型事实")
+
+def test_expired_lease_cannot_complete_or_fail():
+    ai_engine.client = WORKING
+    job_id, mention_id = ingest("lease")
+    claim("w1", job_id, lease_seconds=-1)   # 租约立即过期
+    fresh = claim("w2", job_id)
+    assert radar_jobs.complete_summary_job("w1", job_id, mention_id, "过期结果", "") is False
+    assert radar_jobs.fail_summary_job("w1", job_id, mention_id, "timeout") is False
+    (status, attempts, owner), (summary_status, _) = state(job_id, mention_id)
+    assert (status, attempts, owner, summary_status) == ("running", 2, "w2", "pending")
+    assert radar_jobs.run_summary_job(fresh, "w2") is True
+    (status, _, _), (summary_status, ai_fact) = state(job_id, mention_id)
+    assert (status, summary_status, ai_fact) == ("done", "done", "大模型事实")
+
+if __name__ == "__main__":
+    setup_module()
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")
+    teardown_module()